@@ -0,0 +1,172 @@
+import os
+import math
+import threading
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+from rate_limiter import get_rate_limiter
+
+load_dotenv()
+
+# Each enrichment chunk should come back within this many seconds
+ENRICHMENT_CHUNK_TARGET_SECONDS = float(os.getenv("ENRICHMENT_CHUNK_TARGET_SECONDS", 20))
+# Used until enough chunk latencies have been observed to fit the model
+ENRICHMENT_CHUNK_DEFAULT_SIZE = int(os.getenv("ENRICHMENT_CHUNK_DEFAULT_SIZE", 3))
+ENRICHMENT_CHUNK_MAX_SIZE = int(os.getenv("ENRICHMENT_CHUNK_MAX_SIZE", 10))
+ENRICHMENT_CHUNK_MIN_SAMPLES = int(os.getenv("ENRICHMENT_CHUNK_MIN_SAMPLES", 10))
+# Share of the search model's currently available requests one resume may spend
+ENRICHMENT_CHUNK_HEADROOM_FRACTION = float(os.getenv("ENRICHMENT_CHUNK_HEADROOM_FRACTION", 0.5))
+
+
+class AdaptiveChunkSizer:
+    """
+    Choose how many companies go into one enrichment search call.
+
+    Observed (company count, latency) pairs are fitted to latency = fixed +
+    per_company * count, and the chunk size is the largest count expected to
+    finish within the target. When the search model has little rate-limit
+    headroom left, chunks grow so the resume needs fewer calls.
+    """
+
+    def __init__(
+        self,
+        model: str,
+        target_seconds: float = ENRICHMENT_CHUNK_TARGET_SECONDS,
+        default_size: int = ENRICHMENT_CHUNK_DEFAULT_SIZE,
+        max_size: int = ENRICHMENT_CHUNK_MAX_SIZE,
+        min_samples: int = ENRICHMENT_CHUNK_MIN_SAMPLES,
+        max_samples: int = 200,
+    ):
+        self.model = model
+        self.target_seconds = target_seconds
+        self.default_size = max(1, default_size)
+        self.max_size = max(1, max_size)
+        self.min_samples = min_samples
+        self._samples: deque = deque(maxlen=max_samples)
+        self._lock = threading.Lock()
+        self._stats = {"plans": 0, "chunks": 0, "duplicates_collapsed": 0, "headroom_limited": 0}
+        self._last_size: Optional[int] = None
+
+    def record(self, companies: int, seconds: float) -> None:
+        """Record the latency of one search call covering this many companies"""
+        if companies > 0:
+            with self._lock:
+                self._samples.append((companies, seconds))
+
+    def fit(self) -> Optional[Tuple[float, float]]:
+        """
+        Least-squares fit of chunk latency against company count.
+
+        Returns:
+            tuple: (fixed seconds, seconds per company), or None until there are
+            enough samples covering at least two chunk sizes
+        """
+        with self._lock:
+            samples = list(self._samples)
+        if len(samples) < self.min_samples:
+            return None
+        mean_n = sum(n for n, _ in samples) / len(samples)
+        mean_t = sum(t for _, t in samples) / len(samples)
+        var_n = sum((n - mean_n) ** 2 for n, _ in samples)
+        if var_n == 0:
+            return None
+        per_company = sum((n - mean_n) * (t - mean_t) for n, t in samples) / var_n
+        return mean_t - per_company * mean_n, per_company
+
+    def latency_chunk_size(self) -> int:
+        """Largest chunk expected to finish within the target latency"""
+        model = self.fit()
+        if model is None:
+            return min(self.default_size, self.max_size)
+        fixed, per_company = model
+        if per_company <= 0:
+            return self.max_size
+        size = math.floor((self.target_seconds - fixed) / per_company)
+        return max(1, min(self.max_size, size))
+
+    def request_budget(self) -> int:
+        """Search calls one resume may make under the model's current rate-limit headroom"""
+        available = get_rate_limiter(self.model).requests.level
+        return max(1, math.floor(available * ENRICHMENT_CHUNK_HEADROOM_FRACTION))
+
+    def chunk_size(self, companies: int) -> int:
+        """
+        Chunk size for enriching this many companies now.
+
+        Args:
+            companies (int): Number of distinct companies to search
+
+        Returns:
+            int: Companies per search call
+        """
+        size = self.latency_chunk_size()
+        budget = self.request_budget()
+        if companies > 0 and math.ceil(companies / size) > budget:
+            size = math.ceil(companies / budget)
+            with self._lock:
+                self._stats["headroom_limited"] += 1
+        self._last_size = size
+        return size
+
+    def plan(self, items: List[Any], duplicates: int = 0) -> List[List[Any]]:
+        """
+        Split distinct companies into evenly sized chunks.
+
+        Args:
+            items (list): Distinct companies to search
+            duplicates (int): Repeat entries already collapsed by the caller, for the statistics
+
+        Returns:
+            list: Chunks in input order, e.g. 7 companies at size 3 -> [3, 2, 2]
+        """
+        if not items:
+            return []
+        size = self.chunk_size(len(items))
+        count = math.ceil(len(items) / size)
+        base, extra = divmod(len(items), count)
+        chunks = []
+        start = 0
+        for i in range(count):
+            end = start + base + (1 if i < extra else 0)
+            chunks.append(items[start:end])
+            start = end
+        with self._lock:
+            self._stats["plans"] += 1
+            self._stats["chunks"] += len(chunks)
+            self._stats["duplicates_collapsed"] += duplicates
+        return chunks
+
+    def stats(self) -> Dict:
+        model = self.fit()
+        with self._lock:
+            stats = dict(self._stats)
+            samples = len(self._samples)
+        return {
+            "target_seconds": self.target_seconds,
+            "samples": samples,
+            "fixed_seconds": round(model[0], 3) if model else None,
+            "seconds_per_company": round(model[1], 3) if model else None,
+            "latency_chunk_size": self.latency_chunk_size(),
+            "last_chunk_size": self._last_size,
+            "request_budget": self.request_budget(),
+            **stats,
+            "avg_chunks_per_plan": round(stats["chunks"] / stats["plans"], 2) if stats["plans"] else None,
+        }
+
+
+_sizers: Dict[str, AdaptiveChunkSizer] = {}
+_sizers_lock = threading.Lock()
+
+
+def get_chunk_sizer(model: str) -> AdaptiveChunkSizer:
+    """Return the process-wide chunk sizer for a search model"""
+    sizer = _sizers.get(model)
+    if sizer is None:
+        with _sizers_lock:
+            sizer = _sizers.setdefault(model, AdaptiveChunkSizer(model))
+    return sizer
+
+
+def get_chunk_sizing_stats() -> Dict[str, Dict]:
+    """Fitted chunk latency model, chosen sizes and collapsed duplicates per search model"""
+    return {model: sizer.stats() for model, sizer in list(_sizers.items())}
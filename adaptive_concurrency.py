@@ -0,0 +1,186 @@
+import os
+import asyncio
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional
+import openai
+from dotenv import load_dotenv
+
+load_dotenv()
+
+ADAPTIVE_CONCURRENCY_INITIAL = float(os.getenv("ADAPTIVE_CONCURRENCY_INITIAL", 8))
+ADAPTIVE_CONCURRENCY_MIN = float(os.getenv("ADAPTIVE_CONCURRENCY_MIN", 1))
+ADAPTIVE_CONCURRENCY_MAX = float(os.getenv("ADAPTIVE_CONCURRENCY_MAX", 64))
+# Multiplicative decrease on 429/5xx/timeouts, gentler decrease on latency spikes
+ADAPTIVE_BACKOFF_FACTOR = float(os.getenv("ADAPTIVE_BACKOFF_FACTOR", 0.5))
+ADAPTIVE_LATENCY_BACKOFF_FACTOR = float(os.getenv("ADAPTIVE_LATENCY_BACKOFF_FACTOR", 0.9))
+# A call slower than this multiple of the baseline latency counts as a spike
+ADAPTIVE_LATENCY_TOLERANCE = float(os.getenv("ADAPTIVE_LATENCY_TOLERANCE", 2.0))
+
+
+def error_status_code(exc: BaseException) -> Optional[int]:
+    """HTTP status carried by an OpenAI or Google GenAI SDK error, if any"""
+    for attr in ("status_code", "code"):
+        value = getattr(exc, attr, None)
+        if isinstance(value, int):
+            return value
+    response = getattr(exc, "response", None)
+    value = getattr(response, "status_code", None)
+    return value if isinstance(value, int) else None
+
+
+def is_overload_error(exc: BaseException) -> bool:
+    """True for errors that signal provider overload: 429, 5xx, timeouts and dropped connections"""
+    if isinstance(exc, (openai.APITimeoutError, openai.APIConnectionError, asyncio.TimeoutError, TimeoutError)):
+        return True
+    status = error_status_code(exc)
+    if status is not None:
+        return status == 429 or status >= 500
+    message = str(exc)
+    return "429" in message or "RESOURCE_EXHAUSTED" in message or "UNAVAILABLE" in message
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    AIMD limit on in-flight calls for one model.
+
+    Each successful call at normal latency grows the limit by 1/limit (about
+    +1 per full window). An overload error halves it, and a latency spike
+    shrinks it by ADAPTIVE_LATENCY_BACKOFF_FACTOR. Decreases apply at most
+    once per baseline latency, so one burst of failures counts as one signal.
+    Waiters are admitted in FIFO order.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        initial: float = ADAPTIVE_CONCURRENCY_INITIAL,
+        minimum: float = ADAPTIVE_CONCURRENCY_MIN,
+        maximum: float = ADAPTIVE_CONCURRENCY_MAX,
+    ):
+        self.name = name
+        self.minimum = minimum
+        self.maximum = maximum
+        self.limit = max(minimum, min(maximum, initial))
+        self.in_flight = 0
+        self.baseline_latency: Optional[float] = None
+        self._last_decrease = 0.0
+        self._waiters: deque = deque()
+        self._lock = threading.Lock()
+        self._stats = {"increases": 0, "overload_decreases": 0, "latency_decreases": 0, "queued": 0}
+
+    def _has_room(self) -> bool:
+        return self.in_flight < max(1, int(self.limit))
+
+    def _wake_waiters(self) -> None:
+        """Admit queued callers while there is room (lock held)"""
+        while self._waiters and self._has_room():
+            waiter = self._waiters.popleft()
+            if waiter.cancelled:
+                continue
+            waiter.admitted = True
+            self.in_flight += 1
+            waiter.loop.call_soon_threadsafe(_resolve, waiter.future)
+
+    async def acquire(self) -> None:
+        """Wait for an in-flight slot on the event loop"""
+        with self._lock:
+            if not self._waiters and self._has_room():
+                self.in_flight += 1
+                return
+            loop = asyncio.get_running_loop()
+            waiter = _Waiter(loop=loop, future=loop.create_future())
+            self._waiters.append(waiter)
+            self._stats["queued"] += 1
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            with self._lock:
+                if waiter.admitted:
+                    # Admitted just as we were cancelled: give the slot back
+                    self.in_flight -= 1
+                    self._wake_waiters()
+                else:
+                    waiter.cancelled = True
+            raise
+
+    def release(self, latency: Optional[float], overloaded: bool = False) -> None:
+        """
+        Free a slot and adjust the limit from the call's outcome.
+
+        Args:
+            latency (float, optional): Seconds the call took; None if it failed for a non-overload reason
+            overloaded (bool): The call failed with a 429/5xx/timeout
+        """
+        now = time.monotonic()
+        with self._lock:
+            self.in_flight -= 1
+            cooldown = self.baseline_latency or 1.0
+
+            if overloaded:
+                if now - self._last_decrease >= cooldown:
+                    self.limit = max(self.minimum, self.limit * ADAPTIVE_BACKOFF_FACTOR)
+                    self._last_decrease = now
+                    self._stats["overload_decreases"] += 1
+            elif latency is not None:
+                if self.baseline_latency is None:
+                    self.baseline_latency = latency
+                spike = latency > self.baseline_latency * ADAPTIVE_LATENCY_TOLERANCE
+                if spike:
+                    if now - self._last_decrease >= cooldown:
+                        self.limit = max(self.minimum, self.limit * ADAPTIVE_LATENCY_BACKOFF_FACTOR)
+                        self._last_decrease = now
+                        self._stats["latency_decreases"] += 1
+                else:
+                    self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+                    self._stats["increases"] += 1
+                # Slow-moving baseline so a sustained shift is eventually accepted as normal
+                self.baseline_latency = 0.95 * self.baseline_latency + 0.05 * latency
+
+            self._wake_waiters()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "limit": round(self.limit, 2),
+                "in_flight": self.in_flight,
+                "waiting": sum(1 for waiter in self._waiters if not waiter.cancelled),
+                "baseline_latency_seconds": round(self.baseline_latency, 3) if self.baseline_latency else None,
+                **self._stats,
+            }
+
+
+class _Waiter:
+    """A queued acquire waiting on an event-loop future"""
+
+    __slots__ = ("loop", "future", "admitted", "cancelled")
+
+    def __init__(self, loop, future):
+        self.loop = loop
+        self.future = future
+        self.admitted = False
+        self.cancelled = False
+
+
+def _resolve(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+_limiters: Dict[str, AdaptiveConcurrencyLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_concurrency_limiter(model: str) -> AdaptiveConcurrencyLimiter:
+    """Return the process-wide adaptive concurrency limiter for a model"""
+    limiter = _limiters.get(model)
+    if limiter is None:
+        with _limiters_lock:
+            limiter = _limiters.setdefault(model, AdaptiveConcurrencyLimiter(model))
+    return limiter
+
+
+def get_concurrency_stats() -> Dict[str, Dict]:
+    """Current in-flight window and adjustment counters for every model seen so far"""
+    return {model: limiter.stats() for model, limiter in list(_limiters.items())}
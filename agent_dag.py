@@ -0,0 +1,186 @@
+import asyncio
+import inspect
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from metrics import LatencyWindow
+
+
+class AgentNode:
+    """One agent in a DAG: a callable and the names of the nodes whose outputs it takes as arguments"""
+
+    def __init__(self, name: str, func: Callable[..., Any], deps: Sequence[str] = ()):
+        self.name = name
+        self.func = func
+        self.deps = tuple(deps)
+
+
+class DagRun:
+    """Outputs and timing of one DAG execution"""
+
+    def __init__(self, dag_name: str, results: Dict[str, Any], timings: Dict[str, Dict[str, float]], critical_path: List[str], total_seconds: float):
+        self.dag_name = dag_name
+        self.results = results
+        self.timings = timings
+        self.critical_path = critical_path
+        self.total_seconds = total_seconds
+
+    def __getitem__(self, name: str) -> Any:
+        return self.results[name]
+
+    def report(self) -> None:
+        """Print per-node timings and the critical path"""
+        node_times = {name: timing["duration"] for name, timing in self.timings.items()}
+        path = " → ".join(self.critical_path)
+        print(f"📊 {self.dag_name} agent times: {node_times}")
+        print(f"🧭 Critical path: {path} ({self.total_seconds}s end-to-end)")
+
+
+class AgentDAG:
+    """
+    Dataflow executor for agent pipelines.
+
+    Every node starts as soon as all of its dependencies have produced output,
+    so end-to-end latency is the critical path through the graph instead of the
+    sum of per-phase maxima. Nodes may be coroutine functions or plain functions
+    (run inline, for cheap local steps).
+
+    Example:
+        dag = AgentDAG("resume")
+        dag.add("experience", experience_info_extractor, deps=["resume_text"])
+        dag.add("enrichment", enrich_companies_adaptive, deps=["experience"])
+        run = await dag.run(resume_text=text)
+        run["enrichment"]
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.nodes: Dict[str, AgentNode] = {}
+
+    def add(self, name: str, func: Callable[..., Any], deps: Sequence[str] = ()) -> "AgentDAG":
+        """Add a node; func is called with the outputs of deps, in order"""
+        if name in self.nodes:
+            raise ValueError(f"Node '{name}' already exists in DAG '{self.name}'")
+        self.nodes[name] = AgentNode(name, func, deps)
+        return self
+
+    def _validate(self, inputs: Dict[str, Any]) -> None:
+        for node in self.nodes.values():
+            for dep in node.deps:
+                if dep not in self.nodes and dep not in inputs:
+                    raise ValueError(f"Node '{node.name}' depends on unknown node or input '{dep}'")
+
+        # Depth-first cycle check
+        visiting, done = set(), set()
+
+        def visit(name: str) -> None:
+            if name in done or name in inputs:
+                return
+            if name in visiting:
+                raise ValueError(f"Cycle detected in DAG '{self.name}' at node '{name}'")
+            visiting.add(name)
+            for dep in self.nodes[name].deps:
+                visit(dep)
+            visiting.discard(name)
+            done.add(name)
+
+        for name in self.nodes:
+            visit(name)
+
+    async def run(self, **inputs: Any) -> DagRun:
+        """
+        Execute the DAG.
+
+        Args:
+            **inputs: Values for the graph's source names (e.g. resume_text)
+
+        Returns:
+            DagRun: Node outputs, per-node timings and the critical path
+
+        Raises:
+            Exception: The first node failure; all other nodes are cancelled
+        """
+        self._validate(inputs)
+        run_start = time.perf_counter()
+        timings: Dict[str, Dict[str, float]] = {}
+        tasks: Dict[str, asyncio.Task] = {}
+
+        async def execute(node: AgentNode) -> Any:
+            args = []
+            for dep in node.deps:
+                args.append(inputs[dep] if dep in inputs else await tasks[dep])
+
+            started = time.perf_counter()
+            if inspect.iscoroutinefunction(node.func):
+                result = await node.func(*args)
+            else:
+                result = node.func(*args)
+                if inspect.isawaitable(result):
+                    result = await result
+            finished = time.perf_counter()
+
+            timings[node.name] = {
+                "start": round(started - run_start, 3),
+                "end": round(finished - run_start, 3),
+                "duration": round(finished - started, 3),
+            }
+            return result
+
+        for node in self.nodes.values():
+            tasks[node.name] = asyncio.create_task(execute(node), name=f"{self.name}:{node.name}")
+
+        try:
+            # Wait for every node; the first failure propagates
+            await asyncio.gather(*tasks.values())
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            raise
+
+        total_seconds = round(time.perf_counter() - run_start, 3)
+        critical_path = self._critical_path(timings, inputs)
+        run = DagRun(self.name, {name: task.result() for name, task in tasks.items()}, timings, critical_path, total_seconds)
+        _record_run(run)
+        return run
+
+    def _critical_path(self, timings: Dict[str, Dict[str, float]], inputs: Dict[str, Any]) -> List[str]:
+        """Walk back from the last node to finish, always through the dependency that finished last"""
+        if not timings:
+            return []
+        name: Optional[str] = max(timings, key=lambda n: timings[n]["end"])
+        path = []
+        while name is not None:
+            path.append(name)
+            node_deps = [dep for dep in self.nodes[name].deps if dep not in inputs]
+            name = max(node_deps, key=lambda dep: timings[dep]["end"]) if node_deps else None
+        return list(reversed(path))
+
+
+# Rolling per-node latency and critical-path frequency, per DAG name
+_node_latency: Dict[Tuple[str, str], LatencyWindow] = {}
+_total_latency: Dict[str, LatencyWindow] = {}
+_critical_paths: Dict[str, Counter] = {}
+
+
+def _record_run(run: DagRun) -> None:
+    for node_name, timing in run.timings.items():
+        _node_latency.setdefault((run.dag_name, node_name), LatencyWindow()).record(timing["duration"])
+    _total_latency.setdefault(run.dag_name, LatencyWindow()).record(run.total_seconds)
+    _critical_paths.setdefault(run.dag_name, Counter())[" → ".join(run.critical_path)] += 1
+
+
+def get_dag_stats() -> Dict[str, Any]:
+    """Per-DAG end-to-end latency, per-node latency and the most frequent critical paths"""
+    stats = {}
+    for dag_name, window in _total_latency.items():
+        stats[dag_name] = {
+            "end_to_end_seconds": window.summary(),
+            "nodes": {
+                node_name: node_window.summary()
+                for (name, node_name), node_window in _node_latency.items()
+                if name == dag_name
+            },
+            "critical_paths": dict(_critical_paths[dag_name].most_common(5)),
+        }
+    return stats
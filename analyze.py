@@ -1,13 +1,15 @@
 import os
 from pydantic import BaseModel
-from openai import OpenAI
+from openai import AsyncOpenAI
 from dotenv import load_dotenv
 from typing import List
 import json
 load_dotenv()
 openai_api_key = os.getenv("OPENAI_API_KEY")
-client = OpenAI()
+async_client = AsyncOpenAI(max_retries=0)  # retries are handled by llm_gateway
 from langfuse import observe
+from llm_gateway import llm_call, estimate_tokens
+from company_names import canonical_company_key
 
 class CompanyAnalysisItem(BaseModel):
     CompanyName: str
@@ -36,9 +38,11 @@ class Step(BaseModel):
 class resume_data(BaseModel):
     steps: list[Step]
 
-@observe(name="analyze_resume_and_jd")
-def analyze_resume_and_jd(combined_input):
-    prompt_template = """You are an expert recruitment assistant. Analyze how well the candidate matches the job description with comprehensive evaluation.
+MATCH_MODEL = "gpt-4.1-nano-2025-04-14"
+
+# Static system prompt for resume/JD matching. Kept byte-identical across calls so the
+# provider's prompt cache can reuse it; per-request data goes in the user message.
+MATCH_SYSTEM_PROMPT = """You are an expert recruitment assistant. Analyze how well the candidate matches the job description with comprehensive evaluation.
 
 ## Analysis Framework:
 
@@ -330,15 +334,98 @@ IF AIRating <= 3 → DO NOT HIRE
 - [ ] Decision rationale clearly articulated
 """
 
-    completion = client.beta.chat.completions.parse(
-    model="gpt-4.1-nano-2025-04-14",
-    messages=[
-        {"role": "system", "content": prompt_template},
+
+def unify_company_names(experience):
+    """
+    Spell every alias of an employer the same way in a stored experience list.
+
+    Entries for "TCS" and "Tata Consultancy Services Ltd" both get the first
+    spelling seen, so the matcher reads them as one company when weighing
+    tenure and company type.
+    """
+    display_names = {}
+    unified = []
+    for item in experience or []:
+        name_field = next((field for field in ("CompanyName", "company_name") if isinstance(item, dict) and item.get(field)), None)
+        if name_field is None:
+            unified.append(item)
+            continue
+        display_name = display_names.setdefault(canonical_company_key(item[name_field]), item[name_field])
+        unified.append({**item, name_field: display_name})
+    return unified
+
+
+def clean_resume_record(resume_info):
+    """Reduce a stored resume record to the fields used for matching"""
+    return {
+        "SuggestedRole": resume_info.get("suggested_role"),
+        "CandidateFullName": resume_info.get("candidate_full_name"),
+        "EmailAddress": resume_info.get("email_address"),
+        "PhoneNumber": resume_info.get("phone_number"),
+        "Skills": resume_info.get("skills", []),
+        "Experience": unify_company_names(resume_info.get("experience", [])),
+        "Education": resume_info.get("education_details", []),
+        "StabilityAssessment": resume_info.get("overall_stability_assessment"),
+        "TotalYearsOfExperience": resume_info.get("total_years_of_experience", 0.0),
+        "resume_file": resume_info.get("resume_file"),
+        "upload_date": resume_info.get("upload_date")
+    }
+
+
+def clean_jd_record(jd_info):
+    """Reduce a stored job description record to the fields used for matching"""
+    return {
+        "CompanyName": jd_info.get("company_name"),
+        "JobTitle": jd_info.get("job_title"),
+        "RequiredSkills": jd_info.get("required_skills", {"technical": [], "soft": []}),
+        "YearsOfExperienceRequired": jd_info.get("years_of_experience_required"),
+        "EducationRequirements": jd_info.get("education_requirements"),
+        "CompanyTypePreference": jd_info.get("company_type_preference"),
+        "BusinessTypePreference": jd_info.get("business_type_preference"),
+        "PreferredStability": jd_info.get("preferred_stability"),
+        "OtherImportantRequirements": jd_info.get("other_important_requirements", []),
+        "jd_file": jd_info.get("jd_file"),
+        "upload_date": jd_info.get("upload_date")
+    }
+
+
+def serialize_jd_section(cleaned_jd):
+    """Serialize the JD block of the match input; compute once per JD when matching many resumes"""
+    return f"""
+        Job Description data:
+        {json.dumps(cleaned_jd, indent=2)}
+        """
+
+
+def build_match_input(cleaned_resume, jd_section):
+    """
+    Build the user message for a match call.
+
+    The JD section comes first so that every match against the same JD shares
+    the same prompt prefix (system prompt + JD) and only the resume varies.
+
+    Args:
+        cleaned_resume (dict): Output of clean_resume_record
+        jd_section (str): Output of serialize_jd_section
+
+    Returns:
+        str: Combined input for analyze_resume_and_jd_async
+    """
+    return f"""{jd_section}
+        Resume data:
+        {json.dumps(cleaned_resume, indent=2)}
+        """
+
+
+def build_match_messages(combined_input):
+    return [
+        {"role": "system", "content": MATCH_SYSTEM_PROMPT},
         {"role": "user", "content": combined_input}
-    ],
-    response_format=resume_data,
-    )
+    ]
+
 
+def finalize_match_completion(completion):
+    """Normalize a parsed match completion and return (json_output, total_tokens)"""
     math_reasoning = completion.choices[0].message
 
     # prompt_tokens = completion.usage.prompt_tokens
@@ -347,49 +434,62 @@ IF AIRating <= 3 → DO NOT HIRE
 
     # If the model refuses to respond, you will get a refusal message
     if hasattr(math_reasoning, 'refusal') and math_reasoning.refusal:
-        # print(math_reasoning.refusal)
-        pass
-    else:
-        # Convert the parsed response to a Pydantic model
-        math_solution = resume_data(steps=math_reasoning.parsed.steps)
-        
-        # Fix AI Rating if it's > 10 (convert from 100-point scale)
-        for step in math_solution.steps:
-            if step.AIRating > 10:
-                # Convert from 100-point scale to 1-10 scale
-                if step.AIRating >= 90:
-                    step.AIRating = 9
-                elif step.AIRating >= 80:
-                    step.AIRating = 8
-                elif step.AIRating >= 70:
-                    step.AIRating = 7
-                elif step.AIRating >= 60:
-                    step.AIRating = 6
-                elif step.AIRating >= 50:
-                    step.AIRating = 5
-                elif step.AIRating >= 40:
-                    step.AIRating = 4
-                elif step.AIRating >= 30:
-                    step.AIRating = 3
-                elif step.AIRating >= 20:
-                    step.AIRating = 2
-                elif step.AIRating >= 10:
-                    step.AIRating = 1
-                else:
-                    step.AIRating = 0
-                print(f"⚠️ AI Rating was > 10, converted to: {step.AIRating}")
-            
-            # Fix FinalResult if it's coming as 0/1 instead of boolean
-            if isinstance(step.FinalResult, int):
-                original_value = step.FinalResult
-                step.FinalResult = bool(step.FinalResult)
-                print(f"⚠️ FinalResult was integer {original_value}, converted to boolean: {step.FinalResult}")
+        raise ValueError(f"Match analysis refused: {math_reasoning.refusal}")
     
-    # Convert the Pydantic model to JSON
-    json_output = math_solution.model_dump_json(indent=2)
+    # Convert the parsed response to a Pydantic model
+    json_output = finalize_match_result(resume_data(steps=math_reasoning.parsed.steps))
     return json_output,total_tokens
 
 
+def finalize_match_result(math_solution: resume_data) -> str:
+    """Fix out-of-range match fields (100-point ratings, 0/1 results) and return the result as JSON"""
+    # Fix AI Rating if it's > 10 (convert from 100-point scale)
+    for step in math_solution.steps:
+        if step.AIRating > 10:
+            # Convert from 100-point scale to 1-10 scale
+            if step.AIRating >= 90:
+                step.AIRating = 9
+            elif step.AIRating >= 80:
+                step.AIRating = 8
+            elif step.AIRating >= 70:
+                step.AIRating = 7
+            elif step.AIRating >= 60:
+                step.AIRating = 6
+            elif step.AIRating >= 50:
+                step.AIRating = 5
+            elif step.AIRating >= 40:
+                step.AIRating = 4
+            elif step.AIRating >= 30:
+                step.AIRating = 3
+            elif step.AIRating >= 20:
+                step.AIRating = 2
+            elif step.AIRating >= 10:
+                step.AIRating = 1
+            else:
+                step.AIRating = 0
+            print(f"⚠️ AI Rating was > 10, converted to: {step.AIRating}")
+        
+        # Fix FinalResult if it's coming as 0/1 instead of boolean
+        if isinstance(step.FinalResult, int):
+            original_value = step.FinalResult
+            step.FinalResult = bool(step.FinalResult)
+            print(f"⚠️ FinalResult was integer {original_value}, converted to boolean: {step.FinalResult}")
+
+    # Convert the Pydantic model to JSON
+    return math_solution.model_dump_json(indent=2)
+
+
+@observe(name="analyze_resume_and_jd_async")
+async def analyze_resume_and_jd_async(combined_input):
+    """Match a resume against a JD on the event loop, through the shared LLM gateway"""
+    completion = await llm_call(MATCH_MODEL, lambda: async_client.beta.chat.completions.parse(
+    model=MATCH_MODEL,
+    messages=build_match_messages(combined_input),
+    response_format=resume_data,
+    ), estimate_tokens(MATCH_SYSTEM_PROMPT, combined_input))
+    return finalize_match_completion(completion)
+
+
 
 # if __name__ == "__main__":
 #     combined_input = """
@@ -610,6 +710,6 @@ IF AIRating <= 3 → DO NOT HIRE
 
     
 #     """
-#     json_output,total_tokens = analyze_resume_and_jd(combined_input)
+#     json_output,total_tokens = asyncio.run(analyze_resume_and_jd_async(combined_input))
 #     print(json_output)
 #     print(total_tokens)
\ No newline at end of file
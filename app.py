@@ -1,29 +1,122 @@
 import os
+import asyncio
 import tempfile
-import shutil
 import uuid
 import json
-import requests
+import io
+import time
+import zipfile
+import socket
+import ipaddress
+import httpx
+from urllib.parse import urlsplit
+from contextlib import asynccontextmanager
 from datetime import datetime
-from fastapi import FastAPI, UploadFile, File, HTTPException, Body, Query
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Body, Query, Header
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 import uvicorn
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple
 
-from openai_batch_resume_agents import analyze_resume
-# from parallel_resume_agents import analyze_resume 
-# from gemini_parallel_resume_agents import analyze_resume
-# from resume_agent import analyze_resume 
 from jd_agent import analyze_jd
-from analyze import analyze_resume_and_jd
-from text_extractor import extract_text_from_file
+from analyze import (
+    analyze_resume_and_jd_async,
+    build_match_input,
+    clean_jd_record,
+    clean_resume_record,
+    serialize_jd_section,
+)
+from text_extractor import (
+    extract_text_from_file_async,
+    start_extraction_pool,
+    shutdown_extraction_pool,
+    get_extraction_stats,
+    ExtractionQueueFull,
+)
 from cost_calculator import calculations_cost
 from experience_calculator import calculate_total_experience
+from company_cache import get_company_cache_stats
+from company_names import get_company_names_stats
+from company_kb import get_company_kb_stats
+from singleflight import get_single_flight_stats
+from company_microbatcher import get_microbatch_stats
+from adaptive_chunking import get_chunk_sizing_stats
+from resume_cache import (
+    hash_file_bytes,
+    hash_resume_text,
+    get_cached_resume,
+    cache_resume_result,
+    get_resume_cache_stats,
+)
+from job_queue import JobQueue, JobQueueFull
+from agent_dag import get_dag_stats
+from rate_limiter import get_rate_limiter_stats
+from adaptive_concurrency import get_concurrency_stats
+from resilience import CircuitOpenError, get_resilience_stats
+from hedging import AgentDeadlineExceeded, request_sla, get_hedging_stats
+from pipeline_registry import (
+    AUTO_BACKEND,
+    PipelineBackendUnavailable,
+    UnknownPipelineBackend,
+    get_pipeline_stats,
+    resolve_backend,
+    run_backend,
+    warm_backends,
+)
+from pipeline_router import get_router_stats, record_tenant_spend, route_resume
+from provider_racing import get_racing_stats
 # Removed resume_enricher imports as web search is now integrated directly in resume_agent
 
+# External Node API that stores parsed resumes and job descriptions
+# NODE_API_BASE_URL = "https://nodeapi.hiringeye.ai/api/v1/other"
+NODE_API_BASE_URL = os.getenv("NODE_API_BASE_URL", "https://hiringapinewnodeapi.bestworks.cloud/api/v1/other")
+NODE_API_TIMEOUT_SECONDS = float(os.getenv("NODE_API_TIMEOUT_SECONDS", 10))
+
+# Background resume jobs (submit/poll API)
+RESUME_JOB_WORKERS = int(os.getenv("RESUME_JOB_WORKERS", 4))
+RESUME_JOB_MAX_QUEUE = int(os.getenv("RESUME_JOB_MAX_QUEUE", 100))
+RESUME_JOB_RESULT_TTL_SECONDS = float(os.getenv("RESUME_JOB_RESULT_TTL_SECONDS", 3600))
+RESUME_JOB_PRUNE_INTERVAL_SECONDS = float(os.getenv("RESUME_JOB_PRUNE_INTERVAL_SECONDS", 60))
+# Job callbacks: optional comma-separated host allowlist (subdomains included); private,
+# loopback and link-local addresses are always refused unless explicitly allowed for development
+JOB_CALLBACK_ALLOWED_HOSTS = [host.strip().lower() for host in os.getenv("JOB_CALLBACK_ALLOWED_HOSTS", "").split(",") if host.strip()]
+JOB_CALLBACK_ALLOW_PRIVATE_HOSTS = os.getenv("JOB_CALLBACK_ALLOW_PRIVATE_HOSTS", "false").lower() == "true"
+JOB_CALLBACK_TIMEOUT_SECONDS = float(os.getenv("JOB_CALLBACK_TIMEOUT_SECONDS", 10))
+
+# Bulk ingestion: concurrency ceiling per request and ZIP bomb guards
+BULK_MAX_CONCURRENCY = int(os.getenv("BULK_MAX_CONCURRENCY", 8))
+BULK_MAX_FILES = int(os.getenv("BULK_MAX_FILES", 500))
+BULK_MAX_ZIP_UNCOMPRESSED_BYTES = int(os.getenv("BULK_MAX_ZIP_UNCOMPRESSED_BYTES", 200 * 1024 * 1024))
+
+SUPPORTED_RESUME_EXTENSIONS = ('.pdf', '.docx', '.txt')
+
+# One-JD-vs-many-resumes matching
+BATCH_MATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MATCH_MAX_CONCURRENCY", 8))
+BATCH_MATCH_MAX_RESUMES = int(os.getenv("BATCH_MATCH_MAX_RESUMES", 500))
+
+# Shared keep-alive HTTP client, created on startup
+http_client: Optional[httpx.AsyncClient] = None
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start shared resources on startup and release them on shutdown"""
+    global http_client
+    http_client = httpx.AsyncClient(
+        timeout=httpx.Timeout(NODE_API_TIMEOUT_SECONDS, connect=3.0),
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=30.0),
+    )
+    start_extraction_pool()
+    await warm_backends()
+    await resume_jobs.start()
+    yield
+    await resume_jobs.stop()
+    shutdown_extraction_pool()
+    await http_client.aclose()
+    http_client = None
+
 # Create FastAPI app
-app = FastAPI(title="Resume Parser API", description="API for parsing resumes and job descriptions")
+app = FastAPI(title="Resume Parser API", description="API for parsing resumes and job descriptions", lifespan=lifespan)
 
 # Add CORS middleware
 app.add_middleware(
@@ -41,35 +134,114 @@ class MatchRequest(BaseModel):
     resume_id: str
     jd_id: str
 
+class BatchMatchRequest(BaseModel):
+    jd_id: str
+    resume_ids: List[str]
+    concurrency: Optional[int] = None
+
 # Removed EnrichRequest class as enrichment is now integrated directly in resume_agent
 
-@app.post("/upload-resume/", response_model=Dict[str, Any])
-async def upload_resume(
-    resume_file: UploadFile = File(...)
-):
-    """Upload and process a resume file (PDF or DOCX)"""
-    # Check file extension
-    file_extension = os.path.splitext(resume_file.filename)[1].lower()
-    if file_extension not in ['.pdf', '.docx', '.txt']:
-        raise HTTPException(status_code=400, detail="Invalid file format. Please upload a PDF, DOCX, or TXT file.")
+async def fetch_external_record(endpoint: str, payload: Dict[str, Any], label: str, record_id: str) -> Dict[str, Any]:
+    """Fetch a stored resume or JD from the external Node API within NODE_API_TIMEOUT_SECONDS"""
+    try:
+        response = await asyncio.wait_for(
+            http_client.post(f"{NODE_API_BASE_URL}/{endpoint}", json=payload),
+            timeout=NODE_API_TIMEOUT_SECONDS,
+        )
+    except (asyncio.TimeoutError, httpx.TimeoutException):
+        raise HTTPException(status_code=504, detail=f"Timed out fetching {label} with ID {record_id} from external API")
+    except httpx.HTTPError as e:
+        raise HTTPException(status_code=502, detail=f"Error fetching {label} with ID {record_id} from external API: {str(e)}")
+    
+    if not response.is_success:
+        raise HTTPException(status_code=404, detail=f"{label} with ID {record_id} not found in external API")
+    
+    record = response.json()
+    if not record.get("status"):
+        raise HTTPException(status_code=404, detail=f"{label} with ID {record_id} not found: {record.get('message')}")
+    
+    # Extract only the data we need for analysis
+    return record.get("data", {})
+
+def build_resume_response(result: Dict[str, Any], cache_source: Optional[str] = None) -> Dict[str, Any]:
+    """Create the upload response for an analysis result (fresh or served from the resume cache)"""
+    # Generate a unique ID for this resume
+    resume_id = str(uuid.uuid4())
+    
+    # Get current timestamp
+    upload_date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    
+    # Create response structure matching desired format
+    return {
+        "status": "success",
+        "resume_id": resume_id,
+        "resume_data": result["resume_data"],
+        "TotalYearsOfExperience": result["TotalYearsOfExperience"],
+        "upload_date": upload_date,
+        "backend": result.get("backend"),
+        "routing": None if cache_source else result.get("routing"),
+        "usage": {
+            # Cached results cost nothing to serve
+            "tokens": 0 if cache_source else result["tokens"],
+            "cost": 0 if cache_source else result["cost"]
+        },
+        "cached": cache_source is not None,
+        "cache_source": cache_source
+    }
+
+async def process_resume_file(
+    file_bytes: bytes,
+    file_extension: str,
+    use_cache: bool = True,
+    backend: Optional[str] = None,
+    tenant_id: Optional[str] = None
+) -> Dict[str, Any]:
+    """Extract and analyze an uploaded resume file, serving duplicates from the resume cache"""
+    backend = resolve_backend(backend)
+    # Identical files are answered from the cache without extraction or LLM calls;
+    # entries are per requested backend ("auto" uploads share the routed results)
+    cache_backend = backend
+    file_hash = hash_file_bytes(file_bytes)
+    if use_cache:
+        cached_result = get_cached_resume(file_hash, cache_backend)
+        if cached_result is not None:
+            print("💾 Duplicate resume file served from resume cache")
+            return build_resume_response(cached_result, cache_source="file")
     
     # Create a temporary file
     temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=file_extension)
     
     try:
         # Write the uploaded file to the temporary file
-        shutil.copyfileobj(resume_file.file, temp_file)
+        temp_file.write(file_bytes)
         temp_file.close()
         
-        # Extract text from the file
-        import time
+        # Extract text from the file in the extraction process pool
         start = time.time()
-        extracted_text = extract_text_from_file(temp_file.name)
+        extracted_text = await extract_text_from_file_async(temp_file.name)
         end = time.time()
         print(f"Time taken: {end - start} seconds")
         
+        # A different file with the same resume text (e.g. re-exported PDF) is also a duplicate;
+        # empty or near-empty text (scanned PDFs) gets no text hash and is keyed by file only
+        text_hash = hash_resume_text(extracted_text)
+        if use_cache and text_hash is not None:
+            cached_result = get_cached_resume(text_hash, cache_backend)
+            if cached_result is not None:
+                print("💾 Duplicate resume text served from resume cache")
+                cache_resume_result([file_hash], cached_result, cache_backend)
+                return build_resume_response(cached_result, cache_source="text")
+        
+        # backend=auto picks the pipeline from the text, live latency and the tenant's budget
+        routing = None
+        if backend == AUTO_BACKEND:
+            routing = route_resume(extracted_text, tenant_id)
+            backend = routing["backend"]
+        
         # Process the resume with extracted text (includes automatic web search enrichment for null fields)
-        result, total_tokens = await analyze_resume(extracted_text)
+        # Agents get deadlines carved out of the request SLA (REQUEST_SLA_SECONDS)
+        with request_sla():
+            result, total_tokens = await run_backend(backend, extracted_text)
         cost_info = calculations_cost(total_tokens)
         
         # Parse the JSON result
@@ -84,43 +256,296 @@ async def upload_resume(
         # Calculate total years of experience
         total_experience = calculate_total_experience({"steps": [resume_data]} if "steps" not in resume_data_raw else resume_data_raw)
         
-        # Generate a unique ID for this resume
-        resume_id = str(uuid.uuid4())
-        
-        # Get current timestamp
-        upload_date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        
-        # Create response structure matching desired format
-        response = {
-            "status": "success",
-            "resume_id": resume_id,
+        analysis_result = {
             "resume_data": resume_data,
             "TotalYearsOfExperience": total_experience,
-            "upload_date": upload_date,
-            "usage": {
-                "tokens": total_tokens,
-                "cost": round(cost_info.get("estimated_total_cost_usd", 0), 5)
-            }
+            "tokens": total_tokens,
+            "cost": round(cost_info.get("estimated_total_cost_usd", 0), 5),
+            "backend": backend,
+            "routing": routing
         }
+        record_tenant_spend(tenant_id, analysis_result["cost"])
+        cache_resume_result([key for key in (file_hash, text_hash) if key is not None], analysis_result, cache_backend)
         
-        return response
-    
-    except Exception as e:
-        print(f"Error processing resume: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Error processing resume: {str(e)}")
+        return build_resume_response(analysis_result)
     
     finally:
         # Clean up the temporary file
         if os.path.exists(temp_file.name):
             os.unlink(temp_file.name)
 
+def validate_resume_extension(filename: str) -> str:
+    """Return the lower-cased extension of an uploaded resume, rejecting unsupported formats"""
+    file_extension = os.path.splitext(filename or "")[1].lower()
+    if file_extension not in SUPPORTED_RESUME_EXTENSIONS:
+        raise HTTPException(status_code=400, detail="Invalid file format. Please upload a PDF, DOCX, or TXT file.")
+    return file_extension
+
+def validate_backend(backend: Optional[str]) -> str:
+    """Resolve the requested resume pipeline backend, rejecting unknown names"""
+    try:
+        return resolve_backend(backend)
+    except UnknownPipelineBackend as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.post("/upload-resume/", response_model=Dict[str, Any])
+async def upload_resume(
+    resume_file: UploadFile = File(...),
+    use_cache: bool = Query(True, description="Serve duplicate uploads from the resume cache"),
+    backend: Optional[str] = Query(None, description="Resume pipeline backend (defaults to RESUME_PIPELINE_BACKEND, 'auto' to route per upload)"),
+    tenant_id: Optional[str] = Header(None, alias="X-Tenant-Id", description="Tenant billed for the upload (budget-aware routing)")
+):
+    """Upload and process a resume file (PDF or DOCX)"""
+    # Check file extension
+    file_extension = validate_resume_extension(resume_file.filename)
+    backend = validate_backend(backend)
+    
+    try:
+        file_bytes = await resume_file.read()
+        return await process_resume_file(file_bytes, file_extension, use_cache, backend, tenant_id)
+    
+    except (ExtractionQueueFull, CircuitOpenError, PipelineBackendUnavailable) as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except AgentDeadlineExceeded as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except Exception as e:
+        print(f"Error processing resume: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error processing resume: {str(e)}")
+
+
+def expand_bulk_uploads(uploads: List[Tuple[str, bytes]]) -> List[Tuple[str, bytes]]:
+    """
+    Flatten uploaded files and ZIP archives into (filename, bytes) resume items.
+    
+    Args:
+        uploads (list): (filename, bytes) pairs as received
+        
+    Returns:
+        list: (filename, bytes) pairs, one per resume; ZIP members are named "archive.zip/member"
+    """
+    items = []
+    for filename, file_bytes in uploads:
+        if os.path.splitext(filename or "")[1].lower() != ".zip":
+            items.append((filename, file_bytes))
+            continue
+        
+        try:
+            archive = zipfile.ZipFile(io.BytesIO(file_bytes))
+        except zipfile.BadZipFile:
+            raise HTTPException(status_code=400, detail=f"{filename} is not a valid ZIP archive")
+        
+        with archive:
+            members = [
+                info for info in archive.infolist()
+                if not info.is_dir() and not os.path.basename(info.filename).startswith(".")
+                and not info.filename.startswith("__MACOSX/")
+            ]
+            # Check declared sizes before decompressing anything
+            uncompressed = sum(info.file_size for info in members)
+            if uncompressed > BULK_MAX_ZIP_UNCOMPRESSED_BYTES:
+                raise HTTPException(
+                    status_code=413,
+                    detail=f"{filename} expands to {uncompressed} bytes (limit {BULK_MAX_ZIP_UNCOMPRESSED_BYTES})"
+                )
+            if len(items) + len(members) > BULK_MAX_FILES:
+                raise HTTPException(status_code=413, detail=f"Too many files in bulk upload (limit {BULK_MAX_FILES})")
+            
+            for info in members:
+                items.append((f"{filename}/{info.filename}", archive.read(info)))
+    
+    if len(items) > BULK_MAX_FILES:
+        raise HTTPException(status_code=413, detail=f"Too many files in bulk upload (limit {BULK_MAX_FILES})")
+    return items
+
+async def process_bulk_item(
+    index: int,
+    filename: str,
+    file_bytes: bytes,
+    use_cache: bool,
+    backend: Optional[str] = None,
+    tenant_id: Optional[str] = None
+) -> Dict[str, Any]:
+    """Run one bulk item through the resume pipeline, reporting failures instead of raising"""
+    start = time.time()
+    item = {"index": index, "filename": filename}
+    
+    file_extension = os.path.splitext(filename)[1].lower()
+    if file_extension not in SUPPORTED_RESUME_EXTENSIONS:
+        return {**item, "status": "error", "status_code": 400, "detail": "Unsupported file format"}
+    
+    try:
+        result = await process_resume_file(file_bytes, file_extension, use_cache, backend, tenant_id)
+        return {**item, "status": "success", "elapsed_seconds": round(time.time() - start, 3), "result": result}
+    except (ExtractionQueueFull, CircuitOpenError, PipelineBackendUnavailable) as e:
+        return {**item, "status": "error", "status_code": 503, "detail": str(e)}
+    except AgentDeadlineExceeded as e:
+        return {**item, "status": "error", "status_code": 504, "detail": str(e)}
+    except Exception as e:
+        print(f"Error processing bulk resume {filename}: {str(e)}")
+        return {**item, "status": "error", "status_code": 500, "detail": f"Error processing resume: {str(e)}"}
+
+@app.post("/bulk-upload-resumes/")
+async def bulk_upload_resumes(
+    resume_files: List[UploadFile] = File(...),
+    concurrency: int = Query(BULK_MAX_CONCURRENCY, ge=1, description="Resumes processed at once (capped by BULK_MAX_CONCURRENCY)"),
+    use_cache: bool = Query(True, description="Serve duplicate uploads from the resume cache"),
+    backend: Optional[str] = Query(None, description="Resume pipeline backend (defaults to RESUME_PIPELINE_BACKEND, 'auto' to route per upload)"),
+    tenant_id: Optional[str] = Header(None, alias="X-Tenant-Id", description="Tenant billed for the upload (budget-aware routing)")
+):
+    """
+    Upload many resumes (PDF, DOCX, TXT or ZIP archives of them) in one request.
+    
+    Results are streamed as newline-delimited JSON in completion order: one
+    line per resume with its index and filename, then a final summary line.
+    """
+    backend = validate_backend(backend)
+    uploads = [(resume_file.filename, await resume_file.read()) for resume_file in resume_files]
+    items = expand_bulk_uploads(uploads)
+    if not items:
+        raise HTTPException(status_code=400, detail="No resumes found in upload")
+    
+    semaphore = asyncio.Semaphore(min(concurrency, BULK_MAX_CONCURRENCY))
+    
+    async def run_item(index: int, filename: str, file_bytes: bytes) -> Dict[str, Any]:
+        async with semaphore:
+            return await process_bulk_item(index, filename, file_bytes, use_cache, backend, tenant_id)
+    
+    async def stream_results():
+        start = time.time()
+        counts = {"success": 0, "error": 0, "cached": 0}
+        tasks = [asyncio.create_task(run_item(index, filename, file_bytes)) for index, (filename, file_bytes) in enumerate(items)]
+        items.clear()  # the tasks hold the bytes; drop our references as they finish
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                item = await next_done
+                counts[item["status"]] += 1
+                if item["status"] == "success" and item["result"].get("cached"):
+                    counts["cached"] += 1
+                yield json.dumps(item) + "\n"
+        finally:
+            # Client disconnected or stream aborted: stop work that has not finished
+            for task in tasks:
+                task.cancel()
+        
+        yield json.dumps({
+            "summary": True,
+            "total": len(tasks),
+            "succeeded": counts["success"],
+            "failed": counts["error"],
+            "cached": counts["cached"],
+            "elapsed_seconds": round(time.time() - start, 3),
+        }) + "\n"
+    
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+
+
+async def run_resume_job(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Job handler: run the resume pipeline for a queued upload"""
+    return await process_resume_file(payload["file_bytes"], payload["file_extension"], payload["use_cache"], payload["backend"], payload["tenant_id"])
+
+async def validate_callback_url(callback_url: str) -> Optional[str]:
+    """
+    Check that a job callback URL is safe for the server to POST to.
+
+    Only http(s) URLs are accepted, the host must be on JOB_CALLBACK_ALLOWED_HOSTS
+    when that is set, and every address the host resolves to must be public.
+
+    Returns:
+        str: The vetted address to connect to, or None when private hosts are allowed
+
+    Raises:
+        ValueError: If the URL is not an allowed callback target
+    """
+    parts = urlsplit(callback_url)
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        raise ValueError("callback_url must be an absolute http(s) URL")
+    host = parts.hostname.lower()
+    if JOB_CALLBACK_ALLOWED_HOSTS and not any(host == allowed or host.endswith("." + allowed) for allowed in JOB_CALLBACK_ALLOWED_HOSTS):
+        raise ValueError(f"callback_url host {host} is not on the callback allowlist")
+    if JOB_CALLBACK_ALLOW_PRIVATE_HOSTS:
+        return None
+    
+    try:
+        infos = await asyncio.to_thread(socket.getaddrinfo, host, parts.port or (443 if parts.scheme == "https" else 80), type=socket.SOCK_STREAM)
+    except socket.gaierror:
+        raise ValueError(f"callback_url host {host} does not resolve")
+    for info in infos:
+        address = ipaddress.ip_address(info[4][0].split("%", 1)[0])
+        if not address.is_global or address.is_multicast:
+            raise ValueError(f"callback_url host {host} resolves to a non-public address")
+    return infos[0][4][0].split("%", 1)[0]
+
+async def notify_job_callback(job: Dict[str, Any]) -> None:
+    """POST a finished job to its callback URL"""
+    # Re-checked at send time: the host's DNS may have changed since the job was submitted
+    address = await validate_callback_url(job["callback_url"])
+    url = httpx.URL(job["callback_url"])
+    if address is None:
+        await http_client.post(url, json=job, timeout=JOB_CALLBACK_TIMEOUT_SECONDS)
+        return
+    # Connect to the address just vetted rather than letting the client resolve the
+    # host again (DNS rebinding); Host and TLS SNI/certificate checks keep the real name
+    await http_client.post(
+        url.copy_with(host=address),
+        json=job,
+        headers={"Host": url.netloc.decode("ascii")},
+        extensions={"sni_hostname": url.host},
+        timeout=JOB_CALLBACK_TIMEOUT_SECONDS,
+    )
+
+resume_jobs = JobQueue(
+    name="resume_jobs",
+    handler=run_resume_job,
+    workers=RESUME_JOB_WORKERS,
+    max_queue=RESUME_JOB_MAX_QUEUE,
+    result_ttl_seconds=RESUME_JOB_RESULT_TTL_SECONDS,
+    on_complete=notify_job_callback,
+    prune_interval_seconds=RESUME_JOB_PRUNE_INTERVAL_SECONDS,
+)
+
+@app.post("/jobs/upload-resume/", response_model=Dict[str, Any], status_code=202)
+async def submit_resume_job(
+    resume_file: UploadFile = File(...),
+    callback_url: Optional[str] = Form(None, description="URL to POST the finished job to"),
+    use_cache: bool = Query(True, description="Serve duplicate uploads from the resume cache"),
+    backend: Optional[str] = Query(None, description="Resume pipeline backend (defaults to RESUME_PIPELINE_BACKEND, 'auto' to route per upload)"),
+    tenant_id: Optional[str] = Header(None, alias="X-Tenant-Id", description="Tenant billed for the upload (budget-aware routing)")
+):
+    """Queue a resume for processing and return a job id immediately"""
+    file_extension = validate_resume_extension(resume_file.filename)
+    backend = validate_backend(backend)
+    if callback_url:
+        try:
+            await validate_callback_url(callback_url)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    file_bytes = await resume_file.read()
+    
+    try:
+        job = resume_jobs.submit(
+            {"file_bytes": file_bytes, "file_extension": file_extension, "use_cache": use_cache, "backend": backend, "tenant_id": tenant_id},
+            callback_url=callback_url,
+        )
+    except JobQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    
+    return {**job, "status_url": f"/jobs/{job['job_id']}"}
+
+@app.get("/jobs/{job_id}", response_model=Dict[str, Any])
+async def get_resume_job(job_id: str):
+    """Poll a resume job; the result is included once it has succeeded"""
+    job = resume_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job with ID {job_id} not found")
+    return job
+
 
 @app.post("/upload-jd/", response_model=Dict[str, Any])
 async def upload_jd(jd_data: JobDescription):
     """Process a job description provided as text"""
     try:
         # Process the job description
-        result, total_tokens = analyze_jd(jd_data.jd)
+        result, total_tokens = await analyze_jd(jd_data.jd)
         cost_info = calculations_cost(total_tokens)
         
         # Parse the JSON result
@@ -152,10 +577,41 @@ async def upload_jd(jd_data: JobDescription):
         
         return response
     
+    except CircuitOpenError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         print(f"Error processing job description: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error processing job description: {str(e)}")
 
+def build_match_response(resume_id: str, jd_id: str, result: str, total_tokens: int) -> Dict[str, Any]:
+    """Shape a match analysis result into the API response"""
+    cost_info = calculations_cost(total_tokens)
+    
+    # Parse the JSON result
+    analysis_data = json.loads(result)
+    
+    # Flatten the analysis data (remove "steps" wrapper if present)
+    if "steps" in analysis_data and len(analysis_data["steps"]) > 0:
+        analysis_clean = analysis_data["steps"][0]
+    else:
+        analysis_clean = analysis_data
+    
+    # Get current timestamp
+    analysis_date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    
+    # Create response structure
+    return {
+        "status": "success",
+        "resume_id": resume_id,
+        "jd_id": jd_id,
+        "analysis": analysis_clean,
+        "analysis_date": analysis_date,
+        "usage": {
+            "tokens": total_tokens,
+            "cost": round(cost_info.get("estimated_total_cost_usd", 0), 5)
+        }
+    }
+
 @app.post("/analyze-match/", response_model=Dict[str, Any])
 async def analyze_match(match_request: MatchRequest):
     """Analyze how well the resume matches the job description"""
@@ -164,112 +620,139 @@ async def analyze_match(match_request: MatchRequest):
     jd_id = match_request.jd_id
     
     try:
-        # Fetch resume data from external API
-        resume_response = requests.post(
-            # "https://nodeapi.hiringeye.ai/api/v1/other/search-resume",
-            "https://hiringapinewnodeapi.bestworks.cloud/api/v1/other/search-resume",
-            json={"resume_id": resume_id}
-        )
-        if not resume_response.ok:
-            raise HTTPException(status_code=404, detail=f"Resume with ID {resume_id} not found in external API")
-        
-        resume_data = resume_response.json()
-        if not resume_data.get("status"):
-            raise HTTPException(status_code=404, detail=f"Resume with ID {resume_id} not found: {resume_data.get('message')}")
-        
-        # Extract only the resume data we need for analysis
-        resume_info = resume_data.get("data", {})
-        
-        # Fetch JD data from external API
-        jd_response = requests.post(
-            # "https://nodeapi.hiringeye.ai/api/v1/other/search-jd",
-            "https://hiringapinewnodeapi.bestworks.cloud/api/v1/other/search-jd",
-            json={"jd_id": jd_id}
+        # Fetch resume and JD data from the external API concurrently
+        resume_info, jd_info = await asyncio.gather(
+            fetch_external_record("search-resume", {"resume_id": resume_id}, "Resume", resume_id),
+            fetch_external_record("search-jd", {"jd_id": jd_id}, "Job description", jd_id),
         )
-        if not jd_response.ok:
-            raise HTTPException(status_code=404, detail=f"Job description with ID {jd_id} not found in external API")
-        
-        jd_data = jd_response.json()
-        if not jd_data.get("status"):
-            raise HTTPException(status_code=404, detail=f"Job description with ID {jd_id} not found: {jd_data.get('message')}")
-        
-        # Extract only the JD data we need for analysis
-        jd_info = jd_data.get("data", {})
         
         # Clean up the resume and JD data by removing unwanted fields
-        cleaned_resume = {
-            "SuggestedRole": resume_info.get("suggested_role"),
-            "CandidateFullName": resume_info.get("candidate_full_name"),
-            "EmailAddress": resume_info.get("email_address"),
-            "PhoneNumber": resume_info.get("phone_number"),
-            "Skills": resume_info.get("skills", []),
-            "Experience": resume_info.get("experience", []),
-            "Education": resume_info.get("education_details", []),
-            "StabilityAssessment": resume_info.get("overall_stability_assessment"),
-            "TotalYearsOfExperience": resume_info.get("total_years_of_experience", 0.0),
-            "resume_file": resume_info.get("resume_file"),
-            "upload_date": resume_info.get("upload_date")
-        }
-        
-        cleaned_jd = {
-            "CompanyName": jd_info.get("company_name"),
-            "JobTitle": jd_info.get("job_title"),
-            "RequiredSkills": jd_info.get("required_skills", {"technical": [], "soft": []}),
-            "YearsOfExperienceRequired": jd_info.get("years_of_experience_required"),
-            "EducationRequirements": jd_info.get("education_requirements"),
-            "CompanyTypePreference": jd_info.get("company_type_preference"),
-            "BusinessTypePreference": jd_info.get("business_type_preference"),
-            "PreferredStability": jd_info.get("preferred_stability"),
-            "OtherImportantRequirements": jd_info.get("other_important_requirements", []),
-            "jd_file": jd_info.get("jd_file"),
-            "upload_date": jd_info.get("upload_date")
-        }
+        cleaned_resume = clean_resume_record(resume_info)
+        cleaned_jd = clean_jd_record(jd_info)
         
         # Combine resume and JD data for analysis
-        combined_input = f"""
-        Resume data:
-        {json.dumps(cleaned_resume, indent=2)}
-        
-        Job Description data:
-        {json.dumps(cleaned_jd, indent=2)}
-        """
+        combined_input = build_match_input(cleaned_resume, serialize_jd_section(cleaned_jd))
         # print(combined_input)
         # Analyze the match using existing function
-        result, total_tokens = analyze_resume_and_jd(combined_input)
-        cost_info = calculations_cost(total_tokens)
+        result, total_tokens = await analyze_resume_and_jd_async(combined_input)
         
-        # Parse the JSON result
-        analysis_data = json.loads(result)
-        
-        # Flatten the analysis data (remove "steps" wrapper if present)
-        if "steps" in analysis_data and len(analysis_data["steps"]) > 0:
-            analysis_clean = analysis_data["steps"][0]
-        else:
-            analysis_clean = analysis_data
-        
-        # Get current timestamp
-        analysis_date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        return build_match_response(resume_id, jd_id, result, total_tokens)
+    
+    except HTTPException:
+        raise
+    except CircuitOpenError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        print(f"Error analyzing match: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error analyzing match: {str(e)}")
+
+@app.post("/batch-analyze-match/")
+async def batch_analyze_match(batch_request: BatchMatchRequest):
+    """
+    Match one job description against many resumes.
+    
+    The JD is fetched and serialized once, then the match calls fan out with
+    bounded concurrency. Each result is streamed as a newline-delimited JSON
+    line as soon as it completes; the final line ranks all successful matches
+    by AIRating.
+    """
+    jd_id = batch_request.jd_id
+    resume_ids = list(dict.fromkeys(batch_request.resume_ids))
+    if not resume_ids:
+        raise HTTPException(status_code=400, detail="resume_ids must not be empty")
+    if len(resume_ids) > BATCH_MATCH_MAX_RESUMES:
+        raise HTTPException(status_code=413, detail=f"Too many resumes in one batch (limit {BATCH_MATCH_MAX_RESUMES})")
+    
+    # Fetch the JD once; failures here fail the whole request before streaming starts
+    jd_info = await fetch_external_record("search-jd", {"jd_id": jd_id}, "Job description", jd_id)
+    jd_section = serialize_jd_section(clean_jd_record(jd_info))
+    
+    concurrency = min(batch_request.concurrency or BATCH_MATCH_MAX_CONCURRENCY, BATCH_MATCH_MAX_CONCURRENCY)
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    
+    async def match_one(resume_id: str) -> Dict[str, Any]:
+        async with semaphore:
+            try:
+                resume_info = await fetch_external_record("search-resume", {"resume_id": resume_id}, "Resume", resume_id)
+                combined_input = build_match_input(clean_resume_record(resume_info), jd_section)
+                result, total_tokens = await analyze_resume_and_jd_async(combined_input)
+                return build_match_response(resume_id, jd_id, result, total_tokens)
+            except HTTPException as e:
+                return {"status": "error", "resume_id": resume_id, "jd_id": jd_id, "status_code": e.status_code, "detail": e.detail}
+            except CircuitOpenError as e:
+                return {"status": "error", "resume_id": resume_id, "jd_id": jd_id, "status_code": 503, "detail": str(e)}
+            except Exception as e:
+                print(f"Error analyzing match for resume {resume_id}: {str(e)}")
+                return {"status": "error", "resume_id": resume_id, "jd_id": jd_id, "status_code": 500, "detail": f"Error analyzing match: {str(e)}"}
+    
+    async def stream_results():
+        start = time.time()
+        matched = []
+        failed = 0
+        total_tokens = 0
+        tasks = [asyncio.create_task(match_one(resume_id)) for resume_id in resume_ids]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                item = await next_done
+                if item["status"] == "success":
+                    matched.append(item)
+                    total_tokens += item["usage"]["tokens"]
+                else:
+                    failed += 1
+                yield json.dumps(item) + "\n"
+        finally:
+            for task in tasks:
+                task.cancel()
         
-        # Create response structure
-        response = {
-            "status": "success",
-            "resume_id": resume_id,
+        matched.sort(key=lambda item: item["analysis"].get("AIRating", 0), reverse=True)
+        yield json.dumps({
+            "summary": True,
             "jd_id": jd_id,
-            "analysis": analysis_clean,
-            "analysis_date": analysis_date,
+            "total": len(resume_ids),
+            "succeeded": len(matched),
+            "failed": failed,
+            "ranking": [
+                {
+                    "rank": rank,
+                    "resume_id": item["resume_id"],
+                    "AIRating": item["analysis"].get("AIRating"),
+                    "ShouldBeShortlisted": item["analysis"].get("ShouldBeShortlisted"),
+                }
+                for rank, item in enumerate(matched, start=1)
+            ],
             "usage": {
                 "tokens": total_tokens,
-                "cost": round(cost_info.get("estimated_total_cost_usd", 0), 5)
-            }
-        }
-        
-        return response
+                "cost": round(calculations_cost(total_tokens).get("estimated_total_cost_usd", 0), 5) if total_tokens else 0
+            },
+            "elapsed_seconds": round(time.time() - start, 3),
+        }) + "\n"
     
-    except Exception as e:
-        print(f"Error analyzing match: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Error analyzing match: {str(e)}")
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
     
 
+@app.get("/metrics", response_model=Dict[str, Any])
+async def metrics():
+    """Runtime metrics for the worker pools and caches"""
+    return {
+        "text_extraction": get_extraction_stats(),
+        "company_cache": get_company_cache_stats(),
+        "company_names": get_company_names_stats(),
+        "company_kb": get_company_kb_stats(),
+        "enrichment_coalescing": get_single_flight_stats(),
+        "enrichment_microbatching": get_microbatch_stats(),
+        "enrichment_chunking": get_chunk_sizing_stats(),
+        "resume_cache": get_resume_cache_stats(),
+        "resume_jobs": resume_jobs.stats(),
+        "agent_dags": get_dag_stats(),
+        "llm_rate_limits": get_rate_limiter_stats(),
+        "llm_concurrency": get_concurrency_stats(),
+        "llm_resilience": get_resilience_stats(),
+        "agent_hedging": get_hedging_stats(),
+        "resume_pipelines": get_pipeline_stats(),
+        "pipeline_router": get_router_stats(),
+        "provider_racing": get_racing_stats(),
+    }
+
 
 if __name__ == "__main__":
     uvicorn.run("app:app", host="0.0.0.0", port=8545, reload=True)
\ No newline at end of file
@@ -0,0 +1,796 @@
+"""
+Offline bulk mode for resume/JD matching (and optionally resume extraction) via the OpenAI Batch API.
+
+Requests are packed into JSONL shards, submitted as batches, polled, and the
+outputs collected into results.jsonl. Every step is checkpointed in the run
+directory's manifest.json, so re-running the same command after a crash picks
+up where the previous run stopped instead of re-submitting (and re-paying for)
+finished shards.
+
+LocalBatchBackend implements the same file/batch calls on the local filesystem,
+so the whole flow can be exercised offline.
+
+Usage:
+    python batch_matching.py match --pairs pairs.jsonl --run-dir runs/rescreen-2024-06
+    python batch_matching.py resumes --resumes-dir ./resumes --run-dir runs/import-1 --local
+"""
+import os
+import json
+import time
+import uuid
+import argparse
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Type
+import httpx
+from dotenv import load_dotenv
+from openai import OpenAI
+from openai.types.chat import ChatCompletion
+from pydantic import BaseModel
+from analyze import (
+    MATCH_MODEL,
+    resume_data,
+    build_match_messages,
+    finalize_match_result,
+    clean_resume_record,
+    clean_jd_record,
+    serialize_jd_section,
+    build_match_input,
+)
+from openai_batch_resume_agents import (
+    EXTRACTION_MODEL,
+    PERSONAL_INFO_PROMPT,
+    EDUCATION_PROMPT,
+    EXPERIENCE_PROMPT,
+    PersonalInfoResponse,
+    EducationInfoResponse,
+    ExperienceInfoResponse,
+)
+from cost_calculator import calculations_cost
+from experience_calculator import calculate_total_experience, calculate_stability
+
+load_dotenv()
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+BATCH_COMPLETION_WINDOW = "24h"
+# The Batch API accepts up to 50,000 requests per input file
+BATCH_SHARD_MAX_REQUESTS = int(os.getenv("BATCH_SHARD_MAX_REQUESTS", 50000))
+BATCH_POLL_SECONDS = float(os.getenv("BATCH_POLL_SECONDS", 60))
+# Margin between our clock and the Batch API's created_at when looking up a crashed submission
+BATCH_SUBMIT_CLOCK_SKEW_SECONDS = float(os.getenv("BATCH_SUBMIT_CLOCK_SKEW_SECONDS", 600))
+# Batch requests are billed at half the synchronous price
+BATCH_PRICE_MULTIPLIER = float(os.getenv("BATCH_PRICE_MULTIPLIER", 0.5))
+
+NODE_API_BASE_URL = os.getenv("NODE_API_BASE_URL", "https://hiringapinewnodeapi.bestworks.cloud/api/v1/other")
+NODE_API_TIMEOUT_SECONDS = float(os.getenv("NODE_API_TIMEOUT_SECONDS", 10))
+
+TERMINAL_BATCH_STATUSES = ("completed", "failed", "expired", "cancelled")
+
+# Structured output type for each request kind (the prefix of a custom_id)
+REQUEST_KINDS: Dict[str, type] = {
+    "match": resume_data,
+    "personal_info": PersonalInfoResponse,
+    "education": EducationInfoResponse,
+    "experience": ExperienceInfoResponse,
+}
+
+RESUME_AGENT_REQUESTS = (
+    ("personal_info", PERSONAL_INFO_PROMPT),
+    ("education", EDUCATION_PROMPT),
+    ("experience", EXPERIENCE_PROMPT),
+)
+
+
+# ---------------------------------------------------------------------------
+# Request packing
+# ---------------------------------------------------------------------------
+
+def strict_json_schema(schema: Any) -> Any:
+    """
+    Make a pydantic JSON schema valid for Structured Outputs strict mode.
+
+    Every object gets additionalProperties: false and lists all of its
+    properties as required; defaults are dropped (strict mode rejects them).
+    """
+    if isinstance(schema, list):
+        return [strict_json_schema(item) for item in schema]
+    if not isinstance(schema, dict):
+        return schema
+    strict = {}
+    for key, value in schema.items():
+        if key == "default":
+            continue
+        if key in ("properties", "$defs"):
+            strict[key] = {name: strict_json_schema(sub) for name, sub in value.items()}
+        else:
+            strict[key] = strict_json_schema(value)
+    if strict.get("type") == "object":
+        strict["additionalProperties"] = False
+        strict["required"] = list(strict.get("properties", {}))
+    return strict
+
+
+@lru_cache(maxsize=None)
+def _response_format(response_type: Type[BaseModel]) -> Dict[str, Any]:
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": response_type.__name__,
+            "schema": strict_json_schema(response_type.model_json_schema()),
+            "strict": True,
+        },
+    }
+
+
+def chat_request(custom_id: str, model: str, messages: List[Dict[str, str]], response_type: type) -> Dict[str, Any]:
+    """Build one Batch API input line for a structured chat completion"""
+    return {
+        "custom_id": custom_id,
+        "method": "POST",
+        "url": BATCH_ENDPOINT,
+        "body": {
+            "model": model,
+            "messages": messages,
+            "response_format": _response_format(response_type),
+        },
+    }
+
+
+def fetch_record(client: httpx.Client, endpoint: str, payload: Dict[str, Any], label: str, record_id: str) -> Dict[str, Any]:
+    """Fetch a stored resume or JD from the external Node API (sync counterpart of app.fetch_external_record)"""
+    response = client.post(f"{NODE_API_BASE_URL}/{endpoint}", json=payload)
+    if not response.is_success:
+        raise LookupError(f"{label} with ID {record_id} not found in external API")
+    record = response.json()
+    if not record.get("status"):
+        raise LookupError(f"{label} with ID {record_id} not found: {record.get('message')}")
+    return record.get("data", {})
+
+
+def build_match_requests(
+    pairs: Iterable[Dict[str, str]],
+    fetch: Optional[Callable[[str, Dict[str, Any], str, str], Dict[str, Any]]] = None,
+) -> Tuple[List[Dict[str, Any]], Dict[str, Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Build match requests for resume/JD pairs.
+
+    Each resume and JD is fetched once, however many pairs reference it, and
+    each JD is serialized once.
+
+    Args:
+        pairs (Iterable[Dict]): {"resume_id": ..., "jd_id": ...} items
+        fetch (callable, optional): fetch(endpoint, payload, label, record_id); defaults to the Node API
+
+    Returns:
+        tuple: (batch requests, custom_id -> pair metadata, pairs that could not be prepared)
+    """
+    http = None
+    if fetch is None:
+        http = httpx.Client(timeout=NODE_API_TIMEOUT_SECONDS)
+        fetch = lambda endpoint, payload, label, record_id: fetch_record(http, endpoint, payload, label, record_id)
+
+    jd_sections: Dict[str, str] = {}
+    resumes: Dict[str, Dict[str, Any]] = {}
+    requests, items, skipped = [], {}, []
+
+    try:
+        for index, pair in enumerate(pairs):
+            resume_id, jd_id = pair["resume_id"], pair["jd_id"]
+            try:
+                if jd_id not in jd_sections:
+                    jd_info = fetch("search-jd", {"jd_id": jd_id}, "Job description", jd_id)
+                    jd_sections[jd_id] = serialize_jd_section(clean_jd_record(jd_info))
+                if resume_id not in resumes:
+                    resumes[resume_id] = clean_resume_record(
+                        fetch("search-resume", {"resume_id": resume_id}, "Resume", resume_id)
+                    )
+            except Exception as e:
+                print(f"⚠️  Skipping pair {resume_id}/{jd_id}: {e}")
+                skipped.append({**pair, "error": str(e)})
+                continue
+
+            custom_id = f"match:{index:06d}"
+            combined_input = build_match_input(resumes[resume_id], jd_sections[jd_id])
+            requests.append(chat_request(custom_id, MATCH_MODEL, build_match_messages(combined_input), resume_data))
+            items[custom_id] = {"type": "match", "resume_id": resume_id, "jd_id": jd_id}
+    finally:
+        if http is not None:
+            http.close()
+
+    return requests, items, skipped
+
+
+def build_resume_requests(resume_texts: Iterable[Tuple[str, str]]) -> Tuple[List[Dict[str, Any]], Dict[str, Dict[str, Any]]]:
+    """
+    Build the phase-1 extraction requests (personal info, education, experience) for each resume.
+
+    Company enrichment needs live web search and is not available in batch mode.
+
+    Args:
+        resume_texts (Iterable[Tuple[str, str]]): (resume_key, extracted text) pairs
+
+    Returns:
+        tuple: (batch requests, custom_id -> resume metadata)
+    """
+    requests, items = [], {}
+    for index, (resume_key, text) in enumerate(resume_texts):
+        for kind, prompt in RESUME_AGENT_REQUESTS:
+            custom_id = f"{kind}:{index:06d}"
+            messages = [
+                {"role": "system", "content": prompt},
+                {"role": "user", "content": text},
+            ]
+            requests.append(chat_request(custom_id, EXTRACTION_MODEL, messages, REQUEST_KINDS[kind]))
+            items[custom_id] = {"type": "resume", "resume_key": resume_key}
+    return requests, items
+
+
+# ---------------------------------------------------------------------------
+# Backends
+# ---------------------------------------------------------------------------
+
+class OpenAIBatchBackend:
+    """Files + Batches API on OpenAI"""
+
+    name = "openai"
+
+    def __init__(self, client: Optional[OpenAI] = None):
+        self.client = client or OpenAI()
+
+    def upload(self, path: str) -> str:
+        with open(path, "rb") as f:
+            return self.client.files.create(file=f, purpose="batch").id
+
+    def create_batch(self, input_file_id: str, metadata: Optional[Dict[str, str]] = None) -> str:
+        batch = self.client.batches.create(
+            input_file_id=input_file_id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window=BATCH_COMPLETION_WINDOW,
+            metadata=metadata,
+        )
+        return batch.id
+
+    def find_batch(self, submit_key: str, not_before: float) -> Optional[str]:
+        """Id of a batch created with this submit_key metadata, searching back to not_before"""
+        # Listed newest first, so stop at batches created before the submission was attempted
+        for batch in self.client.batches.list(limit=100):
+            if batch.created_at < not_before:
+                break
+            if (batch.metadata or {}).get("submit_key") == submit_key:
+                return batch.id
+        return None
+
+    def retrieve_batch(self, batch_id: str) -> Dict[str, Any]:
+        batch = self.client.batches.retrieve(batch_id)
+        return {
+            "status": batch.status,
+            "output_file_id": batch.output_file_id,
+            "error_file_id": batch.error_file_id,
+            "request_counts": batch.request_counts.model_dump() if batch.request_counts else None,
+        }
+
+    def download(self, file_id: str) -> str:
+        return self.client.files.content(file_id).text
+
+
+def stub_from_schema(schema: Dict[str, Any], defs: Optional[Dict[str, Any]] = None) -> Any:
+    """Build a minimal value that satisfies a JSON schema (used by the local backend's default responder)"""
+    defs = defs if defs is not None else schema.get("$defs", {})
+    if "$ref" in schema:
+        return stub_from_schema(defs[schema["$ref"].split("/")[-1]], defs)
+    if "anyOf" in schema:
+        return stub_from_schema(schema["anyOf"][0], defs)
+
+    schema_type = schema.get("type")
+    if schema_type == "object":
+        return {name: stub_from_schema(prop, defs) for name, prop in schema.get("properties", {}).items()}
+    if schema_type == "array":
+        return [stub_from_schema(schema.get("items", {}), defs)]
+    if schema_type == "integer":
+        return 0
+    if schema_type == "number":
+        return 0.0
+    if schema_type == "boolean":
+        return False
+    if schema_type == "null":
+        return None
+    return "N/A"
+
+
+def stub_responder(body: Dict[str, Any]) -> str:
+    """Default LocalBatchBackend responder: a schema-valid placeholder for the requested response_format"""
+    json_schema = body["response_format"]["json_schema"]["schema"]
+    return json.dumps(stub_from_schema(json_schema))
+
+
+class LocalBatchBackend:
+    """
+    File-based stand-in for the Batch API.
+
+    Uploaded files and batch state live under root. A batch is processed on the
+    first poll after latency_seconds by calling responder(request_body), which
+    returns the assistant message content for each request.
+    """
+
+    name = "local"
+
+    def __init__(
+        self,
+        root: str,
+        responder: Callable[[Dict[str, Any]], str] = stub_responder,
+        latency_seconds: float = 0.0,
+    ):
+        self.root = root
+        self.responder = responder
+        self.latency_seconds = latency_seconds
+        os.makedirs(os.path.join(root, "files"), exist_ok=True)
+        os.makedirs(os.path.join(root, "batches"), exist_ok=True)
+
+    def _file_path(self, file_id: str) -> str:
+        return os.path.join(self.root, "files", f"{file_id}.jsonl")
+
+    def _batch_path(self, batch_id: str) -> str:
+        return os.path.join(self.root, "batches", f"{batch_id}.json")
+
+    def upload(self, path: str) -> str:
+        file_id = f"file-local-{uuid.uuid4().hex[:12]}"
+        with open(path, "rb") as src, open(self._file_path(file_id), "wb") as dst:
+            dst.write(src.read())
+        return file_id
+
+    def create_batch(self, input_file_id: str, metadata: Optional[Dict[str, str]] = None) -> str:
+        batch_id = f"batch-local-{uuid.uuid4().hex[:12]}"
+        _write_json_atomic(self._batch_path(batch_id), {
+            "id": batch_id,
+            "status": "in_progress",
+            "input_file_id": input_file_id,
+            "output_file_id": None,
+            "error_file_id": None,
+            "created_at": time.time(),
+            "metadata": metadata,
+        })
+        return batch_id
+
+    def find_batch(self, submit_key: str, not_before: float) -> Optional[str]:
+        batches_dir = os.path.join(self.root, "batches")
+        for filename in os.listdir(batches_dir):
+            if not filename.endswith(".json"):
+                continue
+            with open(os.path.join(batches_dir, filename)) as f:
+                batch = json.load(f)
+            if batch["created_at"] >= not_before and (batch.get("metadata") or {}).get("submit_key") == submit_key:
+                return batch["id"]
+        return None
+
+    def retrieve_batch(self, batch_id: str) -> Dict[str, Any]:
+        with open(self._batch_path(batch_id)) as f:
+            batch = json.load(f)
+        if batch["status"] == "in_progress" and time.time() - batch["created_at"] >= self.latency_seconds:
+            batch = self._process(batch)
+        return {key: batch.get(key) for key in ("status", "output_file_id", "error_file_id", "request_counts")}
+
+    def download(self, file_id: str) -> str:
+        with open(self._file_path(file_id)) as f:
+            return f.read()
+
+    def _process(self, batch: Dict[str, Any]) -> Dict[str, Any]:
+        outputs, errors = [], []
+        for line in self.download(batch["input_file_id"]).splitlines():
+            if not line.strip():
+                continue
+            request = json.loads(line)
+            body = request["body"]
+            try:
+                content = self.responder(body)
+            except Exception as e:
+                errors.append({
+                    "id": f"req-{uuid.uuid4().hex[:12]}",
+                    "custom_id": request["custom_id"],
+                    "response": None,
+                    "error": {"code": "local_responder_error", "message": str(e)},
+                })
+                continue
+            prompt_tokens = sum(len(m["content"]) for m in body["messages"]) // 4
+            completion_tokens = len(content) // 4
+            outputs.append({
+                "id": f"req-{uuid.uuid4().hex[:12]}",
+                "custom_id": request["custom_id"],
+                "response": {
+                    "status_code": 200,
+                    "request_id": uuid.uuid4().hex,
+                    "body": {
+                        "id": f"chatcmpl-local-{uuid.uuid4().hex[:12]}",
+                        "object": "chat.completion",
+                        "created": int(time.time()),
+                        "model": body["model"],
+                        "choices": [{
+                            "index": 0,
+                            "finish_reason": "stop",
+                            "message": {"role": "assistant", "content": content, "refusal": None},
+                        }],
+                        "usage": {
+                            "prompt_tokens": prompt_tokens,
+                            "completion_tokens": completion_tokens,
+                            "total_tokens": prompt_tokens + completion_tokens,
+                        },
+                    },
+                },
+                "error": None,
+            })
+
+        batch["output_file_id"] = self._write_file(outputs) if outputs else None
+        batch["error_file_id"] = self._write_file(errors) if errors else None
+        batch["request_counts"] = {"total": len(outputs) + len(errors), "completed": len(outputs), "failed": len(errors)}
+        batch["status"] = "completed"
+        _write_json_atomic(self._batch_path(batch["id"]), batch)
+        return batch
+
+    def _write_file(self, lines: List[Dict[str, Any]]) -> str:
+        file_id = f"file-local-{uuid.uuid4().hex[:12]}"
+        with open(self._file_path(file_id), "w") as f:
+            for line in lines:
+                f.write(json.dumps(line) + "\n")
+        return file_id
+
+
+# ---------------------------------------------------------------------------
+# Checkpointed run
+# ---------------------------------------------------------------------------
+
+def _write_json_atomic(path: str, data: Any) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+class BatchRun:
+    """
+    One bulk run, checkpointed in run_dir/manifest.json.
+
+    Each shard moves through prepared -> uploaded -> submitting -> submitted ->
+    <batch status> -> collected, and the manifest is rewritten after every
+    transition. A shard left in "submitting" is matched to its batch by the
+    submit_key metadata on resume rather than submitted again.
+    """
+
+    def __init__(self, run_dir: str, backend, poll_seconds: float = BATCH_POLL_SECONDS):
+        self.run_dir = run_dir
+        self.backend = backend
+        self.poll_seconds = poll_seconds
+        self.manifest_path = os.path.join(run_dir, "manifest.json")
+        self.manifest: Optional[Dict[str, Any]] = None
+        os.makedirs(run_dir, exist_ok=True)
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path) as f:
+                self.manifest = json.load(f)
+
+    @property
+    def prepared(self) -> bool:
+        return self.manifest is not None
+
+    def _save(self) -> None:
+        _write_json_atomic(self.manifest_path, self.manifest)
+
+    def prepare(
+        self,
+        requests: List[Dict[str, Any]],
+        items: Dict[str, Dict[str, Any]],
+        skipped: Optional[List[Dict[str, Any]]] = None,
+        shard_size: int = BATCH_SHARD_MAX_REQUESTS,
+    ) -> None:
+        """Write the request shards and the initial manifest"""
+        if self.prepared:
+            raise RuntimeError(f"Run in {self.run_dir} is already prepared")
+
+        shards = []
+        for shard_index, offset in enumerate(range(0, len(requests), shard_size)):
+            input_path = os.path.join(self.run_dir, f"input_{shard_index:03d}.jsonl")
+            chunk = requests[offset:offset + shard_size]
+            with open(input_path, "w") as f:
+                for request in chunk:
+                    f.write(json.dumps(request) + "\n")
+            shards.append({
+                "index": shard_index,
+                "input_path": input_path,
+                "request_count": len(chunk),
+                "status": "prepared",
+                "file_id": None,
+                "batch_id": None,
+                "output_path": None,
+                "error_path": None,
+            })
+
+        self.manifest = {
+            "run_id": os.path.basename(os.path.abspath(self.run_dir)),
+            "backend": self.backend.name,
+            "created_at": time.time(),
+            "items": items,
+            "skipped": skipped or [],
+            "shards": shards,
+        }
+        self._save()
+        print(f"📦 Prepared {len(requests)} requests in {len(shards)} shard(s) under {self.run_dir}")
+
+    def submit(self) -> None:
+        """Upload and submit every shard that has not been submitted yet"""
+        for shard in self.manifest["shards"]:
+            if shard["file_id"] is None:
+                shard["file_id"] = self.backend.upload(shard["input_path"])
+                shard["status"] = "uploaded"
+                self._save()
+            if shard["batch_id"] is None:
+                if shard.get("submit_key"):
+                    # A previous run may have crashed after creating the batch but before saving
+                    # its id: adopt that batch instead of paying for the shard twice
+                    shard["batch_id"] = self.backend.find_batch(shard["submit_key"], shard["submit_started_at"] - BATCH_SUBMIT_CLOCK_SKEW_SECONDS)
+                    if shard["batch_id"] is not None:
+                        print(f"♻️  Shard {shard['index']} was already submitted as {shard['batch_id']}")
+                if shard["batch_id"] is None:
+                    # Persist the idempotency key before the paid call
+                    shard["submit_key"] = shard.get("submit_key") or f"{self.manifest['run_id']}:{shard['index']}:{uuid.uuid4().hex}"
+                    shard["submit_started_at"] = time.time()
+                    shard["status"] = "submitting"
+                    self._save()
+                    shard["batch_id"] = self.backend.create_batch(
+                        shard["file_id"],
+                        metadata={"run_id": self.manifest["run_id"], "shard": str(shard["index"]), "submit_key": shard["submit_key"]},
+                    )
+                    print(f"🚀 Shard {shard['index']} submitted as {shard['batch_id']}")
+                shard["status"] = "submitted"
+                self._save()
+
+    def wait(self, timeout_seconds: Optional[float] = None) -> bool:
+        """
+        Poll until every shard reaches a terminal state, downloading outputs as they finish.
+
+        Returns:
+            bool: True if all shards finished, False if timeout_seconds elapsed first
+        """
+        deadline = time.time() + timeout_seconds if timeout_seconds is not None else None
+        while True:
+            pending = [shard for shard in self.manifest["shards"] if shard["status"] != "collected"]
+            for shard in pending:
+                batch = self.backend.retrieve_batch(shard["batch_id"])
+                if batch["status"] not in TERMINAL_BATCH_STATUSES:
+                    if batch["status"] != shard["status"]:
+                        shard["status"] = batch["status"]
+                        self._save()
+                    continue
+
+                if batch.get("output_file_id"):
+                    shard["output_path"] = self._download(batch["output_file_id"], f"output_{shard['index']:03d}.jsonl")
+                if batch.get("error_file_id"):
+                    shard["error_path"] = self._download(batch["error_file_id"], f"errors_{shard['index']:03d}.jsonl")
+                shard["batch_status"] = batch["status"]
+                shard["status"] = "collected"
+                self._save()
+                print(f"✅ Shard {shard['index']} finished with status '{batch['status']}'")
+
+            if all(shard["status"] == "collected" for shard in self.manifest["shards"]):
+                return True
+            if deadline is not None and time.time() >= deadline:
+                return False
+            time.sleep(self.poll_seconds)
+
+    def _download(self, file_id: str, filename: str) -> str:
+        path = os.path.join(self.run_dir, filename)
+        if not os.path.exists(path):
+            _write_text_atomic(path, self.backend.download(file_id))
+        return path
+
+    def collect(self) -> List[Dict[str, Any]]:
+        """Parse downloaded outputs into results and write run_dir/results.jsonl"""
+        items = self.manifest["items"]
+        outcomes: Dict[str, Dict[str, Any]] = {}
+
+        for shard in self.manifest["shards"]:
+            for path in (shard.get("output_path"), shard.get("error_path")):
+                if not path:
+                    continue
+                with open(path) as f:
+                    for line in f:
+                        if line.strip():
+                            output = json.loads(line)
+                            outcomes[output["custom_id"]] = parse_batch_output(output)
+
+        # Requests that never produced an output line (expired/cancelled shards)
+        for custom_id in items:
+            outcomes.setdefault(custom_id, {"status": "error", "error": "No output returned for request"})
+
+        results = merge_results(items, outcomes) + [
+            {"type": "match", **pair, "status": "error"} for pair in self.manifest["skipped"]
+        ]
+        results_path = os.path.join(self.run_dir, "results.jsonl")
+        _write_text_atomic(results_path, "".join(json.dumps(result) + "\n" for result in results))
+
+        succeeded = sum(1 for result in results if result["status"] == "success")
+        print(f"📄 Collected {succeeded}/{len(results)} successful results into {results_path}")
+        return results
+
+
+def _write_text_atomic(path: str, text: str) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+def batch_cost(prompt_tokens: int, completion_tokens: int) -> float:
+    """Estimated USD cost of batch usage (synchronous price times BATCH_PRICE_MULTIPLIER)"""
+    cost_info = calculations_cost(prompt_tokens + completion_tokens, prompt_tokens, completion_tokens)
+    return round(cost_info.get("total_cost_usd", 0) * BATCH_PRICE_MULTIPLIER, 5)
+
+
+def parse_batch_output(output: Dict[str, Any]) -> Dict[str, Any]:
+    """Turn one Batch API output (or error) line into {"status", "parsed"|"error", usage}"""
+    response = output.get("response") or {}
+    if output.get("error") or response.get("status_code") != 200:
+        error = output.get("error") or response.get("body", {}).get("error") or {"message": "Request failed"}
+        return {"status": "error", "error": error.get("message", str(error))}
+
+    kind = output["custom_id"].split(":", 1)[0]
+    try:
+        completion = ChatCompletion.model_validate(response["body"])
+        message = completion.choices[0].message
+        if message.refusal:
+            raise ValueError(f"{'Match analysis' if kind == 'match' else 'Extraction'} refused: {message.refusal}")
+        parsed = REQUEST_KINDS[kind].model_validate_json(message.content)
+        if kind == "match":
+            value: Any = json.loads(finalize_match_result(parsed))
+        else:
+            value = parsed
+    except Exception as e:
+        return {"status": "error", "error": f"Could not parse output: {e}"}
+
+    usage = completion.usage
+    return {
+        "status": "success",
+        "parsed": value,
+        "prompt_tokens": usage.prompt_tokens if usage else 0,
+        "completion_tokens": usage.completion_tokens if usage else 0,
+    }
+
+
+def merge_results(items: Dict[str, Dict[str, Any]], outcomes: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Combine per-request outcomes into one result per match pair / per resume"""
+    results = []
+    resumes: Dict[str, Dict[str, Any]] = {}
+
+    for custom_id, item in items.items():
+        outcome = outcomes[custom_id]
+        tokens = outcome.get("prompt_tokens", 0) + outcome.get("completion_tokens", 0)
+
+        if item["type"] == "match":
+            result = {"type": "match", "resume_id": item["resume_id"], "jd_id": item["jd_id"], "status": outcome["status"]}
+            if outcome["status"] == "success":
+                analysis = outcome["parsed"]
+                result["analysis"] = analysis["steps"][0] if analysis.get("steps") else analysis
+                result["usage"] = {
+                    "tokens": tokens,
+                    "cost": batch_cost(outcome["prompt_tokens"], outcome["completion_tokens"]),
+                }
+            else:
+                result["error"] = outcome["error"]
+            results.append(result)
+            continue
+
+        kind = custom_id.split(":", 1)[0]
+        resume = resumes.setdefault(item["resume_key"], {
+            "type": "resume", "resume_key": item["resume_key"], "parts": {}, "errors": [],
+            "prompt_tokens": 0, "completion_tokens": 0,
+        })
+        if outcome["status"] == "success":
+            resume["parts"][kind] = outcome["parsed"]
+            resume["prompt_tokens"] += outcome["prompt_tokens"]
+            resume["completion_tokens"] += outcome["completion_tokens"]
+        else:
+            resume["errors"].append(f"{kind}: {outcome['error']}")
+
+    for resume in resumes.values():
+        results.append(assemble_resume_result(resume))
+    return results
+
+
+def assemble_resume_result(resume: Dict[str, Any]) -> Dict[str, Any]:
+    """Build a resume result from its personal info, education and experience extractions"""
+    result = {"type": "resume", "resume_key": resume["resume_key"]}
+    if resume["errors"]:
+        return {**result, "status": "error", "error": "; ".join(resume["errors"])}
+
+    parts = resume["parts"]
+    experience = [exp.model_dump() for exp in parts["experience"].experience]
+    stability = calculate_stability(experience)
+    resume_data_out = {
+        **parts["personal_info"].personal_info.model_dump(),
+        "Education": [edu.model_dump() for edu in parts["education"].education],
+        "Experience": experience,
+        "StabilityAssessment": stability["StabilityAssessment"],
+        "AverageStability": stability["AverageStability"],
+    }
+    tokens = resume["prompt_tokens"] + resume["completion_tokens"]
+    return {
+        **result,
+        "status": "success",
+        "resume_data": resume_data_out,
+        "TotalYearsOfExperience": calculate_total_experience({"Experience": experience}),
+        "usage": {"tokens": tokens, "cost": batch_cost(resume["prompt_tokens"], resume["completion_tokens"])},
+    }
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+def load_pairs(path: str) -> List[Dict[str, str]]:
+    """Read resume/JD pairs from a JSONL file of {"resume_id": ..., "jd_id": ...} lines"""
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def load_resume_texts(resumes_dir: str) -> List[Tuple[str, str]]:
+    """Extract text from every supported resume file in a directory"""
+    from text_extractor import extract_text_from_file
+
+    texts = []
+    for filename in sorted(os.listdir(resumes_dir)):
+        if os.path.splitext(filename)[1].lower() not in (".pdf", ".docx", ".txt"):
+            continue
+        try:
+            texts.append((filename, extract_text_from_file(os.path.join(resumes_dir, filename))))
+        except Exception as e:
+            print(f"⚠️  Skipping {filename}: {e}")
+    return texts
+
+
+def run_batch(run: BatchRun, build: Callable[[], Tuple], wait: bool = True, timeout_seconds: Optional[float] = None) -> Optional[List[Dict[str, Any]]]:
+    """Prepare (unless already checkpointed), submit, wait and collect a run"""
+    if run.prepared:
+        print(f"♻️  Resuming run from {run.manifest_path}")
+    else:
+        run.prepare(*build())
+    run.submit()
+    if not wait:
+        return None
+    if not run.wait(timeout_seconds):
+        print("⏳ Batches still running; re-run the same command to keep polling")
+        return None
+    return run.collect()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Offline bulk matching/extraction via the OpenAI Batch API")
+    parser.add_argument("mode", choices=["match", "resumes"], help="match resume/JD pairs, or run resume extraction agents")
+    parser.add_argument("--run-dir", required=True, help="Run directory; re-use it to resume an interrupted run")
+    parser.add_argument("--pairs", help="JSONL file of {\"resume_id\", \"jd_id\"} pairs (match mode)")
+    parser.add_argument("--resumes-dir", help="Directory of resume files (resumes mode)")
+    parser.add_argument("--local", action="store_true", help="Use the local file-based batch service")
+    parser.add_argument("--no-wait", action="store_true", help="Submit and exit without polling")
+    parser.add_argument("--timeout", type=float, default=None, help="Stop polling after this many seconds")
+    parser.add_argument("--poll-seconds", type=float, default=BATCH_POLL_SECONDS)
+    parser.add_argument("--shard-size", type=int, default=BATCH_SHARD_MAX_REQUESTS)
+    args = parser.parse_args(argv)
+
+    if args.local:
+        backend = LocalBatchBackend(os.path.join(args.run_dir, "local_batch_service"))
+    else:
+        backend = OpenAIBatchBackend()
+    run = BatchRun(args.run_dir, backend, poll_seconds=args.poll_seconds)
+
+    if args.mode == "match":
+        if not args.pairs and not run.prepared:
+            parser.error("--pairs is required for a new match run")
+        build = lambda: build_match_requests(load_pairs(args.pairs))
+    else:
+        if not args.resumes_dir and not run.prepared:
+            parser.error("--resumes-dir is required for a new resumes run")
+        build = lambda: build_resume_requests(load_resume_texts(args.resumes_dir))
+
+    def build_sharded():
+        requests, items, *skipped = build()
+        return requests, items, (skipped[0] if skipped else None), args.shard_size
+
+    run_batch(run, build_sharded, wait=not args.no_wait, timeout_seconds=args.timeout)
+
+
+if __name__ == "__main__":
+    main()
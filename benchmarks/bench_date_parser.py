@@ -0,0 +1,104 @@
+"""
+Microbenchmark: compiled, memoized parse_date_string vs. the original strptime loop.
+
+Run from the repository root:
+    python benchmarks/bench_date_parser.py
+"""
+import os
+import re
+import sys
+import timeit
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from experience_calculator import parse_date_string, _parse_date_cached
+
+
+def legacy_parse_date_string(date_str):
+    """The parser as it was before the single-pass rewrite (strptime loop + regex fallback)."""
+    if not date_str or not isinstance(date_str, str):
+        return None
+
+    date_str = date_str.strip()
+
+    date_formats = [
+        "%B %Y", "%b %Y", "%m/%Y", "%m-%Y", "%Y-%m", "%Y",
+        "%B %d, %Y", "%b %d, %Y", "%d/%m/%Y", "%d-%m-%Y", "%Y-%m-%d",
+    ]
+
+    for fmt in date_formats:
+        try:
+            return datetime.strptime(date_str, fmt)
+        except ValueError:
+            continue
+
+    try:
+        match = re.search(r'(\w+)\s+(\d{4})', date_str)
+        if match:
+            month_str, year_str = match.groups()
+            months = {
+                'january': 1, 'jan': 1, 'february': 2, 'feb': 2, 'march': 3, 'mar': 3,
+                'april': 4, 'apr': 4, 'may': 5, 'june': 6, 'jun': 6, 'july': 7, 'jul': 7,
+                'august': 8, 'aug': 8, 'september': 9, 'sep': 9, 'sept': 9,
+                'october': 10, 'oct': 10, 'november': 11, 'nov': 11, 'december': 12, 'dec': 12
+            }
+            month_num = months.get(month_str.lower())
+            if month_num:
+                return datetime(int(year_str), month_num, 1)
+
+        match = re.search(r'(\d{4})', date_str)
+        if match:
+            return datetime(int(match.group(1)), 1, 1)
+    except Exception:
+        pass
+
+    return None
+
+
+# Date strings as they come out of the experience extractors
+SAMPLE_DATES = [
+    "February 2022", "Feb 2022", "July 2019", "Jul 2019", "Sept 2020", "02/2022",
+    "02-2022", "2022-02", "2022", "February 15, 2022", "Feb 15, 2022", "15/02/2022",
+    "15-02-2022", "2022-02-15", "Since March 2020", "Summer 2019", "Q3 2021",
+]
+
+
+def check_equivalence():
+    mismatches = [d for d in SAMPLE_DATES if parse_date_string(d) != legacy_parse_date_string(d)]
+    if mismatches:
+        print(f"⚠️  Parsers disagree on: {mismatches}")
+    else:
+        print(f"✅ Parsers agree on all {len(SAMPLE_DATES)} sample formats")
+
+
+def run(number: int = 2000):
+    def parse_all_legacy():
+        for date_str in SAMPLE_DATES:
+            legacy_parse_date_string(date_str)
+
+    def parse_all_new_cold():
+        _parse_date_cached.cache_clear()
+        for date_str in SAMPLE_DATES:
+            parse_date_string(date_str)
+
+    def parse_all_new_warm():
+        for date_str in SAMPLE_DATES:
+            parse_date_string(date_str)
+
+    calls = number * len(SAMPLE_DATES)
+    results = {
+        "legacy strptime loop": timeit.timeit(parse_all_legacy, number=number),
+        "compiled (cold cache)": timeit.timeit(parse_all_new_cold, number=number),
+        "compiled (memoized)": timeit.timeit(parse_all_new_warm, number=number),
+    }
+
+    baseline = results["legacy strptime loop"]
+    for name, seconds in results.items():
+        per_call_us = seconds / calls * 1_000_000
+        print(f"{name:<24} {per_call_us:8.2f} µs/call   {baseline / seconds:6.1f}x")
+
+
+if __name__ == "__main__":
+    check_equivalence()
+    run()
@@ -0,0 +1,99 @@
+import os
+import time
+from typing import Dict, Iterable, Optional
+from dotenv import load_dotenv
+from persistent_cache import PersistentCache
+from company_names import canonical_company_key
+from company_kb import lookup_known_company
+
+load_dotenv()
+
+# Company facts produced by the enrichment agents
+ENRICHMENT_FIELDS = ("CompanyType", "BusinessType", "Location", "NumberOfEmployees", "Funding")
+
+# Classification and headquarters rarely change; headcount and funding go stale quickly
+STABLE_FIELD_TTL_SECONDS = float(os.getenv("COMPANY_CACHE_STABLE_TTL_SECONDS", 90 * 24 * 3600))
+VOLATILE_FIELD_TTL_SECONDS = float(os.getenv("COMPANY_CACHE_VOLATILE_TTL_SECONDS", 30 * 24 * 3600))
+VOLATILE_FIELDS = ("NumberOfEmployees", "Funding")
+
+company_cache = PersistentCache(
+    name="company_enrichment",
+    path=os.getenv("COMPANY_CACHE_PATH", "cache/company_enrichment.sqlite3"),
+    max_entries=int(os.getenv("COMPANY_CACHE_MAX_ENTRIES", 20000)),
+    default_ttl_seconds=STABLE_FIELD_TTL_SECONDS,
+)
+
+
+def normalize_company_key(company_name: str) -> str:
+    """Build the cache key for a company name: its canonical key, so aliases share one entry"""
+    return canonical_company_key(company_name or "")
+
+
+def _field_ttl(field: str) -> float:
+    return VOLATILE_FIELD_TTL_SECONDS if field in VOLATILE_FIELDS else STABLE_FIELD_TTL_SECONDS
+
+
+def get_cached_company(company_name: str, fields: Iterable[str] = ENRICHMENT_FIELDS) -> Optional[Dict[str, Optional[str]]]:
+    """
+    Look up known enrichment for a company.
+
+    Well-known employers are answered from the bundled knowledge base
+    (company_kb) first; everything else comes from the enrichment cache.
+
+    Args:
+        company_name (str): Company name as extracted from the resume
+        fields (Iterable[str]): Fields the caller needs; every one must be cached and fresh
+
+    Returns:
+        Dict mapping each requested field to its cached value, or None on a miss
+    """
+    key = normalize_company_key(company_name)
+    if not key:
+        return None
+
+    fields = tuple(fields)
+    known = lookup_known_company(company_name, fields)
+    if known is not None:
+        return known
+
+    now = time.time()
+
+    def is_fresh(entry: Dict) -> bool:
+        fetched_at = entry.get("fetched_at", {})
+        return all(
+            field in entry.get("fields", {}) and now - fetched_at.get(field, 0) < _field_ttl(field)
+            for field in fields
+        )
+
+    entry = company_cache.get(key, validate=is_fresh)
+    if entry is None:
+        return None
+    return {field: entry["fields"][field] for field in fields}
+
+
+def cache_company(company_name: str, company_info: Dict[str, Optional[str]]) -> None:
+    """
+    Store enrichment results for a company, merging with any cached fields.
+
+    Only keys present in company_info are written, so a pipeline that looks up
+    a subset of ENRICHMENT_FIELDS does not erase the others. Results classified
+    as "Unknown" are fallbacks, not facts, and are never cached.
+    """
+    key = normalize_company_key(company_name)
+    if not key or company_info.get("CompanyType") == "Unknown":
+        return
+
+    updates = {field: company_info[field] for field in ENRICHMENT_FIELDS if field in company_info}
+    if not updates:
+        return
+
+    now = time.time()
+    entry = company_cache.peek(key) or {"fields": {}, "fetched_at": {}}
+    entry["fields"].update(updates)
+    entry["fetched_at"].update({field: now for field in updates})
+    company_cache.set(key, entry)
+
+
+def get_company_cache_stats() -> Dict:
+    """Return hit-rate and size metrics for the company enrichment cache"""
+    return company_cache.stats()
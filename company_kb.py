@@ -0,0 +1,102 @@
+import os
+import json
+import threading
+from typing import Dict, Iterable, Optional, Tuple
+from dotenv import load_dotenv
+from company_names import canonical_company_key, register_company_aliases
+
+load_dotenv()
+
+# Bundled, versioned facts about well-known employers (data/company_kb.json).
+# Entries are curated rather than searched, so they are served without any LLM call;
+# bump "version" in the file whenever entries change.
+COMPANY_KB_PATH = os.getenv("COMPANY_KB_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "company_kb.json"))
+COMPANY_KB_ENABLED = os.getenv("COMPANY_KB_ENABLED", "true").lower() == "true"
+
+
+class CompanyKnowledgeBase:
+    """
+    In-memory company facts keyed by canonical company key.
+
+    Each entry is stored as a tuple in the file's field order, which keeps a
+    few thousand employers to a few hundred KB; lookups are one canonical-key
+    resolution plus a dict hit.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.version: Optional[str] = None
+        self.fields: Tuple[str, ...] = ()
+        self._entries: Dict[str, Tuple[Optional[str], ...]] = {}
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0}
+        self._load()
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            print(f"⚠️  Company knowledge base not found at {self.path}, enrichment will use search only")
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+
+        self.version = data.get("version")
+        self.fields = tuple(data["fields"])
+        # Aliases first, so company keys below resolve through them
+        for canonical, aliases in data.get("aliases", {}).items():
+            register_company_aliases(canonical, aliases)
+        for name, values in data.get("companies", {}).items():
+            key = register_company_aliases(name, [])
+            self._entries.setdefault(key, tuple(values))
+        print(f"📚 Company knowledge base {self.version}: {len(self._entries)} companies")
+
+    def lookup(self, company_name: str, fields: Iterable[str]) -> Optional[Dict[str, Optional[str]]]:
+        """
+        Known facts for a company, or None if it is not in the knowledge base.
+
+        Args:
+            company_name (str): Company name, alias or email domain
+            fields (Iterable[str]): Fields the caller needs; all must be present in the entry
+
+        Returns:
+            Dict mapping each requested field to its value, or None
+        """
+        entry = self._entries.get(canonical_company_key(company_name or ""))
+        result = None
+        if entry is not None:
+            values = dict(zip(self.fields, entry))
+            if all(values.get(field) is not None for field in fields):
+                result = {field: values[field] for field in fields}
+        with self._lock:
+            self._stats["hits" if result is not None else "misses"] += 1
+        return result
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            hits, misses = self._stats["hits"], self._stats["misses"]
+        lookups = hits + misses
+        return {
+            "enabled": COMPANY_KB_ENABLED,
+            "version": self.version,
+            "companies": len(self._entries),
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / lookups, 4) if lookups else None,
+        }
+
+
+company_kb = CompanyKnowledgeBase(COMPANY_KB_PATH)
+
+
+def lookup_known_company(company_name: str, fields: Iterable[str]) -> Optional[Dict[str, Optional[str]]]:
+    """Facts for a well-known employer from the bundled knowledge base, or None"""
+    if not COMPANY_KB_ENABLED:
+        return None
+    return company_kb.lookup(company_name, tuple(fields))
+
+
+def get_company_kb_stats() -> Dict:
+    """Knowledge base version, size and hit rate"""
+    return company_kb.stats()
@@ -0,0 +1,212 @@
+import os
+import asyncio
+import contextvars
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from dotenv import load_dotenv
+from metrics import LatencyWindow
+from hedging import AgentDeadlineExceeded, agent_deadline, request_sla
+
+load_dotenv()
+
+# Enrichment misses from concurrent uploads are held for up to this window and
+# searched together, trading a few milliseconds for far fewer search calls
+COMPANY_MICROBATCH_ENABLED = os.getenv("COMPANY_MICROBATCH_ENABLED", "true").lower() == "true"
+COMPANY_MICROBATCH_WINDOW_MS = float(os.getenv("COMPANY_MICROBATCH_WINDOW_MS", 25))
+COMPANY_MICROBATCH_MAX_SIZE = int(os.getenv("COMPANY_MICROBATCH_MAX_SIZE", 8))
+
+
+class _Pending:
+    __slots__ = ("item", "future", "deadline", "queued_at")
+
+    def __init__(self, item: Any, future: asyncio.Future, deadline: Optional[float]):
+        self.item = item
+        self.future = future
+        self.deadline = deadline
+        self.queued_at = time.monotonic()
+
+
+class CompanyMicroBatcher:
+    """
+    Merge company searches from concurrent requests into shared batch calls.
+
+    Companies submitted while a batch is open join it. The batch is sent when
+    the window closes or as soon as it holds max_size companies, whichever
+    comes first, and each caller gets back the results for its own companies
+    in order. search_batch must return one result per input item, in input
+    order (as search_company_batch_openai does).
+
+    If flush_size is given it is asked for the batch size whenever companies
+    are added (e.g. a latency-derived chunk size), capped at max_size. A caller
+    that already planned its chunks submits each one whole: it is never split,
+    only shares a batch with open companies it fits beside, and can be sent at
+    once instead of waiting for the window.
+
+    A batch runs outside any one caller's context, under the latest deadline
+    among its callers (the name is the agent whose SLA share applies). Each
+    caller stops waiting at its own deadline with AgentDeadlineExceeded.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        search_batch: Callable[[List[Any]], Awaitable[List[Any]]],
+        window_seconds: float = COMPANY_MICROBATCH_WINDOW_MS / 1000,
+        max_size: int = COMPANY_MICROBATCH_MAX_SIZE,
+        enabled: bool = COMPANY_MICROBATCH_ENABLED,
+        flush_size: Optional[Callable[[], int]] = None,
+    ):
+        self.name = name
+        self.search_batch = search_batch
+        self.window_seconds = window_seconds
+        self.max_size = max(1, max_size)
+        self.enabled = enabled
+        self.flush_size = flush_size
+        self._pending: List[_Pending] = []
+        self._timer = None
+        self._tasks = set()
+        self._lock = threading.Lock()
+        self.queue_delay = LatencyWindow()
+        self._stats = {"submissions": 0, "companies": 0, "batches": 0, "full_flushes": 0, "window_flushes": 0,
+                       "planned_flushes": 0, "batch_failures": 0,
+                       "caller_deadlines_exceeded": 0}
+        _batchers[name] = self
+
+    async def search(self, items: List[Any], whole: bool = False, immediate: bool = False) -> List[Any]:
+        """
+        Search companies as part of the next shared batch.
+
+        Args:
+            items (list): Companies to search (e.g. BasicExperienceItem)
+            whole (bool): Keep the items in one batch, even past the batch size (a planned chunk)
+            immediate (bool): With whole, send the batch now rather than when the window closes
+
+        Returns:
+            list: One result per item, in the same order
+
+        Raises:
+            AgentDeadlineExceeded: If the caller's deadline passes before its batch answers
+        """
+        if not items:
+            return []
+        with self._lock:
+            self._stats["submissions"] += 1
+            self._stats["companies"] += len(items)
+        if not self.enabled:
+            with self._lock:
+                self._stats["batches"] += 1
+            return await self.search_batch(list(items))
+
+        loop = asyncio.get_running_loop()
+        batch_size = self.batch_size()
+        deadline = agent_deadline(self.name)
+        if whole and self._pending and len(self._pending) + len(items) > batch_size:
+            self._flush("full")
+        futures = []
+        for item in items:
+            future = loop.create_future()
+            # A failed batch fails every caller; mark it retrieved for callers that already gave up
+            future.add_done_callback(lambda f: f.cancelled() or f.exception())
+            futures.append(future)
+            self._pending.append(_Pending(item, future, deadline))
+            if not whole and len(self._pending) >= batch_size:
+                self._flush("full")
+        if whole and len(self._pending) >= batch_size:
+            self._flush("full")
+        elif whole and immediate:
+            self._flush("planned")
+        if self._pending and self._timer is None:
+            # Timer callbacks run in a copy of this caller's context; _flush detaches the batch
+            self._timer = loop.call_later(self.window_seconds, self._flush, "window")
+        if deadline is None:
+            return list(await asyncio.gather(*futures))
+        budget = deadline - time.monotonic()
+        try:
+            return list(await asyncio.wait_for(asyncio.gather(*futures), max(0.0, budget)))
+        except asyncio.TimeoutError:
+            with self._lock:
+                self._stats["caller_deadlines_exceeded"] += 1
+            raise AgentDeadlineExceeded(self.name, max(0.0, budget))
+
+    def batch_size(self) -> int:
+        """Companies per batch right now: the flush_size hint, never above max_size"""
+        if self.flush_size is None:
+            return self.max_size
+        return max(1, min(self.max_size, self.flush_size()))
+
+    def _flush(self, reason: str) -> None:
+        """Send the open batch (event loop thread only)"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        # Callers cancelled while waiting drop out of the batch
+        batch = [pending for pending in self._pending if not pending.future.done()]
+        self._pending = []
+        if not batch:
+            return
+
+        now = time.monotonic()
+        for pending in batch:
+            self.queue_delay.record(now - pending.queued_at)
+        with self._lock:
+            self._stats["batches"] += 1
+            self._stats[f"{reason}_flushes"] += 1
+        print(f"📦 {self.name}: searching {len(batch)} companies in one batch ({reason})")
+
+        # A fresh context: the batch must not inherit the SLA of whichever caller filled it
+        task = contextvars.Context().run(asyncio.ensure_future, self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: List[_Pending]) -> None:
+        deadlines = [pending.deadline for pending in batch]
+        try:
+            if None in deadlines:
+                results = await self.search_batch([pending.item for pending in batch])
+            else:
+                # Serve the caller with the most time left; earlier callers stop waiting on their own
+                with request_sla(max(deadlines) - time.monotonic()):
+                    results = await self.search_batch([pending.item for pending in batch])
+            if len(results) != len(batch):
+                raise ValueError(f"expected {len(batch)} results, got {len(results)}")
+        except BaseException as e:
+            with self._lock:
+                self._stats["batch_failures"] += 1
+            for pending in batch:
+                if pending.future.done():
+                    continue
+                if isinstance(e, asyncio.CancelledError):
+                    pending.future.cancel()
+                else:
+                    pending.future.set_exception(e)
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            return
+        for pending, result in zip(batch, results):
+            if not pending.future.done():
+                pending.future.set_result(result)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._stats)
+        batches = stats["batches"]
+        return {
+            "enabled": self.enabled,
+            "window_ms": round(self.window_seconds * 1000, 1),
+            "max_size": self.max_size,
+            "batch_size": self.batch_size(),
+            "open_batch": len(self._pending),
+            **stats,
+            "avg_batch_size": round(stats["companies"] / batches, 2) if batches else None,
+            "search_calls_saved": max(0, stats["submissions"] - batches),
+            "queue_delay_seconds": self.queue_delay.summary(),
+        }
+
+
+_batchers: Dict[str, CompanyMicroBatcher] = {}
+
+
+def get_microbatch_stats() -> Dict[str, Dict]:
+    """Batch counts, sizes and added queueing delay for every micro-batcher"""
+    return {name: batcher.stats() for name, batcher in list(_batchers.items())}
@@ -0,0 +1,234 @@
+import os
+import re
+import json
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Legal-form and filler words dropped from the end of a company name
+LEGAL_SUFFIXES = {
+    "pvt", "private", "ltd", "limited", "inc", "incorporated", "llc", "llp", "plc",
+    "corp", "corporation", "co", "company", "gmbh", "ag", "sa", "bv", "nv", "pte",
+    "pty", "srl", "spa", "kk", "oy", "ab", "as", "na",
+}
+
+# Second-level labels that are part of a country TLD ("tcs.co.in" -> "tcs")
+_COUNTRY_SLDS = {"co", "com", "net", "org", "ac", "gov", "edu"}
+
+# Curated aliases: canonical key -> other names, abbreviations and email domains
+DEFAULT_COMPANY_ALIASES = {
+    "tata consultancy services": ["tcs", "tata consultancy", "tata consultancy services tcs"],
+    "infosys": ["infosys technologies", "infosys bpm", "infy"],
+    "wipro": ["wipro technologies", "wipro infotech"],
+    "hcl technologies": ["hcl", "hcltech", "hcl tech"],
+    "tech mahindra": ["techm", "tech m", "mahindra satyam", "satyam computer services"],
+    "cognizant": ["cognizant technology solutions", "cts"],
+    "accenture": ["accenture solutions", "accenture services"],
+    "capgemini": ["cap gemini", "capgemini technology services"],
+    "ltimindtree": ["lti", "larsen & toubro infotech", "l&t infotech", "lnt infotech", "mindtree"],
+    "ibm": ["international business machines", "ibm india"],
+    "deloitte": ["deloitte touche tohmatsu", "deloitte consulting"],
+    "ernst & young": ["ey", "e&y", "ernst and young", "ey gds"],
+    "pricewaterhousecoopers": ["pwc", "price waterhouse coopers"],
+    "kpmg": ["kpmg global services"],
+    "google": ["google india", "alphabet", "google llc"],
+    "meta": ["facebook", "meta platforms", "fb"],
+    "amazon": ["amazon com", "amazon development centre", "amazon india", "amazon web services", "aws"],
+    "microsoft": ["microsoft india", "microsoft corporation", "msft"],
+    "jpmorgan chase": ["jp morgan", "jpmorgan", "jp morgan chase", "jpmc", "jpmorganchase"],
+    "goldman sachs": ["goldman sachs group", "goldmansachs", "gs"],
+    "state bank of india": ["sbi"],
+    "hdfc bank": ["hdfc", "hdfcbank"],
+    "icici bank": ["icici", "icicibank"],
+    "paytm": ["one97 communications", "one97"],
+    "flipkart": ["flipkart internet"],
+}
+
+# Employers' own email domains, for abbreviations that are only trusted as an exact domain
+# (the label of another company's domain can collide: cts.com is CTS Corporation, not Cognizant)
+COMPANY_EMAIL_DOMAINS = {
+    "tcs.com": "tata consultancy services",
+    "ey.com": "ernst & young",
+    "gs.com": "goldman sachs",
+    "fb.com": "meta",
+    "pwc.com": "pricewaterhousecoopers",
+    "sbi.co.in": "state bank of india",
+    "hcl.com": "hcl technologies",
+    "jpmchase.com": "jpmorgan chase",
+}
+
+# Aliases that fold to one token of at most this many characters ("GS", "CTS", "HDFC") are
+# abbreviations: they resolve only when the whole name is the abbreviation, optionally with a
+# legal suffix ("TCS", "TCS Ltd", not "HDFC Life"), or via COMPANY_EMAIL_DOMAINS
+ABBREVIATION_MAX_CHARS = 4
+
+# Suffixed abbreviations that name a different company than the bare abbreviation
+# (HDFC Ltd is the housing finance parent, not HDFC Bank; CTS Corporation is not Cognizant)
+ABBREVIATION_SUFFIX_EXCEPTIONS = {"hdfc ltd", "hdfc limited", "cts corp", "cts corporation"}
+
+# Optional JSON file with more aliases in the same {"canonical": ["alias", ...]} shape
+COMPANY_ALIASES_PATH = os.getenv("COMPANY_ALIASES_PATH")
+COMPANY_NAME_CACHE_SIZE = int(os.getenv("COMPANY_NAME_CACHE_SIZE", 8192))
+
+_DOMAIN_PATTERN = re.compile(r"^(?:https?://)?(?:www\.)?([a-z0-9-]+(?:\.[a-z0-9-]+)+)(?:/.*)?$")
+
+
+def _domain_label(domain: str) -> str:
+    """Registrable label of a domain: "careers.tcs.co.in" -> "tcs" """
+    labels = domain.split(".")[:-1]  # drop the TLD
+    if len(labels) > 1 and labels[-1] in _COUNTRY_SLDS:
+        labels = labels[:-1]
+    return labels[-1] if labels else domain
+
+
+def _company_domain(name: str) -> Optional[str]:
+    """Domain of an email address or URL-like name, or None for an ordinary name"""
+    if "@" in name:
+        name = name.rsplit("@", 1)[1]
+    domain = _DOMAIN_PATTERN.match(name) if " " not in name else None
+    return domain.group(1) if domain else None
+
+
+def _tokens(name: str) -> List[str]:
+    # "J.P. Morgan" -> "jp morgan", "O'Reilly" -> "oreilly"
+    name = re.sub(r"[.'’]", "", name)
+    return re.sub(r"[^\w\s&]", " ", name).replace("_", " ").split()
+
+
+def _fold(company_name: str) -> Tuple[str, bool, Optional[str]]:
+    """
+    Fold a company name.
+
+    Returns:
+        tuple: (folded name, True if nothing but case, punctuation and legal suffixes
+        was dropped, domain if the name was an email address or domain)
+    """
+    name = (company_name or "").strip().lower()
+    domain = _company_domain(name)
+    if domain:
+        name = _domain_label(domain)
+
+    bare = _tokens(name)
+    tokens = _tokens(re.sub(r"\([^)]*\)", " ", name))
+    if tokens and tokens[0] == "the" and len(tokens) > 1:
+        tokens = tokens[1:]
+    # "Chase & Co" -> "chase": drop suffixes and any connector left dangling
+    while len(tokens) > 1 and (tokens[-1] in LEGAL_SUFFIXES or tokens[-1] in ("&", "and")):
+        tokens = tokens[:-1]
+    exact = (
+        bare[:len(tokens)] == tokens
+        and all(token in LEGAL_SUFFIXES or token in ("&", "and") for token in bare[len(tokens):])
+        and " ".join(bare) not in ABBREVIATION_SUFFIX_EXCEPTIONS
+    )
+    return " ".join(tokens), exact, domain
+
+
+def fold_company_name(company_name: str) -> str:
+    """
+    Normalize a company name without consulting aliases.
+
+    Email addresses and domains are reduced to their registrable label, case
+    and punctuation are folded, parenthesized notes and legal suffixes
+    ("Pvt Ltd", "Inc", ...) are dropped.
+    """
+    return _fold(company_name)[0]
+
+
+def is_abbreviation(folded: str) -> bool:
+    """True for a folded alias short enough to be an ambiguous abbreviation ("gs", "cts", "e&y")"""
+    return " " not in folded and len(folded) <= ABBREVIATION_MAX_CHARS
+
+
+def _registrable_domains(domain: str) -> List[str]:
+    """"careers.tcs.com" -> ["careers.tcs.com", "tcs.com", "com"]"""
+    labels = domain.split(".")
+    return [".".join(labels[i:]) for i in range(len(labels))]
+
+
+def _add_aliases(canonical: str, names: List[str]) -> str:
+    """Index aliases under a canonical key; names that already resolve keep their mapping"""
+    key = fold_company_name(canonical)
+    _alias_index.setdefault(key, key)
+    for name in names:
+        folded = fold_company_name(name)
+        index = _abbreviation_index if is_abbreviation(folded) else _alias_index
+        index.setdefault(folded, key)
+    return key
+
+
+def _build_alias_index() -> None:
+    aliases = {canonical: list(names) for canonical, names in DEFAULT_COMPANY_ALIASES.items()}
+    if COMPANY_ALIASES_PATH and os.path.exists(COMPANY_ALIASES_PATH):
+        with open(COMPANY_ALIASES_PATH, "r", encoding="utf-8") as f:
+            for canonical, names in json.load(f).items():
+                aliases.setdefault(canonical, []).extend(names)
+    for canonical, names in aliases.items():
+        _add_aliases(canonical, names)
+
+
+_alias_index: Dict[str, str] = {}
+_abbreviation_index: Dict[str, str] = {}
+_build_alias_index()
+
+
+@lru_cache(maxsize=COMPANY_NAME_CACHE_SIZE)
+def canonical_company_key(company_name: str) -> str:
+    """
+    Resolve a company name, abbreviation or email domain to one canonical key.
+
+    "TCS", "Tata Consultancy Services Ltd" and "someone@tcs.com" all map to
+    "tata consultancy services". Unknown companies map to their folded name;
+    short abbreviations only match exactly (see ABBREVIATION_MAX_CHARS).
+
+    Args:
+        company_name (str): Company name as extracted from a resume or JD
+
+    Returns:
+        str: Canonical key ("" for an empty name)
+    """
+    folded, exact, domain = _fold(company_name)
+    if domain:
+        for candidate in _registrable_domains(domain):
+            if candidate in COMPANY_EMAIL_DOMAINS:
+                return canonical_company_key(COMPANY_EMAIL_DOMAINS[candidate])
+    if folded in _alias_index:
+        return _alias_index[folded]
+    # An abbreviation only counts when it is the whole name, give or take a legal suffix
+    if exact and not domain and folded in _abbreviation_index:
+        return _abbreviation_index[folded]
+    return folded
+
+
+def same_company(first: Optional[str], second: Optional[str]) -> bool:
+    """True if two names resolve to the same employer"""
+    key = canonical_company_key(first or "")
+    return bool(key) and key == canonical_company_key(second or "")
+
+
+def register_company_aliases(canonical: str, aliases: List[str]) -> str:
+    """
+    Add aliases for a company at runtime (e.g. from a data file).
+
+    Names that already resolve somewhere keep their mapping, so curated
+    aliases always win over later registrations.
+
+    Returns:
+        str: The canonical key the aliases were registered under
+    """
+    key = _add_aliases(canonical_company_key(canonical), aliases)
+    canonical_company_key.cache_clear()
+    return key
+
+
+def get_company_names_stats() -> Dict:
+    """Alias index size and canonicalization cache hit rate"""
+    info = canonical_company_key.cache_info()
+    lookups = info.hits + info.misses
+    return {
+        "aliases": len(_alias_index),
+        "abbreviations": len(_abbreviation_index),
+        "cache_size": info.currsize,
+        "cache_hit_rate": round(info.hits / lookups, 4) if lookups else None,
+    }
@@ -1,12 +1,37 @@
+from array import array
 from datetime import datetime, date
+from functools import lru_cache
 import re
-from typing import Dict, List, Union
+from typing import Dict, List, Optional, Tuple, Union
 import json
+from company_names import canonical_company_key
+
+# Roles excluded from average stability (internships and training programs)
+INTERNSHIP_PATTERN = re.compile(r"\b(intern|internship|trainee|apprentice|apprenticeship)\b", re.IGNORECASE)
+CONTRACT_PATTERN = re.compile(r"\b(contract|contractor|freelance|freelancer|temporary)\b", re.IGNORECASE)
+# Contract roles shorter than this are excluded from average stability
+MIN_CONTRACT_MONTHS = 6
+
+# Bit layout for packing (resume index, start month, end month) into one integer
+_MONTH_BITS = 20
+_MONTH_MASK = (1 << _MONTH_BITS) - 1
+_RESUME_SHIFT = 2 * _MONTH_BITS
+
+def get_experience_list(resume_data: Dict) -> List[Dict]:
+    """Return the Experience list from resume data (with or without the "steps" wrapper)."""
+    
+    if "steps" in resume_data and len(resume_data["steps"]) > 0:
+        return resume_data["steps"][0].get("Experience", []) or []
+    return resume_data.get("Experience", []) or []
+
 
 def calculate_total_experience(resume_data: Dict) -> float:
     """
     Calculate total years of experience from resume data.
     
+    Positions are read from each item's "Positions" list (or its top-level
+    "Duration") and overlapping stints are only counted once.
+    
     Args:
         resume_data (Dict): Resume data containing experience information
         
@@ -15,28 +40,7 @@ def calculate_total_experience(resume_data: Dict) -> float:
     """
     
     try:
-        # Navigate to experience data
-        if "steps" in resume_data and len(resume_data["steps"]) > 0:
-            experience_list = resume_data["steps"][0].get("Experience", [])
-        elif "Experience" in resume_data:
-            experience_list = resume_data["Experience"]
-        else:
-            return 0.0
-        
-        total_months = 0
-        
-        for exp in experience_list:
-            if "Duration" in exp:
-                start_date = exp["Duration"].get("StartDate", "")
-                end_date = exp["Duration"].get("EndDate", "")
-                
-                # Calculate months for this experience
-                months = calculate_months_between_dates(start_date, end_date)
-                total_months += months
-        
-        # Convert months to years and round to 2 decimal places
-        total_years = round(total_months / 12, 2)
-        return total_years
+        return get_experience_timeline(resume_data)["total_years"]
         
     except Exception as e:
         print(f"Error calculating experience: {e}")
@@ -62,31 +66,154 @@ def calculate_months_between_dates(start_date: str, end_date: str) -> int:
             return 0
         
         # Parse end date
-        if end_date.lower() in ["present", "current", "now", "till date"]:
+        if is_present_date(end_date):
             end_dt = datetime.now()
         else:
             end_dt = parse_date_string(end_date)
             if not end_dt:
                 return 0
         
-        # Calculate difference in months
-        months = (end_dt.year - start_dt.year) * 12 + (end_dt.month - start_dt.month)
-        
-        # Add partial month if end day is later than start day
-        if end_dt.day >= start_dt.day:
-            months += 1
-        
-        return max(0, months)  # Ensure non-negative
+        return months_between(start_dt, end_dt)
         
     except Exception as e:
         print(f"Error calculating months between {start_date} and {end_date}: {e}")
         return 0
 
 
+def months_between(start_dt: datetime, end_dt: datetime) -> int:
+    """Count months from start_dt to end_dt, including a partial last month."""
+    
+    # Calculate difference in months
+    months = (end_dt.year - start_dt.year) * 12 + (end_dt.month - start_dt.month)
+    
+    # Add partial month if end day is later than start day
+    if end_dt.day >= start_dt.day:
+        months += 1
+    
+    return max(0, months)  # Ensure non-negative
+
+
+# Month name to number mapping
+MONTHS = {
+    'january': 1, 'jan': 1,
+    'february': 2, 'feb': 2,
+    'march': 3, 'mar': 3,
+    'april': 4, 'apr': 4,
+    'may': 5,
+    'june': 6, 'jun': 6,
+    'july': 7, 'jul': 7,
+    'august': 8, 'aug': 8,
+    'september': 9, 'sep': 9, 'sept': 9,
+    'october': 10, 'oct': 10,
+    'november': 11, 'nov': 11,
+    'december': 12, 'dec': 12
+}
+
+_MONTH_NAMES = "|".join(sorted(MONTHS, key=len, reverse=True))
+
+# One pass over the supported formats:
+#   "February 2022", "Feb 2022", "Feb. 2022", "February 15, 2022", "Feb 15 2022"
+#   "02/2022", "02-2022", "2022-02", "15/02/2022", "15-02-2022", "2022-02-15", "2022"
+_DATE_PATTERN = re.compile(
+    rf"""^(?:
+        (?P<month_name>{_MONTH_NAMES})\.?\s+(?:(?P<month_day>\d{{1,2}}),?\s+)?(?P<month_year>\d{{4}})
+      | (?P<first>\d{{1,4}})(?P<sep>[/-])(?P<second>\d{{1,4}})(?:(?P=sep)(?P<third>\d{{1,4}}))?
+      | (?P<year>\d{{4}})
+    )$""",
+    re.IGNORECASE | re.VERBOSE,
+)
+# Fallbacks for free text such as "Since March 2020" or "Summer 2019"
+_MONTH_YEAR_SEARCH = re.compile(r"(\w+)\s+(\d{4})")
+_YEAR_SEARCH = re.compile(r"(\d{4})")
+
+_PRESENT_PATTERN = re.compile(
+    r"^(?:present|current|currently|now|till\s+date|till\s+now|to\s+date|ongoing|today)$",
+    re.IGNORECASE,
+)
+# Range separators: dashes, " - ", " to ", " till "/" until " (but not "to date"/"till now")
+_RANGE_SEPARATOR = re.compile(
+    r"\s*[–—]\s*|\s+-\s+|\s+(?:to|till|until)\s+(?!date\b|now\b)",
+    re.IGNORECASE,
+)
+# Ranges ending in a present phrase without a separator, e.g. "Jan 2020 till date"
+_PRESENT_SUFFIX = re.compile(r"^(?P<start>.+?)\s+(?P<end>till\s+date|till\s+now|to\s+date)$", re.IGNORECASE)
+# Unspaced hyphen ranges such as "2019-Present", "2019-2021" or "Jan 2020-Mar 2022"
+_HYPHEN_RANGE = re.compile(r"^(?P<start>.+?)-(?P<end>[a-z]+\.?\s*\d{4}|\d{4}|[a-z][a-z\s]*)$", re.IGNORECASE)
+
+# Bound on distinct date strings kept by the parser memo
+DATE_PARSE_CACHE_SIZE = 4096
+
+
+def is_present_date(date_str: str) -> bool:
+    """Return True for end dates meaning "ongoing" ("Present", "Current", "Till date", ...)."""
+    return isinstance(date_str, str) and bool(_PRESENT_PATTERN.match(date_str.strip()))
+
+
+def _build_date(year: int, month: int, day: int = 1) -> Union[datetime, None]:
+    try:
+        return datetime(year, month, day)
+    except ValueError:
+        return None
+
+
+def _parse_exact_date(date_str: str) -> Union[datetime, None]:
+    """Parse date_str if it is exactly one of the supported formats."""
+    
+    match = _DATE_PATTERN.match(date_str)
+    if not match:
+        return None
+    
+    if match.group("month_name"):
+        day = int(match.group("month_day")) if match.group("month_day") else 1
+        return _build_date(int(match.group("month_year")), MONTHS[match.group("month_name").lower()], day)
+    
+    if match.group("year"):
+        return _build_date(int(match.group("year")), 1)
+    
+    first, second, third = match.group("first"), match.group("second"), match.group("third")
+    if third is None:
+        if len(first) == 4 and len(second) <= 2:    # "2022-02"
+            return _build_date(int(first), int(second))
+        if len(second) == 4 and len(first) <= 2:    # "02/2022", "02-2022"
+            return _build_date(int(second), int(first))
+        return None
+    
+    if len(first) == 4 and len(second) <= 2 and len(third) <= 2:    # "2022-02-15"
+        return _build_date(int(first), int(second), int(third))
+    if len(third) == 4 and len(first) <= 2 and len(second) <= 2:    # "15/02/2022", "15-02-2022"
+        return _build_date(int(third), int(second), int(first))
+    return None
+
+
+@lru_cache(maxsize=DATE_PARSE_CACHE_SIZE)
+def _parse_date_cached(date_str: str) -> Union[datetime, None]:
+    parsed = _parse_exact_date(date_str)
+    if parsed:
+        return parsed
+    
+    # Look for month name and year anywhere in the string
+    match = _MONTH_YEAR_SEARCH.search(date_str)
+    if match:
+        month_num = MONTHS.get(match.group(1).lower())
+        if month_num:
+            return _build_date(int(match.group(2)), month_num)
+    
+    # Look for just year
+    match = _YEAR_SEARCH.search(date_str)
+    if match:
+        return _build_date(int(match.group(1)), 1)  # Default to January 1st
+    
+    return None
+
+
 def parse_date_string(date_str: str) -> Union[datetime, None]:
     """
     Parse various date string formats into datetime object.
     
+    All supported formats are matched by a single compiled pattern and
+    results are memoized (bounded by DATE_PARSE_CACHE_SIZE), since the same
+    strings are parsed several times per resume.
+    
     Args:
         date_str (str): Date string in various formats
         
@@ -97,70 +224,300 @@ def parse_date_string(date_str: str) -> Union[datetime, None]:
     if not date_str or not isinstance(date_str, str):
         return None
     
-    # Clean the date string
-    date_str = date_str.strip()
-    
-    # Common date formats to try
-    date_formats = [
-        "%B %Y",        # "February 2022", "July 2019"
-        "%b %Y",        # "Feb 2022", "Jul 2019" 
-        "%m/%Y",        # "02/2022"
-        "%m-%Y",        # "02-2022"
-        "%Y-%m",        # "2022-02"
-        "%Y",           # "2022"
-        "%B %d, %Y",    # "February 15, 2022"
-        "%b %d, %Y",    # "Feb 15, 2022"
-        "%d/%m/%Y",     # "15/02/2022"
-        "%d-%m-%Y",     # "15-02-2022"
-        "%Y-%m-%d",     # "2022-02-15"
-    ]
+    return _parse_date_cached(date_str.strip())
+
+
+def parse_date_range(range_str: str) -> Tuple[Union[datetime, None], Union[datetime, None]]:
+    """
+    Parse a date range such as "Jan 2020 - Mar 2022" or "2019-Present".
+    
+    Args:
+        range_str (str): Date range (or a single date)
+        
+    Returns:
+        tuple: (start, end) datetimes; end is now() for ongoing ranges and
+        None when the string holds a single date or can't be parsed
+    """
+    
+    if not range_str or not isinstance(range_str, str):
+        return None, None
+    
+    range_str = range_str.strip()
+    
+    # A single exact date ("2022-02", "15-02-2022") is not a range
+    single = _parse_exact_date(range_str)
+    if single:
+        return single, None
+    
+    parts = _RANGE_SEPARATOR.split(range_str, maxsplit=1)
+    if len(parts) != 2:
+        match = _PRESENT_SUFFIX.match(range_str) or _HYPHEN_RANGE.match(range_str)
+        parts = [match.group("start"), match.group("end")] if match else [range_str]
+    
+    start_dt = parse_date_string(parts[0])
+    if len(parts) == 1:
+        return start_dt, None
+    
+    end_str = parts[1].strip()
+    end_dt = datetime.now() if is_present_date(end_str) else parse_date_string(end_str)
+    return start_dt, end_dt
+
+
+def get_position_interval(start_date: str, end_date: str) -> Optional[Tuple[int, int]]:
+    """
+    Convert a position's dates into a half-open interval of month ordinals.
+    
+    The interval length matches calculate_months_between_dates, so merging
+    non-overlapping intervals gives the same totals as summing months.
+    
+    Args:
+        start_date (str): Start date in various formats
+        end_date (str): End date in various formats (can be "Present", "Current", etc.)
+        
+    Returns:
+        tuple or None: (start_month, end_month) or None if the dates can't be parsed
+    """
+    
+    if not (end_date or "").strip():
+        # Whole range in one field, e.g. StartDate "Jan 2020 - Mar 2022"
+        start_dt, end_dt = parse_date_range(start_date)
+    else:
+        start_dt = parse_date_string(start_date)
+        end_dt = datetime.now() if is_present_date(end_date) else parse_date_string(end_date)
+    if not start_dt or not end_dt:
+        return None
     
-    # Try each format
-    for fmt in date_formats:
+    months = months_between(start_dt, end_dt)
+    if months <= 0:
+        return None
+    
+    start_month = start_dt.year * 12 + (start_dt.month - 1)
+    return (start_month, start_month + months)
+
+
+def merge_month_intervals(intervals: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """Merge overlapping or touching month intervals (sort and sweep)."""
+    
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def get_company_positions(exp: Dict) -> List[Dict]:
+    """Return the positions of an experience item (nested "Positions" or a flat item with "Duration")."""
+    
+    if exp.get("Positions"):
+        return exp["Positions"]
+    if "Duration" in exp:
+        return [exp]
+    return []
+
+
+def flatten_experience_intervals(experience_list: List[Dict]) -> List[Tuple[int, int, str, str]]:
+    """
+    Flatten experience items into position intervals.
+    
+    Args:
+        experience_list (List[Dict]): Experience items (nested "Positions" or flat "Duration")
+        
+    Returns:
+        List of (start_month, end_month, company_name, position) tuples; positions
+        with unparseable dates are skipped
+    """
+    
+    intervals = []
+    for exp in experience_list:
+        company_name = (exp.get("CompanyName") or "Unknown").strip()
+        for position in get_company_positions(exp):
+            duration = position.get("Duration") or {}
+            interval = get_position_interval(duration.get("StartDate", ""), duration.get("EndDate", ""))
+            if interval:
+                intervals.append((interval[0], interval[1], company_name, position.get("Position", "")))
+    return intervals
+
+
+def company_group_key(company_name: str) -> str:
+    """Key positions are grouped by, so "TCS" and "Tata Consultancy Services Ltd" count as one employer"""
+    return canonical_company_key(company_name) or company_name.lower()
+
+
+def format_month(month_ordinal: int) -> str:
+    """Format a month ordinal as "YYYY-MM"."""
+    return f"{month_ordinal // 12}-{month_ordinal % 12 + 1:02d}"
+
+
+def get_experience_timeline(resume_data: Dict) -> Dict:
+    """
+    Build a merged experience timeline from resume data.
+    
+    All positions are flattened into month intervals and merged with a
+    sort-and-sweep, so overlapping stints (within or across companies)
+    are counted once and the gaps between them fall out of the sweep.
+    
+    Args:
+        resume_data (Dict): Resume data containing experience information
+        
+    Returns:
+        Dict: {
+            'total_months': int,
+            'total_years': float,
+            'per_company': [{'company', 'months', 'years'}, ...] in order of first appearance,
+            'gaps': [{'start': 'YYYY-MM', 'end': 'YYYY-MM', 'months': int}, ...],
+            'total_gap_months': int,
+            'total_gap_years': float
+        }
+    """
+    
+    intervals = flatten_experience_intervals(get_experience_list(resume_data))
+    
+    # Per-company tenure with overlaps inside the company merged
+    company_intervals = {}
+    for start, end, company_name, _ in intervals:
+        company = company_intervals.setdefault(company_group_key(company_name), {"company": company_name, "intervals": []})
+        company["intervals"].append((start, end))
+    
+    per_company = []
+    for company in company_intervals.values():
+        months = sum(end - start for start, end in merge_month_intervals(company["intervals"]))
+        per_company.append({
+            "company": company["company"],
+            "months": months,
+            "years": round(months / 12, 2)
+        })
+    
+    # Overall timeline and the gaps between merged stints
+    merged = merge_month_intervals([(start, end) for start, end, _, _ in intervals])
+    total_months = sum(end - start for start, end in merged)
+    
+    gaps = []
+    for (_, previous_end), (next_start, _) in zip(merged, merged[1:]):
+        gaps.append({
+            "start": format_month(previous_end),
+            "end": format_month(next_start - 1),
+            "months": next_start - previous_end
+        })
+    total_gap_months = sum(gap["months"] for gap in gaps)
+    
+    return {
+        "total_months": total_months,
+        "total_years": round(total_months / 12, 2),
+        "per_company": per_company,
+        "gaps": gaps,
+        "total_gap_months": total_gap_months,
+        "total_gap_years": round(total_gap_months / 12, 2)
+    }
+
+
+def calculate_total_experience_batch(resumes: List[Dict]) -> List[Dict[str, float]]:
+    """
+    Calculate total experience and gap years for many resumes at once.
+    
+    Intervals from every resume are packed into a single array of integers
+    (resume index, start month and end month in one key), sorted once in C,
+    and merged in one sweep. Intended for corpus analytics over thousands of
+    resumes.
+    
+    Args:
+        resumes (List[Dict]): Resume data items, each accepted by calculate_total_experience
+        
+    Returns:
+        List[Dict]: {'total_years': float, 'total_gap_years': float} per resume, in input order
+    """
+    
+    packed = array("q")
+    for index, resume_data in enumerate(resumes):
         try:
-            return datetime.strptime(date_str, fmt)
-        except ValueError:
-            continue
+            for start, end, _, _ in flatten_experience_intervals(get_experience_list(resume_data)):
+                packed.append((index << _RESUME_SHIFT) | (start << _MONTH_BITS) | end)
+        except Exception as e:
+            print(f"Error reading experience for resume {index}: {e}")
     
-    # Try to extract year and month using regex
-    try:
-        # Look for month name and year
-        month_year_pattern = r'(\w+)\s+(\d{4})'
-        match = re.search(month_year_pattern, date_str)
-        if match:
-            month_str, year_str = match.groups()
-            
-            # Month name to number mapping
-            months = {
-                'january': 1, 'jan': 1,
-                'february': 2, 'feb': 2,
-                'march': 3, 'mar': 3,
-                'april': 4, 'apr': 4,
-                'may': 5,
-                'june': 6, 'jun': 6,
-                'july': 7, 'jul': 7,
-                'august': 8, 'aug': 8,
-                'september': 9, 'sep': 9, 'sept': 9,
-                'october': 10, 'oct': 10,
-                'november': 11, 'nov': 11,
-                'december': 12, 'dec': 12
-            }
-            
-            month_num = months.get(month_str.lower())
-            if month_num:
-                return datetime(int(year_str), month_num, 1)
+    total_months = array("q", bytes(8 * len(resumes)))
+    gap_months = array("q", bytes(8 * len(resumes)))
+    
+    current_index = -1
+    current_end = 0
+    for key in sorted(packed):
+        index = key >> _RESUME_SHIFT
+        start = (key >> _MONTH_BITS) & _MONTH_MASK
+        end = key & _MONTH_MASK
         
-        # Look for just year
-        year_pattern = r'(\d{4})'
-        match = re.search(year_pattern, date_str)
-        if match:
-            year = int(match.group(1))
-            return datetime(year, 1, 1)  # Default to January 1st
-            
-    except Exception as e:
-        print(f"Error parsing date with regex: {e}")
+        if index != current_index:
+            current_index = index
+            total_months[index] += end - start
+            current_end = end
+        elif start > current_end:
+            gap_months[index] += start - current_end
+            total_months[index] += end - start
+            current_end = end
+        elif end > current_end:
+            total_months[index] += end - current_end
+            current_end = end
     
-    return None
+    return [
+        {"total_years": round(total / 12, 2), "total_gap_years": round(gap / 12, 2)}
+        for total, gap in zip(total_months, gap_months)
+    ]
+
+
+def is_excluded_from_stability(position_title: str, months: int) -> bool:
+    """Internships, training programs and contract roles under 6 months don't count toward average stability."""
+    
+    title = position_title or ""
+    if INTERNSHIP_PATTERN.search(title):
+        return True
+    return bool(CONTRACT_PATTERN.search(title)) and months < MIN_CONTRACT_MONTHS
+
+
+def calculate_stability(experience_list: List[Dict]) -> Dict[str, Union[List[str], str]]:
+    """
+    Calculate company-wise tenure and average stability from experience data.
+    
+    Positions at the same company are merged as month intervals, so overlapping
+    or concurrent roles are not double-counted.
+    
+    Args:
+        experience_list (List[Dict]): Experience items, each with CompanyName and
+            either a "Positions" list or a top-level "Duration"
+        
+    Returns:
+        Dict: {
+            'StabilityAssessment': ["CompanyName: X.XX years", ...] in order of first appearance,
+            'AverageStability': "X.XX" (mean tenure over companies with eligible roles)
+        }
+    """
+    
+    companies = {}
+    for start, end, company_name, position in flatten_experience_intervals(experience_list):
+        company = companies.setdefault(company_group_key(company_name), {
+            "name": company_name,
+            "all": [],
+            "eligible": []
+        })
+        company["all"].append((start, end))
+        if not is_excluded_from_stability(position, end - start):
+            company["eligible"].append((start, end))
+    
+    stability_assessment = []
+    eligible_tenures = []
+    for company in companies.values():
+        total_months = sum(end - start for start, end in merge_month_intervals(company["all"]))
+        stability_assessment.append(f"{company['name']}: {total_months / 12:.2f} years")
+        
+        eligible_months = sum(end - start for start, end in merge_month_intervals(company["eligible"]))
+        if eligible_months > 0:
+            eligible_tenures.append(eligible_months / 12)
+    
+    average = sum(eligible_tenures) / len(eligible_tenures) if eligible_tenures else 0.0
+    return {
+        "StabilityAssessment": stability_assessment,
+        "AverageStability": f"{average:.2f}"
+    }
 
 
 def add_total_experience_to_response(response_data: Dict) -> Dict:
@@ -198,27 +555,19 @@ def get_experience_breakdown(resume_data: Dict) -> List[Dict]:
     """
     
     try:
-        # Navigate to experience data
-        if "steps" in resume_data and len(resume_data["steps"]) > 0:
-            experience_list = resume_data["steps"][0].get("Experience", [])
-        elif "Experience" in resume_data:
-            experience_list = resume_data["Experience"]
-        else:
-            return []
-        
         breakdown = []
         
-        for exp in experience_list:
-            if "Duration" in exp:
-                start_date = exp["Duration"].get("StartDate", "")
-                end_date = exp["Duration"].get("EndDate", "")
+        for exp in get_experience_list(resume_data):
+            for position in get_company_positions(exp):
+                start_date = position["Duration"].get("StartDate", "")
+                end_date = position["Duration"].get("EndDate", "")
                 
                 months = calculate_months_between_dates(start_date, end_date)
                 years = round(months / 12, 2)
                 
                 breakdown.append({
                     "company": exp.get("CompanyName", "Unknown"),
-                    "position": exp.get("Position", "Unknown"),
+                    "position": position.get("Position", "Unknown"),
                     "start_date": start_date,
                     "end_date": end_date,
                     "duration_months": months,
@@ -275,4 +624,12 @@ if __name__ == "__main__":
     # Get breakdown
     breakdown = get_experience_breakdown(test_resume_data)
     for exp in breakdown:
-        print(f"{exp['company']}: {exp['duration_years']} years") 
\ No newline at end of file
+        print(f"{exp['company']}: {exp['duration_years']} years")
+    
+    # Merged timeline with per-company tenure and gaps
+    timeline = get_experience_timeline(test_resume_data)
+    print(f"Per company: {timeline['per_company']}")
+    print(f"Gaps: {timeline['gaps']}")
+    
+    # Batch mode for corpus analytics
+    print(calculate_total_experience_batch([test_resume_data] * 3)) 
\ No newline at end of file
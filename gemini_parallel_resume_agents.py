@@ -9,11 +9,18 @@ from langfuse import observe
 from langchain_google_genai import ChatGoogleGenerativeAI
 from google import genai
 from google.genai import types
+from company_cache import get_cached_company, cache_company
+from company_names import canonical_company_key
+from singleflight import get_single_flight
+from agent_dag import AgentDAG
+from llm_gateway import llm_call, estimate_tokens
+from hedging import run_agent
 
 load_dotenv()
 
 # Initialize Gemini client for web search
 genai_client = genai.Client()
+company_flight = get_single_flight("company_enrichment:gemini")
 
 # Phase 1 Models
 class PersonalInfo(BaseModel):
@@ -100,7 +107,8 @@ def get_gemini_client(model: str = "gemini-2.5-flash-lite-preview-06-17", api_ke
     return ChatGoogleGenerativeAI(
         model=model,
         temperature=0.1,
-        google_api_key=api_key
+        google_api_key=api_key,
+        max_retries=0,  # retries are handled by llm_gateway
     )
 
 async def gemini_structured_completion(prompt: str, user_input: str, response_model: BaseModel, model: str = "gemini-2.5-flash-lite-preview-06-17") -> Any:
@@ -120,7 +128,12 @@ Your response must be valid JSON that can be parsed directly. Do not include any
 """
     
     # Generate response
-    response = llm.invoke(f"{structured_prompt}\n\nUser Input: {user_input}")
+    response = await llm_call(
+        model,
+        lambda: llm.invoke(f"{structured_prompt}\n\nUser Input: {user_input}"),
+        estimate_tokens(structured_prompt, user_input),
+        blocking=True,
+    )
     
     # Clean the response content to handle markdown code blocks
     content = response.content.strip()
@@ -217,12 +230,12 @@ async def experience_info_extractor_gemini(resume_text: str) -> List[BasicExperi
     Extract dates EXACTLY as they appear in the resume without reformatting.
     """
     
-    response = await gemini_structured_completion(
+    response = await run_agent("experience_info_extractor:gemini", lambda: gemini_structured_completion(
         prompt=prompt,
         user_input=resume_text,
         response_model=ExperienceInfoResponse,
         model="gemini-2.5-flash-lite-preview-06-17"
-    )
+    ), hedge=True)
     
     end_time = time.time()
     duration = round(end_time - start_time, 2)
@@ -281,11 +294,8 @@ async def stability_analyzer_gemini(experience_list: List[BasicExperienceItem])
     
     return response.stability_analysis
 
-async def enrich_single_company_gemini_with_search(exp: BasicExperienceItem) -> EnrichedExperienceItem:
-    """Enrich a single company's details using Gemini with Google web search"""
-    company_start_time = time.time()
-    print(f"🔍 Enriching {exp.CompanyName} (Gemini + Web Search)...")
-    
+async def search_company_details_gemini(exp: BasicExperienceItem) -> dict:
+    """Look up one company with Gemini + Google web search, returning its details as a dict"""
     # Configure web search tool
     retrieval_tool = types.Tool(
         google_search_retrieval=types.GoogleSearchRetrieval(
@@ -314,25 +324,24 @@ async def enrich_single_company_gemini_with_search(exp: BasicExperienceItem) ->
     Please search for current, accurate information about this company and provide specific details where available.
     """
     
-    try:
-        # Use Gemini with web search
-        response = genai_client.models.generate_content(
-            model='gemini-1.5-flash',
-            contents=search_prompt,
-            config=config,
-            response_model=CompanyDetailsResponse
-        )
-        
-        search_results = response.text
-        grounded = response.candidates[0].grounding_metadata is not None
-        
-        if grounded:
-            print(f"🌐 {exp.CompanyName}: Web search provided additional data")
-        else:
-            print(f"🧠 {exp.CompanyName}: Using model knowledge only")
-        
-        # Now use structured completion to parse the enriched data
-        parsing_prompt = f"""Based on the company information provided, extract structured data for {exp.CompanyName}:
+    # Use Gemini with web search
+    response = await run_agent("company_enrichment:gemini", lambda: llm_call('gemini-1.5-flash', lambda: genai_client.models.generate_content(
+        model='gemini-1.5-flash',
+        contents=search_prompt,
+        config=config,
+        response_model=CompanyDetailsResponse
+    ), estimate_tokens(search_prompt, output_tokens=300), blocking=True), hedge=True)
+    
+    search_results = response.text
+    grounded = response.candidates[0].grounding_metadata is not None
+    
+    if grounded:
+        print(f"🌐 {exp.CompanyName}: Web search provided additional data")
+    else:
+        print(f"🧠 {exp.CompanyName}: Using model knowledge only")
+    
+    # Now use structured completion to parse the enriched data
+    parsing_prompt = f"""Based on the company information provided, extract structured data for {exp.CompanyName}:
 
 Company Information:
 {search_results}
@@ -357,35 +366,54 @@ INFERENCE RULES:
 - Enterprise software = B2B
 - Social media = B2C
 """
-        
-        structured_response = await gemini_structured_completion(
-            prompt=parsing_prompt,
-            user_input=f"Company: {exp.CompanyName}, Position: {exp.Position}",
-            response_model=CompanyDetailsResponse,
-            model="gemini-2.0-flash"
+    
+    structured_response = await gemini_structured_completion(
+        prompt=parsing_prompt,
+        user_input=f"Company: {exp.CompanyName}, Position: {exp.Position}",
+        response_model=CompanyDetailsResponse,
+        model="gemini-2.0-flash"
+    )
+    
+    if not structured_response.company_details:
+        raise ValueError("No company details returned")
+    company_info = structured_response.company_details.model_dump()
+    cache_company(exp.CompanyName, company_info)
+    return company_info
+
+async def enrich_single_company_gemini_with_search(exp: BasicExperienceItem) -> EnrichedExperienceItem:
+    """Enrich a single company's details using Gemini with Google web search"""
+    company_start_time = time.time()
+    
+    # Known companies are served from the enrichment cache without a search call
+    cached = get_cached_company(exp.CompanyName)
+    if cached is not None:
+        print(f"💾 {exp.CompanyName} served from company cache")
+        return EnrichedExperienceItem(
+            CompanyName=exp.CompanyName,
+            Position=exp.Position,
+            Duration=exp.Duration,
+            **cached
+        )
+    
+    print(f"🔍 Enriching {exp.CompanyName} (Gemini + Web Search)...")
+    
+    try:
+        # Concurrent uploads (and repeat stints in this one) share one search per company
+        company_info = await company_flight.do(
+            canonical_company_key(exp.CompanyName),
+            lambda: search_company_details_gemini(exp)
         )
         
-        # Create enriched item using the parsed company details
-        if structured_response.company_details:
-            company_details = structured_response.company_details
-            enriched_item = EnrichedExperienceItem(
-                CompanyName=exp.CompanyName,
-                Position=exp.Position,
-                Duration=exp.Duration,
-                CompanyType=company_details.CompanyType,
-                BusinessType=company_details.BusinessType,
-                NumberOfEmployees=company_details.NumberOfEmployees,
-                Funding=company_details.Funding,
-                Location=company_details.Location
-            )
-            
-            company_end_time = time.time()
-            company_duration = round(company_end_time - company_start_time, 2)
-            print(f"✅ {exp.CompanyName} enriched in {company_duration}s (Gemini + Search)")
-            
-            return enriched_item
-        else:
-            raise ValueError("No company details returned")
+        company_end_time = time.time()
+        company_duration = round(company_end_time - company_start_time, 2)
+        print(f"✅ {exp.CompanyName} enriched in {company_duration}s (Gemini + Search)")
+        
+        return EnrichedExperienceItem(
+            CompanyName=exp.CompanyName,
+            Position=exp.Position,
+            Duration=exp.Duration,
+            **company_info
+        )
             
     except Exception as e:
         print(f"⚠️  Error enriching {exp.CompanyName}: {e}")
@@ -466,96 +494,15 @@ async def company_details_enricher_gemini(experience_list: List[BasicExperienceI
     
     return enriched_experience
 
-# Orchestrator Functions - Gemini Version
-async def run_phase_1_gemini(resume_text: str) -> tuple[PersonalInfo, List[EducationItem], List[BasicExperienceItem]]:
-    """Run Phase 1 agents in parallel using Gemini"""
-    phase_start_time = time.time()
-    print("🚀 Starting Phase 1 (Gemini): Parallel extraction of personal info, education, and basic experience...")
-    print("⏱️  All Phase 1 Gemini agents starting simultaneously...")
-    
-    # Track individual completion times
-    completion_times = {}
-    
-    async def personal_info_with_timing():
-        start = time.time()
-        result = await personal_info_extractor_gemini(resume_text)
-        completion_times['Personal Info (Gemini)'] = round(time.time() - start, 2)
-        return result
-    
-    async def education_with_timing():
-        start = time.time()
-        result = await education_info_extractor_gemini(resume_text)
-        completion_times['Education (Gemini)'] = round(time.time() - start, 2)
-        return result
-    
-    async def experience_with_timing():
-        start = time.time()
-        result = await experience_info_extractor_gemini(resume_text)
-        completion_times['Experience (Gemini)'] = round(time.time() - start, 2)
-        return result
-    
-    tasks = [
-        personal_info_with_timing(),
-        education_with_timing(),
-        experience_with_timing()
-    ]
-    
-    personal_info, education, experience = await asyncio.gather(*tasks)
-    
-    phase_end_time = time.time()
-    phase_duration = round(phase_end_time - phase_start_time, 2)
-    
-    # Find the bottleneck
-    bottleneck_agent = max(completion_times, key=completion_times.get)
-    bottleneck_time = completion_times[bottleneck_agent]
-    
-    print(f"✅ Phase 1 (Gemini) completed in {phase_duration}s (parallel execution)")
-    print(f"📊 Phase 1 Gemini Agent Times: {completion_times}")
-    print(f"🐌 Bottleneck: {bottleneck_agent} ({bottleneck_time}s)")
-    
-    return personal_info, education, experience
-
-@observe(name="run_phase_2_gemini")
-async def run_phase_2_gemini(experience_list: List[BasicExperienceItem]) -> tuple[StabilityAnalysis, List[EnrichedExperienceItem]]:
-    """Run Phase 2 agents in parallel using Gemini"""
-    phase_start_time = time.time()
-    print("🚀 Starting Phase 2 (Gemini): Parallel stability analysis and company details enrichment...")
-    print("⏱️  All Phase 2 Gemini agents starting simultaneously...")
-    
-    # Track individual completion times
-    completion_times = {}
-    
-    async def stability_with_timing():
-        start = time.time()
-        result = await stability_analyzer_gemini(experience_list)
-        completion_times['Stability Analyzer (Gemini)'] = round(time.time() - start, 2)
-        return result
-    
-    async def company_details_with_timing():
-        start = time.time()
-        result = await company_details_enricher_gemini(experience_list)
-        completion_times['Company Details Enricher (Gemini)'] = round(time.time() - start, 2)
-        return result
-    
-    tasks = [
-        stability_with_timing(),
-        company_details_with_timing()
-    ]
-    
-    stability_analysis, enriched_experience = await asyncio.gather(*tasks)
-    
-    phase_end_time = time.time()
-    phase_duration = round(phase_end_time - phase_start_time, 2)
-    
-    # Find the bottleneck
-    bottleneck_agent = max(completion_times, key=completion_times.get)
-    bottleneck_time = completion_times[bottleneck_agent]
-    
-    print(f"✅ Phase 2 (Gemini) completed in {phase_duration}s (parallel execution)")
-    print(f"📊 Phase 2 Gemini Agent Times: {completion_times}")
-    print(f"🐌 Bottleneck: {bottleneck_agent} ({bottleneck_time}s)")
-    
-    return stability_analysis, enriched_experience
+# Agent dataflow for analyze_resume_parallel_gemini
+resume_analysis_dag = (
+    AgentDAG("gemini_parallel")
+    .add("personal_info", personal_info_extractor_gemini, deps=["resume_text"])
+    .add("education", education_info_extractor_gemini, deps=["resume_text"])
+    .add("experience", experience_info_extractor_gemini, deps=["resume_text"])
+    .add("stability", stability_analyzer_gemini, deps=["experience"])
+    .add("enrichment", company_details_enricher_gemini, deps=["experience"])
+)
 
 @observe(name="analyze_resume_parallel_gemini")
 async def analyze_resume_parallel_gemini(resume_text: str) -> tuple[str, int]:
@@ -563,11 +510,14 @@ async def analyze_resume_parallel_gemini(resume_text: str) -> tuple[str, int]:
     total_start_time = time.time()
     print("🎯 Starting parallel resume analysis with Gemini...")
     
-    # Phase 1: Extract basic information in parallel
-    personal_info, education, basic_experience = await run_phase_1_gemini(resume_text)
-    
-    # Phase 2: Analyze and enrich in parallel
-    stability_analysis, enriched_experience = await run_phase_2_gemini(basic_experience)
+    # Each agent starts as soon as its inputs are ready: stability and enrichment
+    # begin when the experience extractor finishes, without waiting for the others
+    run = await resume_analysis_dag.run(resume_text=resume_text)
+    run.report()
+    personal_info = run["personal_info"]
+    education = run["education"]
+    stability_analysis = run["stability"]
+    enriched_experience = run["enrichment"]
     
     # Combine all results
     combined_result = CombinedResumeData(
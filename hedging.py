@@ -0,0 +1,179 @@
+import os
+import json
+import time
+import asyncio
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from dotenv import load_dotenv
+from metrics import LatencyWindow
+
+load_dotenv()
+
+# End-to-end budget for one resume analysis
+REQUEST_SLA_SECONDS = float(os.getenv("REQUEST_SLA_SECONDS", 60))
+
+# Point in the request SLA by which each agent must have answered. Extractors
+# that feed enrichment get an early deadline so enrichment still has time left.
+DEFAULT_AGENT_SLA_FRACTIONS = {
+    "personal_info_extractor": 0.5,
+    "education_info_extractor": 0.5,
+    "experience_info_extractor": 0.4,
+    "company_enrichment": 1.0,
+}
+AGENT_SLA_FRACTIONS = {**DEFAULT_AGENT_SLA_FRACTIONS, **json.loads(os.getenv("AGENT_SLA_FRACTIONS", "{}"))}
+
+# Hedging: fire a duplicate once an agent has been running longer than its observed p95
+HEDGE_ENABLED = os.getenv("HEDGE_ENABLED", "true").lower() == "true"
+HEDGE_PERCENTILE = float(os.getenv("HEDGE_PERCENTILE", 95))
+HEDGE_MIN_SAMPLES = int(os.getenv("HEDGE_MIN_SAMPLES", 20))
+# Upper bound on duplicates as a fraction of calls, so hedging cannot multiply cost
+HEDGE_MAX_FRACTION = float(os.getenv("HEDGE_MAX_FRACTION", 0.1))
+
+# (request start, request deadline) in time.monotonic() seconds for the current request
+_request_window: ContextVar[Optional[Tuple[float, float]]] = ContextVar("request_window", default=None)
+
+
+class AgentDeadlineExceeded(asyncio.TimeoutError):
+    """Raised when an agent does not answer before its share of the request SLA."""
+
+    def __init__(self, agent: str, budget: float):
+        self.agent = agent
+        super().__init__(f"{agent} did not finish within its {budget:.1f}s deadline")
+
+
+@contextmanager
+def request_sla(seconds: float = REQUEST_SLA_SECONDS):
+    """Set the SLA for agents run within this block (inherited by tasks and threads started inside it)"""
+    start = time.monotonic()
+    token = _request_window.set((start, start + seconds))
+    try:
+        yield
+    finally:
+        _request_window.reset(token)
+
+
+def agent_deadline(agent: str) -> Optional[float]:
+    """Monotonic deadline for an agent in the current request, or None outside a request SLA"""
+    window = _request_window.get()
+    if window is None:
+        return None
+    start, deadline = window
+    # "experience_info_extractor:gemini" shares the deadline of "experience_info_extractor"
+    fraction = AGENT_SLA_FRACTIONS.get(agent.split(":", 1)[0], 1.0)
+    return min(deadline, start + (deadline - start) * fraction)
+
+
+class _AgentStats:
+    def __init__(self):
+        self.latency = LatencyWindow()
+        self.calls = 0
+        self.hedges_fired = 0
+        self.hedge_wins = 0
+        self.deadline_exceeded = 0
+
+
+_stats: Dict[str, _AgentStats] = {}
+_stats_lock = threading.Lock()
+
+
+def _agent_stats(agent: str) -> _AgentStats:
+    with _stats_lock:
+        return _stats.setdefault(agent, _AgentStats())
+
+
+def _hedge_delay(stats: _AgentStats) -> Optional[float]:
+    """Seconds after which to hedge, or None if hedging is off, unwarmed or over budget"""
+    if not HEDGE_ENABLED or len(stats.latency) < HEDGE_MIN_SAMPLES:
+        return None
+    if stats.hedges_fired >= HEDGE_MAX_FRACTION * max(stats.calls, 1):
+        return None
+    return stats.latency.percentile(HEDGE_PERCENTILE)
+
+
+async def run_agent(agent: str, make_call: Callable[[], Awaitable[Any]], hedge: bool = False) -> Any:
+    """
+    Run one agent call under its deadline, optionally hedged.
+
+    If hedge is set and the call is still running after the agent's observed
+    p95 latency, an identical second call is started and whichever answers
+    first wins; the other is cancelled.
+
+    Args:
+        agent (str): Agent name, used for the deadline fraction and latency stats;
+            backends suffix it (e.g. "company_enrichment:gemini") to keep separate stats
+        make_call (callable): Zero-argument callable returning a new awaitable per attempt
+        hedge (bool): Allow a duplicate call for this agent
+
+    Returns:
+        The first successful result
+
+    Raises:
+        AgentDeadlineExceeded: If no call answered before the agent's deadline
+    """
+    stats = _agent_stats(agent)
+    stats.calls += 1
+    deadline = agent_deadline(agent)
+    budget = deadline - time.monotonic() if deadline is not None else None
+    if budget is not None and budget <= 0:
+        stats.deadline_exceeded += 1
+        raise AgentDeadlineExceeded(agent, 0.0)
+
+    def remaining() -> Optional[float]:
+        return max(0.0, deadline - time.monotonic()) if deadline is not None else None
+
+    async def timed() -> Any:
+        started = time.monotonic()
+        result = await make_call()
+        stats.latency.record(time.monotonic() - started)
+        return result
+
+    primary = asyncio.ensure_future(timed())
+    tasks = [primary]
+    try:
+        hedge_after = _hedge_delay(stats) if hedge else None
+        if hedge_after is not None:
+            wait_for = hedge_after if deadline is None else min(hedge_after, remaining())
+            done, _ = await asyncio.wait(tasks, timeout=wait_for)
+            if not done and (deadline is None or remaining() > 0):
+                stats.hedges_fired += 1
+                print(f"🪁 {agent}: no answer after p{HEDGE_PERCENTILE:.0f} ({hedge_after:.1f}s), firing hedge request")
+                tasks.append(asyncio.ensure_future(timed()))
+
+        pending = set(tasks)
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = await asyncio.wait(pending, timeout=remaining(), return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                break
+            for task in done:
+                if task.exception() is None:
+                    if task is not primary:
+                        stats.hedge_wins += 1
+                    return task.result()
+                error = error or task.exception()
+        if error is not None and not pending:
+            raise error
+        stats.deadline_exceeded += 1
+        raise AgentDeadlineExceeded(agent, budget or 0.0)
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+
+
+def get_hedging_stats() -> Dict[str, Any]:
+    """Per-agent latency, hedge and deadline counters"""
+    with _stats_lock:
+        items = list(_stats.items())
+    return {
+        agent: {
+            "calls": stats.calls,
+            "hedges_fired": stats.hedges_fired,
+            "hedge_wins": stats.hedge_wins,
+            "deadline_exceeded": stats.deadline_exceeded,
+            "latency_seconds": stats.latency.summary(),
+        }
+        for agent, stats in items
+    }
@@ -2,9 +2,12 @@ import os
 from pydantic import BaseModel
 from openai import OpenAI
 from dotenv import load_dotenv
+from llm_gateway import llm_call, estimate_tokens
 load_dotenv()
 openai_api_key = os.getenv("OPENAI_API_KEY")
-client = OpenAI()
+client = OpenAI(max_retries=0)  # retries are handled by llm_gateway
+
+JD_MODEL = "gpt-4.1-nano-2025-04-14"
 
 class RequiredSkills(BaseModel):
     technical: list[str]
@@ -23,7 +26,7 @@ class Step(BaseModel):
 class jd_data(BaseModel):
     steps: list[Step]
 
-def analyze_jd(input_question):
+async def analyze_jd(input_question):
 
     prompt_template = """ 
     You are an expert job description analyst. Extract the following information:
@@ -85,14 +88,14 @@ def analyze_jd(input_question):
 
         """
 
-    completion = client.beta.chat.completions.parse(
-    model="gpt-4.1-nano-2025-04-14",
+    completion = await llm_call(JD_MODEL, lambda: client.beta.chat.completions.parse(
+    model=JD_MODEL,
     messages=[
         {"role": "system", "content": prompt_template},
         {"role": "user", "content": input_question}
     ],
     response_format=jd_data,
-    )
+    ), estimate_tokens(prompt_template, input_question), blocking=True)
 
     math_reasoning = completion.choices[0].message
 
@@ -126,7 +129,7 @@ def analyze_jd(input_question):
 # - date with emerging trends in frontend development and  recommend technologies and approaches that can improve our applications. ·         Mentor and guide junior engineers on the team. Qualification ·         Bachelor's or Master's degree in Computer Science or a related field. ·         At least 5+ years of professional experience in frontend development. ·         Strong proficiency in JavaScript, HTML, CSS, and related web  technologies ·         Experience with modern frontend framework React Native with Android or  IOS ·         Proficient in using debugging tools and techniques ·         Strong understanding of RESTful APIs and asynchronous programming.  ·         Knowledge of web security principles and techniques. ·         Experience with performance optimization techniques. ·         Strong problem
 # - solving and analytical skills. ·         Excellent communication and interpersonal skills. ·         Ability to work independently as well as part of a team.
 #     """
-#     json_output,total_tokens = analyze_jd(input_question)
+#     json_output,total_tokens = asyncio.run(analyze_jd(input_question))
 #     print(json_output)
 #     print(total_tokens)
 
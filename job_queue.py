@@ -0,0 +1,204 @@
+import asyncio
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional
+from metrics import LatencyWindow
+
+
+class JobQueueFull(Exception):
+    """Raised when a job is submitted while the queue is at capacity."""
+
+
+class JobQueue:
+    """
+    Bounded in-process job queue with a fixed pool of asyncio workers.
+
+    Jobs are submitted with a payload and run by the handler coroutine;
+    callers poll get() with the returned job id. Finished jobs are kept for
+    result_ttl_seconds so their results can be fetched, and are pruned by a
+    background task (and on submit/poll) once they expire. Completion
+    callbacks run as their own tasks, so a slow callback endpoint never holds
+    a worker.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        handler: Callable[[Dict[str, Any]], Awaitable[Any]],
+        workers: int = 4,
+        max_queue: int = 100,
+        result_ttl_seconds: float = 3600,
+        on_complete: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None,
+        prune_interval_seconds: float = 60,
+    ):
+        """
+        Args:
+            name (str): Queue name used in logs and metrics
+            handler (callable): Coroutine run for each job's payload; its return value is the job result
+            workers (int): Number of jobs run concurrently
+            max_queue (int): Maximum number of jobs waiting to run
+            result_ttl_seconds (float): How long finished jobs stay available
+            on_complete (callable, optional): Coroutine called with the job view when a job finishes
+            prune_interval_seconds (float): How often expired jobs are dropped in the background
+        """
+        self.name = name
+        self.handler = handler
+        self.workers = workers
+        self.max_queue = max_queue
+        self.result_ttl_seconds = result_ttl_seconds
+        self.on_complete = on_complete
+        self.prune_interval_seconds = prune_interval_seconds
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker_tasks = []
+        self._callback_tasks = set()
+        self._jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._running = 0
+        self._counters = {"submitted": 0, "succeeded": 0, "failed": 0, "rejected": 0, "callbacks_failed": 0}
+        self._wait_times = LatencyWindow()
+        self._run_times = LatencyWindow()
+
+    async def start(self) -> None:
+        """Start the worker tasks (idempotent)."""
+        if self._worker_tasks:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._worker_tasks = [
+            asyncio.create_task(self._worker(), name=f"{self.name}-worker-{i}")
+            for i in range(self.workers)
+        ]
+        self._worker_tasks.append(asyncio.create_task(self._prune_periodically(), name=f"{self.name}-pruner"))
+        print(f"🧵 Job queue '{self.name}' started with {self.workers} workers (max queue {self.max_queue})")
+
+    async def stop(self) -> None:
+        """Cancel the workers and pending callbacks; queued jobs that have not started are dropped."""
+        tasks = self._worker_tasks + list(self._callback_tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._worker_tasks = []
+
+    def submit(self, payload: Dict[str, Any], callback_url: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Queue a job.
+
+        Returns:
+            Dict: Public view of the new job (job_id, status, ...)
+
+        Raises:
+            JobQueueFull: If max_queue jobs are already waiting
+        """
+        if self._queue is None:
+            raise RuntimeError(f"Job queue '{self.name}' has not been started")
+
+        self._prune()
+        job = {
+            "job_id": str(uuid.uuid4()),
+            "status": "queued",
+            "callback_url": callback_url,
+            "submitted_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "result": None,
+            "error": None,
+            "payload": payload,
+        }
+        try:
+            self._queue.put_nowait(job["job_id"])
+        except asyncio.QueueFull:
+            self._counters["rejected"] += 1
+            raise JobQueueFull(f"Job queue '{self.name}' is full ({self.max_queue} jobs waiting)")
+
+        self._jobs[job["job_id"]] = job
+        self._counters["submitted"] += 1
+        return self._view(job)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Return the public view of a job, or None if unknown or expired."""
+        self._prune()
+        job = self._jobs.get(job_id)
+        return self._view(job) if job else None
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth, concurrency and wait/run time metrics."""
+        return {
+            **self._counters,
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "max_queue": self.max_queue,
+            "running": self._running,
+            "workers": self.workers,
+            "tracked_jobs": len(self._jobs),
+            "pending_callbacks": len(self._callback_tasks),
+            "wait_seconds": self._wait_times.summary(),
+            "run_seconds": self._run_times.summary(),
+        }
+
+    async def _worker(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            job = self._jobs.get(job_id)
+            if job is None:
+                self._queue.task_done()
+                continue
+
+            job["status"] = "running"
+            job["started_at"] = time.time()
+            self._wait_times.record(job["started_at"] - job["submitted_at"])
+            self._running += 1
+            try:
+                job["result"] = await self.handler(job["payload"])
+                job["status"] = "succeeded"
+                self._counters["succeeded"] += 1
+            except asyncio.CancelledError:
+                job["status"] = "failed"
+                job["error"] = "Job cancelled during shutdown"
+                raise
+            except Exception as e:
+                print(f"⚠️  Job {job_id} in '{self.name}' failed: {e}")
+                job["status"] = "failed"
+                job["error"] = str(e)
+                self._counters["failed"] += 1
+            finally:
+                job["finished_at"] = time.time()
+                job["payload"] = None  # release uploaded bytes
+                self._run_times.record(job["finished_at"] - job["started_at"])
+                self._running -= 1
+                self._queue.task_done()
+
+            if self.on_complete and job["callback_url"]:
+                task = asyncio.create_task(self._notify(self._view(job)), name=f"{self.name}-callback-{job_id}")
+                self._callback_tasks.add(task)
+                task.add_done_callback(self._callback_tasks.discard)
+
+    async def _notify(self, view: Dict[str, Any]) -> None:
+        """Run the completion callback outside the worker loop"""
+        try:
+            await self.on_complete(view)
+        except Exception as e:
+            self._counters["callbacks_failed"] += 1
+            print(f"⚠️  Completion callback for job {view['job_id']} failed: {e}")
+
+    async def _prune_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.prune_interval_seconds)
+            self._prune()
+
+    def _prune(self) -> None:
+        """Drop finished jobs older than result_ttl_seconds."""
+        cutoff = time.time() - self.result_ttl_seconds
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job["finished_at"] is not None and job["finished_at"] < cutoff
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    @staticmethod
+    def _view(job: Dict[str, Any]) -> Dict[str, Any]:
+        view = {key: value for key, value in job.items() if key != "payload"}
+        if job["started_at"] is not None:
+            view["wait_seconds"] = round(job["started_at"] - job["submitted_at"], 3)
+        if job["finished_at"] is not None:
+            view["run_seconds"] = round(job["finished_at"] - job["started_at"], 3)
+        return view
@@ -0,0 +1,168 @@
+import os
+import asyncio
+import contextvars
+import functools
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+from dotenv import load_dotenv
+from rate_limiter import get_rate_limiter
+from adaptive_concurrency import get_concurrency_limiter, is_overload_error
+from resilience import (
+    RETRY_MAX_ATTEMPTS,
+    RETRY_MAX_ELAPSED_SECONDS,
+    backoff_delay,
+    get_circuit_breaker,
+    is_retryable_error,
+)
+
+load_dotenv()
+
+# Allowance for the completion when estimating a call's token cost up front
+DEFAULT_OUTPUT_TOKENS = 1000
+# Threads for synchronous SDK calls (blocking=True). They only ever run calls that
+# already hold an in-flight slot, so they never wait on the concurrency limiter
+LLM_BLOCKING_WORKERS = int(os.getenv("LLM_BLOCKING_WORKERS", 64))
+
+_blocking_executor = ThreadPoolExecutor(max_workers=LLM_BLOCKING_WORKERS, thread_name_prefix="llm-call")
+
+
+def estimate_tokens(*texts: Optional[str], output_tokens: int = DEFAULT_OUTPUT_TOKENS) -> int:
+    """Rough token estimate for a call: ~4 characters per prompt token plus an output allowance"""
+    return sum(len(text) for text in texts if text) // 4 + output_tokens
+
+
+def actual_tokens(response: Any) -> Optional[int]:
+    """Total tokens reported by an OpenAI, Gemini (google-genai) or LangChain response, if any"""
+    usage = getattr(response, "usage", None)
+    if usage is not None:
+        total = getattr(usage, "total_tokens", None)
+        if total is not None:
+            return total
+        # Responses API reports input/output separately
+        input_tokens, output_tokens = getattr(usage, "input_tokens", None), getattr(usage, "output_tokens", None)
+        if input_tokens is not None and output_tokens is not None:
+            return input_tokens + output_tokens
+
+    usage_metadata = getattr(response, "usage_metadata", None)
+    if isinstance(usage_metadata, dict):
+        return usage_metadata.get("total_tokens")
+    if usage_metadata is not None:
+        return getattr(usage_metadata, "total_token_count", None)
+    return None
+
+
+async def _attempt(model: str, call: Callable[[], Any], estimated_tokens: int, blocking: bool) -> Any:
+    """One call: wait for rate-limit budget, take an in-flight slot, call, settle"""
+    limiter = get_rate_limiter(model)
+    wait = limiter.reserve(estimated_tokens)
+    concurrency = get_concurrency_limiter(model)
+    try:
+        if wait > 0:
+            if wait > 1:
+                print(f"🚦 Rate limit: queueing {model} call for {wait:.1f}s")
+            await asyncio.sleep(wait)
+        # Only hold an in-flight slot while the call is actually running
+        await concurrency.acquire()
+    except asyncio.CancelledError:
+        # Cancelled before the call went out (race/hedge loser, deadline): return the budget
+        limiter.cancel(estimated_tokens)
+        raise
+    start = time.monotonic()
+    abandoned = False
+    try:
+        if blocking:
+            loop = asyncio.get_running_loop()
+            thread_call = loop.run_in_executor(_blocking_executor, functools.partial(contextvars.copy_context().run, call))
+            try:
+                response = await asyncio.shield(thread_call)
+            except asyncio.CancelledError:
+                # A cancelled caller (race or hedge loser) can't stop the worker thread, which
+                # keeps running and billing: the slot and token settlement wait for the thread
+                abandoned = True
+                thread_call.add_done_callback(lambda done: _settle_abandoned(model, estimated_tokens, start, done))
+                raise
+        else:
+            response = await call()
+    except BaseException as e:
+        if not abandoned:
+            overloaded = isinstance(e, Exception) and is_overload_error(e)
+            concurrency.release(None, overloaded=overloaded)
+        raise
+    concurrency.release(time.monotonic() - start)
+
+    limiter.record_actual(estimated_tokens, actual_tokens(response))
+    return response
+
+
+def _settle_abandoned(model: str, estimated_tokens: int, start: float, thread_call: asyncio.Future) -> None:
+    """Release the slot of a blocking call whose caller was cancelled, once its thread finishes"""
+    concurrency = get_concurrency_limiter(model)
+    if thread_call.cancelled():
+        concurrency.release(None)
+        return
+    exc = thread_call.exception()
+    if exc is not None:
+        concurrency.release(None, overloaded=isinstance(exc, Exception) and is_overload_error(exc))
+        return
+    concurrency.release(time.monotonic() - start)
+    get_rate_limiter(model).record_actual(estimated_tokens, actual_tokens(thread_call.result()))
+
+
+def _retry_delay(model: str, breaker, attempt: int, exc: BaseException, started: float) -> Optional[float]:
+    """Seconds to wait before retrying, or None to give up and re-raise"""
+    if not is_retryable_error(exc):
+        return None
+    delay = backoff_delay(attempt, exc)
+    if attempt >= RETRY_MAX_ATTEMPTS or time.monotonic() - started + delay > RETRY_MAX_ELAPSED_SECONDS:
+        breaker.record_give_up()
+        print(f"❌ {model} call failed after {attempt} attempt(s): {exc}")
+        return None
+    breaker.record_retry()
+    print(f"🔁 {model} call failed ({exc.__class__.__name__}), retry {attempt}/{RETRY_MAX_ATTEMPTS - 1} in {delay:.1f}s")
+    return delay
+
+
+async def llm_call(model: str, call: Callable[[], Any], estimated_tokens: int, blocking: bool = False) -> Any:
+    """
+    Run one LLM call through the shared rate limit, adaptive concurrency and resilience layers.
+
+    Each attempt waits (without failing) until the model's RPM and TPM buckets
+    cover it and an in-flight slot is free; the outcome and latency feed the
+    AIMD controller and the bucket is settled with the provider-reported usage.
+    Overload errors (429/5xx/timeouts) are retried with jittered exponential
+    backoff honoring Retry-After, bounded by LLM_RETRY_MAX_ATTEMPTS and
+    LLM_RETRY_MAX_ELAPSED_SECONDS. While the provider's circuit breaker is
+    open the call fails fast.
+
+    Args:
+        model (str): Model name, used to pick the rate limiter
+        call (callable): Zero-argument callable; returns a coroutine, or the response itself if blocking
+        estimated_tokens (int): Up-front token estimate (see estimate_tokens)
+        blocking (bool): True for synchronous SDK calls, which are run on a dedicated thread pool
+            once admitted; if the caller is cancelled, the call keeps its slot until the thread returns
+
+    Returns:
+        The provider response
+
+    Raises:
+        CircuitOpenError: If the provider's circuit breaker is open
+    """
+    breaker = get_circuit_breaker(model)
+    started = time.monotonic()
+    attempt = 0
+    while True:
+        attempt += 1
+        breaker.before_call()
+        try:
+            response = await _attempt(model, call, estimated_tokens, blocking)
+        except BaseException as e:
+            breaker.record_failure(e)
+            delay = _retry_delay(model, breaker, attempt, e, started)
+            if delay is None:
+                raise
+            await asyncio.sleep(delay)
+            continue
+        breaker.record_success()
+        return response
+
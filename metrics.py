@@ -0,0 +1,53 @@
+import threading
+from collections import deque
+from typing import Dict, Optional
+
+
+class LatencyWindow:
+    """Rolling window of recent latency samples (seconds) with percentile summaries"""
+
+    def __init__(self, max_samples: int = 500):
+        self._samples = deque(maxlen=max_samples)
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total = 0.0
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+            self.count += 1
+            self.total += seconds
+
+    @staticmethod
+    def _pick(samples, p: float) -> Optional[float]:
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, max(0, int(round(p / 100 * (len(samples) - 1)))))]
+
+    def percentile(self, p: float) -> Optional[float]:
+        """Return the p-th percentile (0-100) of the window, or None if empty"""
+        with self._lock:
+            samples = sorted(self._samples)
+        return self._pick(samples, p)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def summary(self) -> Dict[str, Optional[float]]:
+        """Count, mean and p50/p95/p99/max over the window"""
+        with self._lock:
+            samples = sorted(self._samples)
+            count, total = self.count, self.total
+
+        def pick(p: float) -> Optional[float]:
+            value = self._pick(samples, p)
+            return round(value, 4) if value is not None else None
+
+        return {
+            "count": count,
+            "avg": round(total / count, 4) if count else None,
+            "p50": pick(50),
+            "p95": pick(95),
+            "p99": pick(99),
+            "max": round(samples[-1], 4) if samples else None,
+        }
@@ -1,15 +1,30 @@
 import os
 import asyncio
+import importlib
 import time
-from typing import List, Optional
+from typing import Dict, List, Optional
 from pydantic import BaseModel
-from openai import OpenAI
+from openai import AsyncOpenAI
 from dotenv import load_dotenv
 from langfuse import observe
+from company_cache import get_cached_company, cache_company, ENRICHMENT_FIELDS
+from company_names import canonical_company_key
+from singleflight import get_single_flight
+from company_microbatcher import CompanyMicroBatcher
+from adaptive_chunking import get_chunk_sizer
+from experience_calculator import calculate_stability
+from agent_dag import AgentDAG
+from llm_gateway import llm_call, estimate_tokens
+from resilience import CircuitOpenError, record_degraded
+from hedging import AgentDeadlineExceeded, run_agent
+from provider_racing import PROVIDER_RACING_ENABLED, race_providers
 
 load_dotenv()
 openai_api_key = os.getenv("OPENAI_API_KEY")
-client = OpenAI()
+# Async client so the agents below actually overlap under asyncio.gather
+# instead of blocking the event loop one request at a time
+client = AsyncOpenAI(max_retries=0)  # retries are handled by llm_gateway
+company_flight = get_single_flight("company_enrichment")
 
 # Phase 1 Models
 class PersonalInfo(BaseModel):
@@ -70,9 +85,6 @@ class EnrichedExperienceItem(BaseModel):
 class BatchCompanyEnrichmentResponse(BaseModel):
     enriched_companies: List[EnrichedExperienceItem]
 
-class StabilityResponse(BaseModel):
-    stability_analysis: StabilityAnalysis
-
 # Final Combined Model
 class CombinedResumeData(BaseModel):
     CandidateFullName: str
@@ -88,14 +100,14 @@ class CombinedResumeData(BaseModel):
     BusinessTypeMatch: str
     ComplexWorkExperience: bool
 
-# Phase 1 Agents (Same as before)
-@observe(name="personal_info_extractor")
-async def personal_info_extractor(resume_text: str) -> PersonalInfo:
-    """Extract personal information from resume"""
-    start_time = time.time()
-    print(f"⏱️  Personal Info Agent: Starting extraction...")
-    
-    prompt = """Extract personal information from the resume text with high precision.
+# Web search model used for company enrichment
+SEARCH_MODEL = "gpt-4o-mini-search-preview"
+chunk_sizer = get_chunk_sizer(SEARCH_MODEL)
+
+# Phase 1 agent prompts and model, shared with the offline batch mode (batch_matching.py)
+EXTRACTION_MODEL = "gpt-4.1-nano-2025-04-14"
+
+PERSONAL_INFO_PROMPT = """Extract personal information from the resume text with high precision.
 
 ## Required Fields:
 1. **CandidateFullName**: Extract the candidate's complete name (first, middle, last)
@@ -109,31 +121,8 @@ async def personal_info_extractor(resume_text: str) -> PersonalInfo:
 - For skills: prioritize programming languages, frameworks, and technical tools
 - For role suggestion: match skills with experience level and domain
 - Only extract personal contact information, ignore company/education details"""
-    
-    completion = client.beta.chat.completions.parse(
-        model="gpt-4.1-nano-2025-04-14",
-        messages=[
-            {"role": "system", "content": prompt},
-            {"role": "user", "content": resume_text}
-        ],
-        response_format=PersonalInfoResponse,
-    )
-    with open("resume_text.txt", "w") as f:
-        f.write(resume_text)
-    
-    end_time = time.time()
-    duration = round(end_time - start_time, 2)
-    print(f"✅ Personal Info Agent: Completed in {duration}s")
-    
-    return completion.choices[0].message.parsed.personal_info
 
-@observe(name="education_info_extractor")
-async def education_info_extractor(resume_text: str) -> List[EducationItem]:
-    """Extract education information from resume"""
-    start_time = time.time()
-    print(f"⏱️  Education Agent: Starting extraction...")
-    
-    prompt = """Extract educational background information from the resume.
+EDUCATION_PROMPT = """Extract educational background information from the resume.
 
 ## Required Fields:
 1. **CollegeUniversity**: Full name of educational institution
@@ -146,29 +135,8 @@ async def education_info_extractor(resume_text: str) -> List[EducationItem]:
 - Include both completed and in-progress education
 - If graduation year is not specified, use "N/A"
 - Ignore company training or work-related education"""
-    
-    completion = client.beta.chat.completions.parse(
-        model="gpt-4.1-nano-2025-04-14",
-        messages=[
-            {"role": "system", "content": prompt},
-            {"role": "user", "content": resume_text}
-        ],
-        response_format=EducationInfoResponse,
-    )
-    
-    end_time = time.time()
-    duration = round(end_time - start_time, 2)
-    print(f"✅ Education Agent: Completed in {duration}s")
-    
-    return completion.choices[0].message.parsed.education
 
-@observe(name="experience_info_extractor")
-async def experience_info_extractor(resume_text: str) -> List[BasicExperienceItem]:
-    """Extract basic experience information from resume"""
-    start_time = time.time()
-    print(f"⏱️  Experience Agent: Starting extraction...")
-    
-    prompt = """
+EXPERIENCE_PROMPT = """
     Extract ALL work experience and group by company. Miss nothing.
 
 ## Primary Goal:
@@ -195,92 +163,173 @@ async def experience_info_extractor(resume_text: str) -> List[BasicExperienceIte
 
 **Key**: If in doubt, include it. Complete capture is essential.
     """
-    completion = client.beta.chat.completions.parse(
-        model="gpt-4.1-nano-2025-04-14",
+
+# Phase 1 Agents (Same as before)
+@observe(name="personal_info_extractor")
+async def personal_info_extractor(resume_text: str) -> PersonalInfo:
+    """Extract personal information from resume"""
+    start_time = time.time()
+    print(f"⏱️  Personal Info Agent: Starting extraction...")
+    
+    completion = await run_agent("personal_info_extractor", lambda: llm_call(EXTRACTION_MODEL, lambda: client.beta.chat.completions.parse(
+        model=EXTRACTION_MODEL,
         messages=[
-            {"role": "system", "content": prompt},
+            {"role": "system", "content": PERSONAL_INFO_PROMPT},
             {"role": "user", "content": resume_text}
         ],
-        response_format=ExperienceInfoResponse,
-    )
+        response_format=PersonalInfoResponse,
+    ), estimate_tokens(PERSONAL_INFO_PROMPT, resume_text)))
+    with open("resume_text.txt", "w") as f:
+        f.write(resume_text)
     
     end_time = time.time()
     duration = round(end_time - start_time, 2)
-    print(f"✅ Experience Agent: Completed in {duration}s")
-    print(completion.choices[0].message.parsed.experience)
-    return completion.choices[0].message.parsed.experience
-
-# Phase 2 Agents
-@observe(name="stability_analyzer")
-async def stability_analyzer(experience_list: List[BasicExperienceItem]) -> StabilityAnalysis:
-    """Analyze stability and company matching from experience data"""
-    start_time = time.time()
-    print(f"⏱️  Stability Analyzer: Starting analysis...")
+    print(f"✅ Personal Info Agent: Completed in {duration}s")
     
-    prompt = """Analyze career stability and company experience patterns from the provided work history.
-
-## Data Structure:
-Each company has multiple positions with individual durations.
-
-## Analysis Requirements:
-
-### 1. StabilityAssessment (Array of strings)
-- Calculate total tenure per company by summing all position durations at that company
-- Format: "[CompanyName]: [X.XX] years"
-- Round to 2 decimal places
-- Combine all positions at same company for total tenure
-
-### 2. AverageStability (Float)
-- Calculate mean tenure across all companies (not positions)
-- Use total company tenure from StabilityAssessment
-- Exclude: internships, training programs, contract roles <6 months
-- Return as float rounded to 2 decimals
-
-### 3. Company Pattern Analysis
-- **CompanyTypeMatch**: Categorize as Product/Service/Banking based on business model
-- **BusinessTypeMatch**: Classify customer base as B2B/B2C/Banking
-
-### 4. ComplexWorkExperience (Boolean)
-- Return true if candidate has experience at companies with:
-  - Large-scale product development
-  - Advanced technology/engineering challenges
-  - Significant market presence or innovation
-
-## Company Classification Rules:
-**Service**: TCS, Infosys, Wipro, Accenture, Cognizant, IBM, consulting firms
-**Product**: Amazon, Google, Microsoft, Apple, Meta, Netflix, tech startups
-**Banking**: Banks, fintech, financial services
+    return completion.choices[0].message.parsed.personal_info
 
-## Calculation Method:
-- For each company, sum durations of all positions held there
-- Use exact dates provided to calculate tenure in years = (end_date - start_date) / 365.25
-- Handle overlapping positions appropriately"""
-    
-    experience_data = [exp.model_dump() for exp in experience_list]
-    experience_text = str(experience_data)
+@observe(name="education_info_extractor")
+async def education_info_extractor(resume_text: str) -> List[EducationItem]:
+    """Extract education information from resume"""
+    start_time = time.time()
+    print(f"⏱️  Education Agent: Starting extraction...")
     
-    completion = client.beta.chat.completions.parse(
-        model="gpt-4.1-nano-2025-04-14",
+    completion = await run_agent("education_info_extractor", lambda: llm_call(EXTRACTION_MODEL, lambda: client.beta.chat.completions.parse(
+        model=EXTRACTION_MODEL,
         messages=[
-            {"role": "system", "content": prompt},
-            {"role": "user", "content": f"Experience data: {experience_text}"}
+            {"role": "system", "content": EDUCATION_PROMPT},
+            {"role": "user", "content": resume_text}
         ],
-        response_format=StabilityResponse,
-    )
+        response_format=EducationInfoResponse,
+    ), estimate_tokens(EDUCATION_PROMPT, resume_text)))
     
     end_time = time.time()
     duration = round(end_time - start_time, 2)
-    print(f"✅ Stability Analyzer: Completed in {duration}s")
+    print(f"✅ Education Agent: Completed in {duration}s")
     
-    return completion.choices[0].message.parsed.stability_analysis
+    return completion.choices[0].message.parsed.education
 
-# NEW: Batch Company Enrichment Agent
-@observe(name="batch_company_enricher_openai")
-async def batch_company_enricher_openai(experience_list: List[BasicExperienceItem]) -> List[EnrichedExperienceItem]:
-    """Enrich ALL companies in a single batch request using OpenAI with web search"""
+@observe(name="experience_info_extractor")
+async def experience_info_extractor(resume_text: str) -> List[BasicExperienceItem]:
+    """Extract basic experience information from resume"""
     start_time = time.time()
-    print(f"⏱️  Batch Company Enricher (OpenAI): Starting enrichment for {len(experience_list)} companies...")
+    print(f"⏱️  Experience Agent: Starting extraction...")
+    
+    completion = await run_agent("experience_info_extractor", lambda: llm_call(EXTRACTION_MODEL, lambda: client.beta.chat.completions.parse(
+        model=EXTRACTION_MODEL,
+        messages=[
+            {"role": "system", "content": EXPERIENCE_PROMPT},
+            {"role": "user", "content": resume_text}
+        ],
+        response_format=ExperienceInfoResponse,
+    ), estimate_tokens(EXPERIENCE_PROMPT, resume_text)), hedge=True)
     
+    end_time = time.time()
+    duration = round(end_time - start_time, 2)
+    print(f"✅ Experience Agent: Completed in {duration}s")
+    print(completion.choices[0].message.parsed.experience)
+    return completion.choices[0].message.parsed.experience
+
+# Provider racing (PROVIDER_RACING_ENABLED): each extraction also goes to the
+# Gemini twin of the agent and the first schema-valid answer wins
+def gemini_agents():
+    """Gemini extractors, imported on first race so the module works without Gemini configured"""
+    return importlib.import_module("gemini_parallel_resume_agents")
+
+def group_gemini_experience(items) -> List[BasicExperienceItem]:
+    """Convert Gemini's one-item-per-position experience into one item per company with its Positions"""
+    grouped = {}
+    for item in items:
+        positions = grouped.setdefault(item.CompanyName.strip(), [])
+        positions.append(PositionItem(Position=item.Position, Duration=Duration(**item.Duration.model_dump())))
+    return [BasicExperienceItem(CompanyName=name, Positions=positions) for name, positions in grouped.items()]
+
+async def gemini_personal_info(resume_text: str):
+    return await gemini_agents().personal_info_extractor_gemini(resume_text)
+
+async def gemini_education(resume_text: str):
+    return await gemini_agents().education_info_extractor_gemini(resume_text)
+
+async def gemini_experience(resume_text: str) -> List[BasicExperienceItem]:
+    return group_gemini_experience(await gemini_agents().experience_info_extractor_gemini(resume_text))
+
+async def raced_personal_info(resume_text: str) -> PersonalInfo:
+    if not PROVIDER_RACING_ENABLED:
+        return await personal_info_extractor(resume_text)
+    return await race_providers("personal_info", {
+        "openai": lambda: personal_info_extractor(resume_text),
+        "gemini": lambda: gemini_personal_info(resume_text),
+    }, lambda result: PersonalInfo.model_validate(result.model_dump()))
+
+async def raced_education(resume_text: str) -> List[EducationItem]:
+    if not PROVIDER_RACING_ENABLED:
+        return await education_info_extractor(resume_text)
+    return await race_providers("education", {
+        "openai": lambda: education_info_extractor(resume_text),
+        "gemini": lambda: gemini_education(resume_text),
+    }, lambda result: [EducationItem.model_validate(item.model_dump()) for item in result])
+
+async def raced_experience(resume_text: str) -> List[BasicExperienceItem]:
+    if not PROVIDER_RACING_ENABLED:
+        return await experience_info_extractor(resume_text)
+    return await race_providers("experience", {
+        "openai": lambda: experience_info_extractor(resume_text),
+        "gemini": lambda: gemini_experience(resume_text),
+    }, lambda result: [BasicExperienceItem.model_validate(item.model_dump()) for item in result])
+
+# Phase 2 Agents
+def summarize_company_types(values: List[str], categories: List[str]) -> str:
+    """Combine per-company classifications into a match string like "Product/Service" """
+    found = set()
+    for value in values:
+        for part in (value or "").replace(",", "/").split("/"):
+            part = part.strip()
+            for category in categories:
+                if part.lower() == category.lower():
+                    found.add(category)
+    return "/".join(category for category in categories if category in found) or "Unknown"
+
+def stability_analyzer(experience_list: List[BasicExperienceItem], enriched_experience: List[EnrichedExperienceItem]) -> StabilityAnalysis:
+    """Analyze stability and company matching locally from experience and enrichment data"""
+    start_time = time.perf_counter()
+    
+    # Tenure per company and average stability (intern/trainee roles excluded, overlaps merged)
+    stability = calculate_stability([exp.model_dump() for exp in experience_list])
+    
+    # Company pattern analysis from the enriched classifications
+    company_types = [exp.CompanyType for exp in enriched_experience]
+    business_types = [exp.BusinessType for exp in enriched_experience]
+    
+    duration_ms = round((time.perf_counter() - start_time) * 1000, 3)
+    print(f"✅ Stability Analyzer (local): Completed in {duration_ms}ms")
+    
+    return StabilityAnalysis(
+        StabilityAssessment=stability["StabilityAssessment"],
+        AverageStability=stability["AverageStability"],
+        CompanyTypeMatch=summarize_company_types(company_types, ["Product", "Service", "Banking"]),
+        BusinessTypeMatch=summarize_company_types(business_types, ["B2B", "B2C", "Banking"]),
+        # Product companies own their products end to end; used as the complexity signal
+        ComplexWorkExperience=any(company_type == "Product" for company_type in company_types)
+    )
+
+def enriched_positions(exp: BasicExperienceItem) -> List[EnrichedPositionItem]:
+    """Copy the positions of an experience item into the enriched schema"""
+    return [EnrichedPositionItem(Position=pos.Position, Duration=pos.Duration) for pos in exp.Positions]
+
+def unknown_company(exp: BasicExperienceItem) -> EnrichedExperienceItem:
+    """Fallback enrichment used when a company could not be looked up"""
+    return EnrichedExperienceItem(
+        CompanyName=exp.CompanyName,
+        Positions=enriched_positions(exp),
+        CompanyType="Unknown",
+        BusinessType="Unknown",
+        Location="Unknown",
+        NumberOfEmployees=None,
+        Funding=None
+    )
+
+async def search_company_batch_openai(experience_list: List[BasicExperienceItem]) -> List[EnrichedExperienceItem]:
+    """Look up all given companies in a single web search request, in input order"""
     # Create company list for the prompt
     companies_list = []
     for i, exp in enumerate(experience_list, 1):
@@ -331,15 +380,18 @@ async def batch_company_enricher_openai(experience_list: List[BasicExperienceIte
 - Use web search for accurate, current information"""
     
     try:
-        completion = client.beta.chat.completions.parse(
-            model="gpt-4o-mini-search-preview",
+        search_start = time.monotonic()
+        # Hedged: a duplicate search fires if this one runs past the p95
+        completion = await run_agent("company_enrichment", lambda: llm_call(SEARCH_MODEL, lambda: client.beta.chat.completions.parse(
+            model=SEARCH_MODEL,
             messages=[
                 {"role": "system", "content": batch_prompt},
                 {"role": "user", "content": f"Please enrich all {len(experience_list)} companies listed above"}
             ],
             response_format=BatchCompanyEnrichmentResponse,
             web_search_options={},
-        )
+        ), estimate_tokens(batch_prompt, output_tokens=300 * len(experience_list))), hedge=True)
+        chunk_sizer.record(len(experience_list), time.monotonic() - search_start)
         
         enriched_response = completion.choices[0].message.parsed
         
@@ -354,227 +406,205 @@ async def batch_company_enricher_openai(experience_list: List[BasicExperienceIte
                 enriched_item = enriched_response.enriched_companies[i]
                 # Force preserve the original data that should not change
                 enriched_item.CompanyName = original_exp.CompanyName
-                # Convert positions to EnrichedPositionItem
-                enriched_positions = []
-                for pos in original_exp.Positions:
-                    enriched_positions.append(EnrichedPositionItem(
-                        Position=pos.Position,
-                        Duration=pos.Duration
-                    ))
-                enriched_item.Positions = enriched_positions
+                enriched_item.Positions = enriched_positions(original_exp)
+                cache_company(original_exp.CompanyName, enriched_item.model_dump(include=set(ENRICHMENT_FIELDS)))
                 final_enriched.append(enriched_item)
             else:
                 # Fallback if we didn't get enough companies
-                enriched_positions = []
-                for pos in original_exp.Positions:
-                    enriched_positions.append(EnrichedPositionItem(
-                        Position=pos.Position,
-                        Duration=pos.Duration
-                    ))
-                fallback_item = EnrichedExperienceItem(
-                    CompanyName=original_exp.CompanyName,
-                    Positions=enriched_positions,
-                    CompanyType="Unknown",
-                    BusinessType="Unknown",
-                    Location="Unknown",
-                    NumberOfEmployees=None,
-                    Funding=None
-                )
-                final_enriched.append(fallback_item)
-        
-        end_time = time.time()
-        duration = round(end_time - start_time, 2)
-        print(f"✅ Batch Company Enricher (OpenAI): Completed {len(final_enriched)} companies in {duration}s")
+                final_enriched.append(unknown_company(original_exp))
         
         return final_enriched
         
+    except CircuitOpenError as e:
+        print(f"⚠️  Skipping company enrichment: {e}")
+        record_degraded("company_enrichment")
+        return [unknown_company(exp) for exp in experience_list]
     except Exception as e:
         print(f"⚠️  Error in batch company enrichment: {e}")
+        record_degraded("company_enrichment")
         # Fallback: return basic structure for all companies
-        fallback_companies = []
-        for exp in experience_list:
-            enriched_positions = []
-            for pos in exp.Positions:
-                enriched_positions.append(EnrichedPositionItem(
-                    Position=pos.Position,
-                    Duration=pos.Duration
-                ))
-            fallback_item = EnrichedExperienceItem(
-                CompanyName=exp.CompanyName,
-                Positions=enriched_positions,
-                CompanyType="Unknown",
-                BusinessType="Unknown",
-                Location="Unknown",
-                NumberOfEmployees=None,
-                Funding=None
-            )
-            fallback_companies.append(fallback_item)
-        
-        end_time = time.time()
-        duration = round(end_time - start_time, 2)
-        print(f"⚠️  Batch Company Enricher (OpenAI): Fallback completed in {duration}s")
-        
-        return fallback_companies
+        return [unknown_company(exp) for exp in experience_list]
 
-# Orchestrator Functions
-async def run_phase_1_batch(resume_text: str) -> tuple[PersonalInfo, List[EducationItem], List[BasicExperienceItem]]:
-    """Run Phase 1 agents in parallel"""
-    phase_start_time = time.time()
-    print("🚀 Starting Phase 1 (Batch): Parallel extraction of personal info, education, and basic experience...")
-    print("⏱️  All Phase 1 agents starting simultaneously...")
-    
-    # Track individual completion times
-    completion_times = {}
-    
-    async def personal_info_with_timing():
-        start = time.time()
-        result = await personal_info_extractor(resume_text)
-        completion_times['Personal Info'] = round(time.time() - start, 2)
-        return result
-    
-    async def education_with_timing():
-        start = time.time()
-        result = await education_info_extractor(resume_text)
-        completion_times['Education'] = round(time.time() - start, 2)
-        return result
-    
-    async def experience_with_timing():
-        start = time.time()
-        result = await experience_info_extractor(resume_text)
-        completion_times['Experience'] = round(time.time() - start, 2)
-        return result
-    
-    tasks = [
-        personal_info_with_timing(),
-        education_with_timing(),
-        experience_with_timing()
-    ]
-    
-    personal_info, education, experience = await asyncio.gather(*tasks)
-    
-    phase_end_time = time.time()
-    phase_duration = round(phase_end_time - phase_start_time, 2)
-    
-    # Find the bottleneck
-    bottleneck_agent = max(completion_times, key=completion_times.get)
-    bottleneck_time = completion_times[bottleneck_agent]
-    
-    print(f"✅ Phase 1 (Batch) completed in {phase_duration}s (parallel execution)")
-    print(f"📊 Phase 1 Agent Times: {completion_times}")
-    print(f"🐌 Bottleneck: {bottleneck_agent} ({bottleneck_time}s)")
-    
-    # Check if parallel execution is working correctly
-    if abs(phase_duration - bottleneck_time) > 0.5:  # Allow 0.5s tolerance
-        print(f"⚠️  WARNING: Parallel execution may not be optimal. Expected ~{bottleneck_time}s, got {phase_duration}s")
-        print(f"   This could indicate sequential execution or API rate limiting.")
-    else:
-        print(f"✅ Parallel execution confirmed: Total time ({phase_duration}s) ≈ Bottleneck time ({bottleneck_time}s)")
-    
-    return personal_info, education, experience
+# Searches from concurrent uploads share batch calls (see company_microbatcher)
+company_batcher = CompanyMicroBatcher("company_enrichment", search_company_batch_openai, flush_size=chunk_sizer.latency_chunk_size)
 
-@observe(name="run_phase_2_batch")
-async def run_phase_2_batch(experience_list: List[BasicExperienceItem]) -> tuple[StabilityAnalysis, List[EnrichedExperienceItem]]:
-    """Run Phase 2 agents in parallel - WITH ADAPTIVE COMPANY ENRICHMENT (Batch ≤3, Chunked >3)"""
-    phase_start_time = time.time()
-    print(f"🚀 Starting Phase 2: Parallel stability analysis and {'CHUNKED' if len(experience_list) > 3 else 'BATCH'} company enrichment...")
-    print("⏱️  All Phase 2 agents starting simultaneously...")
-    
-    # Track individual completion times
-    completion_times = {}
-    
-    async def stability_with_timing():
-        start = time.time()
-        result = await stability_analyzer(experience_list)
-        completion_times['Stability Analyzer'] = round(time.time() - start, 2)
-        return result
+async def search_companies_coalesced(companies_to_search: Dict[str, BasicExperienceItem], send_now: bool = False) -> Dict[str, dict]:
+    """
+    Search companies not yet known, joining lookups other uploads already have in flight.
+
+    Companies nobody else is searching are sent through the micro-batcher (this
+    caller leads them), sharing a batch request with other uploads' misses; the
+    rest await the other caller's result instead of being searched twice. If this
+    upload's enrichment deadline passes first, its companies come back Unknown and
+    uploads waiting on its lookups search them under their own deadlines.
+
+    Args:
+        companies_to_search (dict): Canonical company key -> experience item to search
+        send_now (bool): Send this upload's searches at once instead of waiting for the batching window
+
+    Returns:
+        dict: Canonical company key -> enrichment fields
+    """
+    leaders = {}
+    followers = {}
+    for company_key, exp in companies_to_search.items():
+        future, is_leader = company_flight.claim(company_key)
+        (leaders if is_leader else followers)[company_key] = future
+    
+    if followers:
+        print(f"🔗 Company enrichment: {len(followers)} lookup(s) already in flight, joining them")
+    
+    def unknown_fields(company_key: str) -> dict:
+        return unknown_company(companies_to_search[company_key]).model_dump(include=set(ENRICHMENT_FIELDS))
+    
+    async def search_one(exp: BasicExperienceItem) -> dict:
+        enriched = await company_batcher.search([exp])
+        return enriched[0].model_dump(include=set(ENRICHMENT_FIELDS))
+    
+    async def lead() -> Dict[str, dict]:
+        if not leaders:
+            return {}
+        try:
+            # A planned chunk goes out as one batch, never re-split by the micro-batcher
+            searched = await company_batcher.search([companies_to_search[key] for key in leaders], whole=True, immediate=send_now)
+        except AgentDeadlineExceeded as e:
+            print(f"⚠️  Skipping company enrichment: {e}")
+            record_degraded("company_enrichment")
+            # Hand the lookups back: uploads waiting on them retry under their own deadline
+            for company_key, future in leaders.items():
+                company_flight.reject(company_key, future, asyncio.CancelledError())
+            return {company_key: unknown_fields(company_key) for company_key in leaders}
+        except BaseException as e:
+            for company_key, future in leaders.items():
+                company_flight.reject(company_key, future, e)
+            raise
+        results = {}
+        for company_key, enriched in zip(leaders, searched):
+            results[company_key] = enriched.model_dump(include=set(ENRICHMENT_FIELDS))
+            company_flight.resolve(company_key, leaders[company_key], results[company_key])
+        return results
+    
+    async def follow(company_key: str) -> dict:
+        exp = companies_to_search[company_key]
+        try:
+            return await company_flight.wait(company_key, followers[company_key], lambda: search_one(exp))
+        except AgentDeadlineExceeded as e:
+            print(f"⚠️  Skipping company enrichment: {e}")
+            record_degraded("company_enrichment")
+            return unknown_fields(company_key)
+    
+    follower_keys = list(followers)
+    results, *joined = await asyncio.gather(lead(), *(follow(key) for key in follower_keys))
+    results.update(zip(follower_keys, joined))
+    return results
+
+# NEW: Batch Company Enrichment Agent
+@observe(name="batch_company_enricher_openai")
+async def batch_company_enricher_openai(experience_list: List[BasicExperienceItem], send_now: bool = False) -> List[EnrichedExperienceItem]:
+    """Enrich ALL companies in a single batch request using OpenAI with web search, serving known companies from cache"""
+    start_time = time.time()
+    print(f"⏱️  Batch Company Enricher (OpenAI): Starting enrichment for {len(experience_list)} companies...")
     
-    async def batch_company_enrichment_with_timing():
-        start = time.time()
-        
-        if len(experience_list) <= 3:
-            # Single batch approach for 3 or fewer companies
-            print(f"📦 Processing {len(experience_list)} companies in single batch")
-            result = await batch_company_enricher_openai(experience_list)
-            # Use total time for single batch
-            completion_times['Batch Company Enricher'] = round(time.time() - start, 2)
+    # Serve companies from the enrichment cache and search each remaining employer
+    # once, however many aliases of it ("TCS", "Tata Consultancy Services") appear
+    known_companies = {}
+    companies_to_search = {}
+    for exp in experience_list:
+        company_key = canonical_company_key(exp.CompanyName)
+        if company_key in known_companies or company_key in companies_to_search:
+            continue
+        cached = get_cached_company(exp.CompanyName)
+        if cached is not None:
+            known_companies[company_key] = cached
         else:
-            # Chunked parallel approach for more than 3 companies
-            print(f"📦 Processing {len(experience_list)} companies in chunked parallel mode (3 per chunk)")
-            
-            # Split into chunks of 3
-            chunks = []
-            for i in range(0, len(experience_list), 3):
-                chunk = experience_list[i:i+3]
-                chunks.append(chunk)
-            
-            print(f"🔄 Created {len(chunks)} chunks: {[len(chunk) for chunk in chunks]}")
-            
-            # Process chunks in parallel
-            chunk_tasks = []
-            for i, chunk in enumerate(chunks):
-                print(f"⏳ Chunk {i+1}: Processing {len(chunk)} companies")
-                chunk_tasks.append(batch_company_enricher_openai(chunk))
-            
-            # Wait for all chunks to complete and track actual parallel time
-            chunk_start_time = time.time()
-            chunk_results = await asyncio.gather(*chunk_tasks)
-            chunk_end_time = time.time()
-            
-            parallel_duration = round(chunk_end_time - chunk_start_time, 2)
-            
-            # Combine results from all chunks
-            result = []
-            for chunk_result in chunk_results:
-                result.extend(chunk_result)
-            
-            print(f"✅ Combined results: {len(result)} companies total")
-            print(f"⚡ Actual parallel execution time: {parallel_duration}s")
-            
-            # Use actual parallel time for bottleneck analysis in chunked mode
-            completion_times['Batch Company Enricher'] = parallel_duration
-            print(f"📊 Timing: Using parallel time ({parallel_duration}s) for bottleneck analysis")
-        
-        return result
-    
-    tasks = [
-        stability_with_timing(),
-        batch_company_enrichment_with_timing()
-    ]
+            companies_to_search[company_key] = exp
     
-    stability_analysis, enriched_experience = await asyncio.gather(*tasks)
+    if known_companies:
+        print(f"💾 Company cache: {len(known_companies)} hit(s), {len(companies_to_search)} to search")
     
-    phase_end_time = time.time()
-    phase_duration = round(phase_end_time - phase_start_time, 2)
+    if companies_to_search:
+        known_companies.update(await search_companies_coalesced(companies_to_search, send_now=send_now))
     
-    # Find the bottleneck
-    bottleneck_agent = max(completion_times, key=completion_times.get)
-    bottleneck_time = completion_times[bottleneck_agent]
+    # Reassemble in the original order, each item keeping its own name and positions
+    final_enriched = [
+        EnrichedExperienceItem(
+            CompanyName=exp.CompanyName,
+            Positions=enriched_positions(exp),
+            **known_companies[canonical_company_key(exp.CompanyName)]
+        )
+        for exp in experience_list
+    ]
     
-    enrichment_mode = 'Chunked' if len(experience_list) > 3 else 'Batch'
-    print(f"✅ Phase 2 ({enrichment_mode}) completed in {phase_duration}s (parallel execution)")
-    print(f"📊 Phase 2 Agent Times: {completion_times}")
-    print(f"🐌 Bottleneck: {bottleneck_agent} ({bottleneck_time}s)")
+    end_time = time.time()
+    duration = round(end_time - start_time, 2)
+    print(f"✅ Batch Company Enricher (OpenAI): Completed {len(final_enriched)} companies in {duration}s")
+    
+    return final_enriched
+
+async def enrich_companies_adaptive(experience_list: List[BasicExperienceItem]) -> List[EnrichedExperienceItem]:
+    """Enrich each distinct company once, in parallel chunks sized from observed search latency and rate-limit headroom"""
+    # Repeat stints at one employer ("TCS", later "Tata Consultancy Services") are searched once
+    unique_companies = {}
+    for exp in experience_list:
+        unique_companies.setdefault(canonical_company_key(exp.CompanyName), exp)
+    duplicates = len(experience_list) - len(unique_companies)
+    
+    # Each planned chunk reaches the search as one batch (the micro-batcher never re-splits it)
+    chunks = chunk_sizer.plan(list(unique_companies.values()), duplicates=duplicates)
+    
+    print(f"📦 Processing {len(unique_companies)} companies ({duplicates} duplicate(s) collapsed) in {len(chunks)} chunk(s): {[len(chunk) for chunk in chunks]}")
+    
+    # Process chunks in parallel
+    chunk_start_time = time.time()
+    # A single chunk may wait briefly for other uploads' misses; several chunks already fill their batches
+    send_now = len(chunks) > 1
+    chunk_results = await asyncio.gather(*(batch_company_enricher_openai(chunk, send_now=send_now) for chunk in chunks))
+    parallel_duration = round(time.time() - chunk_start_time, 2)
+    
+    known_companies = {}
+    for chunk_result in chunk_results:
+        for enriched in chunk_result:
+            known_companies[canonical_company_key(enriched.CompanyName)] = enriched.model_dump(include=set(ENRICHMENT_FIELDS))
+    
+    # Reassemble in the original order, each item keeping its own name and positions
+    result = [
+        EnrichedExperienceItem(
+            CompanyName=exp.CompanyName,
+            Positions=enriched_positions(exp),
+            **known_companies[canonical_company_key(exp.CompanyName)]
+        )
+        for exp in experience_list
+    ]
     
-    # Check if parallel execution is working correctly
-    if abs(phase_duration - bottleneck_time) > 0.5:  # Allow 0.5s tolerance
-        print(f"⚠️  WARNING: Parallel execution may not be optimal. Expected ~{bottleneck_time}s, got {phase_duration}s")
-        print(f"   This could indicate sequential execution or API rate limiting.")
-    else:
-        print(f"✅ Parallel execution confirmed: Total time ({phase_duration}s) ≈ Bottleneck time ({bottleneck_time}s)")
+    print(f"✅ Combined results: {len(result)} companies total")
+    print(f"⚡ Actual parallel execution time: {parallel_duration}s")
     
-    return stability_analysis, enriched_experience
+    return result
+
+# Agent dataflow for analyze_resume_batch
+resume_analysis_dag = (
+    AgentDAG("openai_batch")
+    .add("personal_info", raced_personal_info, deps=["resume_text"])
+    .add("education", raced_education, deps=["resume_text"])
+    .add("experience", raced_experience, deps=["resume_text"])
+    .add("enrichment", enrich_companies_adaptive, deps=["experience"])
+    .add("stability", stability_analyzer, deps=["experience", "enrichment"])
+)
 
 @observe(name="analyze_resume_batch")
 async def analyze_resume_batch(resume_text: str) -> tuple[str, int]:
-    """Main orchestrator function for ADAPTIVE parallel resume analysis using OpenAI (Batch ≤3, Chunked >3)"""
+    """Main orchestrator function for ADAPTIVE parallel resume analysis using OpenAI (latency-sized enrichment chunks)"""
     total_start_time = time.time()
     print("🎯 Starting ADAPTIVE parallel resume analysis with OpenAI...")
     
-    # Phase 1: Extract basic information in parallel
-    personal_info, education, basic_experience = await run_phase_1_batch(resume_text)
-    
-    # Phase 2: Analyze and enrich in parallel (WITH ADAPTIVE COMPANY ENRICHMENT)
-    stability_analysis, enriched_experience = await run_phase_2_batch(basic_experience)
+    # Each agent starts as soon as its inputs are ready: enrichment begins when the
+    # experience extractor finishes, without waiting for personal info/education
+    run = await resume_analysis_dag.run(resume_text=resume_text)
+    run.report()
+    personal_info = run["personal_info"]
+    education = run["education"]
+    enriched_experience = run["enrichment"]
+    stability_analysis = run["stability"]
     
     # Combine all results
     combined_result = CombinedResumeData(
@@ -604,7 +634,7 @@ async def analyze_resume_batch(resume_text: str) -> tuple[str, int]:
 
 # Convenience function for backward compatibility
 async def analyze_resume(input_question: str) -> tuple[str, int]:
-    """Backward compatible function that uses the new ADAPTIVE parallel approach (Batch ≤3, Chunked >3)"""
+    """Backward compatible function that uses the new ADAPTIVE parallel approach (latency-sized enrichment chunks)"""
     return await analyze_resume_batch(input_question)
 
 # Test function to verify parallel execution
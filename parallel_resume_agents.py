@@ -6,11 +6,22 @@ from pydantic import BaseModel
 from openai import OpenAI
 from dotenv import load_dotenv
 from langfuse import observe
+from company_cache import get_cached_company, cache_company, ENRICHMENT_FIELDS
+from company_names import canonical_company_key
+from singleflight import get_single_flight
+from agent_dag import AgentDAG
+from llm_gateway import llm_call, estimate_tokens
+from hedging import AgentDeadlineExceeded, run_agent
+from resilience import record_degraded
 
 
 load_dotenv()
 openai_api_key = os.getenv("OPENAI_API_KEY")
-client = OpenAI()
+client = OpenAI(max_retries=0)  # retries are handled by llm_gateway
+company_flight = get_single_flight("company_enrichment:parallel")
+
+EXTRACTION_MODEL = "gpt-4.1-nano-2025-04-14"
+SEARCH_MODEL = "gpt-4o-mini-search-preview"
 
 # Phase 1 Models
 class PersonalInfo(BaseModel):
@@ -99,14 +110,14 @@ async def personal_info_extractor(resume_text: str) -> PersonalInfo:
     Focus ONLY on personal details. Do not extract company or education information.
     """
     
-    completion = client.beta.chat.completions.parse(
-        model="gpt-4.1-nano-2025-04-14",
+    completion = await llm_call(EXTRACTION_MODEL, lambda: client.beta.chat.completions.parse(
+        model=EXTRACTION_MODEL,
         messages=[
             {"role": "system", "content": prompt},
             {"role": "user", "content": resume_text}
         ],
         response_format=PersonalInfoResponse,
-    )
+    ), estimate_tokens(prompt, resume_text), blocking=True)
     
     end_time = time.time()
     duration = round(end_time - start_time, 2)
@@ -128,14 +139,14 @@ async def education_info_extractor(resume_text: str) -> List[EducationItem]:
     Focus ONLY on educational background. Do not extract personal or company information.
     """
     
-    completion = client.beta.chat.completions.parse(
-        model="gpt-4.1-nano-2025-04-14",
+    completion = await llm_call(EXTRACTION_MODEL, lambda: client.beta.chat.completions.parse(
+        model=EXTRACTION_MODEL,
         messages=[
             {"role": "system", "content": prompt},
             {"role": "user", "content": resume_text}
         ],
         response_format=EducationInfoResponse,
-    )
+    ), estimate_tokens(prompt, resume_text), blocking=True)
     
     end_time = time.time()
     duration = round(end_time - start_time, 2)
@@ -158,14 +169,14 @@ async def experience_info_extractor(resume_text: str) -> List[BasicExperienceIte
     Extract dates EXACTLY as they appear in the resume without reformatting.
     """
     
-    completion = client.beta.chat.completions.parse(
-        model="gpt-4.1-nano-2025-04-14",
+    completion = await run_agent("experience_info_extractor:parallel", lambda: llm_call(EXTRACTION_MODEL, lambda: client.beta.chat.completions.parse(
+        model=EXTRACTION_MODEL,
         messages=[
             {"role": "system", "content": prompt},
             {"role": "user", "content": resume_text}
         ],
         response_format=ExperienceInfoResponse,
-    )
+    ), estimate_tokens(prompt, resume_text), blocking=True), hedge=True)
     
     end_time = time.time()
     duration = round(end_time - start_time, 2)
@@ -211,14 +222,14 @@ async def stability_analyzer(experience_list: List[BasicExperienceItem]) -> Stab
     experience_data = [exp.model_dump() for exp in experience_list]
     experience_text = str(experience_data)
     
-    completion = client.beta.chat.completions.parse(
-        model="gpt-4.1-nano-2025-04-14",
+    completion = await llm_call(EXTRACTION_MODEL, lambda: client.beta.chat.completions.parse(
+        model=EXTRACTION_MODEL,
         messages=[
             {"role": "system", "content": prompt},
             {"role": "user", "content": f"Experience data: {experience_text}"}
         ],
         response_format=StabilityResponse,
-    )
+    ), estimate_tokens(prompt, experience_text), blocking=True)
     
     end_time = time.time()
     duration = round(end_time - start_time, 2)
@@ -226,11 +237,8 @@ async def stability_analyzer(experience_list: List[BasicExperienceItem]) -> Stab
     
     return completion.choices[0].message.parsed.stability_analysis
 
-async def enrich_single_company(exp: BasicExperienceItem) -> EnrichedExperienceItem:
-    """Enrich a single company's details with web search"""
-    company_start_time = time.time()
-    print(f"🔍 Enriching {exp.CompanyName}...")
-    
+async def search_company_details(exp: BasicExperienceItem) -> Optional[dict]:
+    """Look up one company with web search, returning its enrichment fields or None"""
     prompt = """You are a company details enrichment specialist. For the given company experience, provide:
     
     1. CompanyType: Product/Service/Banking (infer from company name)
@@ -254,28 +262,59 @@ async def enrich_single_company(exp: BasicExperienceItem) -> EnrichedExperienceI
     
     exp_text = f"Company: {exp.CompanyName}, Position: {exp.Position}"
     
-    completion = client.beta.chat.completions.parse(
-        model= "gpt-4o-mini-search-preview",
-        messages=[
-            {"role": "system", "content": prompt},
-            {"role": "user", "content": exp_text}
-        ],
-        response_format=CompanyDetailsResponse,
-        web_search_options={},
-    )
+    try:
+        completion = await run_agent("company_enrichment:parallel", lambda: llm_call(SEARCH_MODEL, lambda: client.beta.chat.completions.parse(
+            model=SEARCH_MODEL,
+            messages=[
+                {"role": "system", "content": prompt},
+                {"role": "user", "content": exp_text}
+            ],
+            response_format=CompanyDetailsResponse,
+            web_search_options={},
+        ), estimate_tokens(prompt, exp_text, output_tokens=300), blocking=True), hedge=True)
+    except AgentDeadlineExceeded as e:
+        print(f"⚠️  {e}, returning {exp.CompanyName} unenriched")
+        record_degraded("company_enrichment")
+        return None
+    
+    if not completion.choices[0].message.parsed.enriched_experience:
+        return None
+    company_info = completion.choices[0].message.parsed.enriched_experience[0].model_dump(include=set(ENRICHMENT_FIELDS))
+    cache_company(exp.CompanyName, company_info)
+    return company_info
+
+async def enrich_single_company(exp: BasicExperienceItem) -> EnrichedExperienceItem:
+    """Enrich a single company's details with web search"""
+    company_start_time = time.time()
+    
+    # Known companies are served from the enrichment cache without a search call
+    cached = get_cached_company(exp.CompanyName)
+    if cached is not None:
+        print(f"💾 {exp.CompanyName} served from company cache")
+        return EnrichedExperienceItem(
+            CompanyName=exp.CompanyName,
+            Position=exp.Position,
+            Duration=exp.Duration,
+            **cached
+        )
+    
+    print(f"🔍 Enriching {exp.CompanyName}...")
+    
+    # Concurrent uploads (and repeat stints in this one) share one search per company
+    company_info = await company_flight.do(canonical_company_key(exp.CompanyName), lambda: search_company_details(exp))
     
     # Create enriched item with basic details
-    if completion.choices[0].message.parsed.enriched_experience:
-        enriched_item = completion.choices[0].message.parsed.enriched_experience[0]
-        enriched_item.CompanyName = exp.CompanyName
-        enriched_item.Position = exp.Position
-        enriched_item.Duration = exp.Duration
-        
+    if company_info is not None:
         company_end_time = time.time()
         company_duration = round(company_end_time - company_start_time, 2)
         print(f"✅ {exp.CompanyName} enriched in {company_duration}s")
         
-        return enriched_item
+        return EnrichedExperienceItem(
+            CompanyName=exp.CompanyName,
+            Position=exp.Position,
+            Duration=exp.Duration,
+            **company_info
+        )
     else:
         # Fallback if no response
         return EnrichedExperienceItem(
@@ -305,96 +344,15 @@ async def company_details_enricher(experience_list: List[BasicExperienceItem]) -
     
     return enriched_experience
 
-# Orchestrator Functions
-async def run_phase_1(resume_text: str) -> tuple[PersonalInfo, List[EducationItem], List[BasicExperienceItem]]:
-    """Run Phase 1 agents in parallel"""
-    phase_start_time = time.time()
-    print("🚀 Starting Phase 1: Parallel extraction of personal info, education, and basic experience...")
-    print("⏱️  All Phase 1 agents starting simultaneously...")
-    
-    # Track individual completion times
-    completion_times = {}
-    
-    async def personal_info_with_timing():
-        start = time.time()
-        result = await personal_info_extractor(resume_text)
-        completion_times['Personal Info'] = round(time.time() - start, 2)
-        return result
-    
-    async def education_with_timing():
-        start = time.time()
-        result = await education_info_extractor(resume_text)
-        completion_times['Education'] = round(time.time() - start, 2)
-        return result
-    
-    async def experience_with_timing():
-        start = time.time()
-        result = await experience_info_extractor(resume_text)
-        completion_times['Experience'] = round(time.time() - start, 2)
-        return result
-    
-    tasks = [
-        personal_info_with_timing(),
-        education_with_timing(),
-        experience_with_timing()
-    ]
-    
-    personal_info, education, experience = await asyncio.gather(*tasks)
-    
-    phase_end_time = time.time()
-    phase_duration = round(phase_end_time - phase_start_time, 2)
-    
-    # Find the bottleneck
-    bottleneck_agent = max(completion_times, key=completion_times.get)
-    bottleneck_time = completion_times[bottleneck_agent]
-    
-    print(f"✅ Phase 1 completed in {phase_duration}s (parallel execution)")
-    print(f"📊 Phase 1 Agent Times: {completion_times}")
-    print(f"🐌 Bottleneck: {bottleneck_agent} ({bottleneck_time}s)")
-    
-    return personal_info, education, experience
-
-@observe(name="run_phase_2")
-async def run_phase_2(experience_list: List[BasicExperienceItem]) -> tuple[StabilityAnalysis, List[EnrichedExperienceItem]]:
-    """Run Phase 2 agents in parallel"""
-    phase_start_time = time.time()
-    print("🚀 Starting Phase 2: Parallel stability analysis and company details enrichment...")
-    print("⏱️  All Phase 2 agents starting simultaneously...")
-    
-    # Track individual completion times
-    completion_times = {}
-    
-    async def stability_with_timing():
-        start = time.time()
-        result = await stability_analyzer(experience_list)
-        completion_times['Stability Analyzer'] = round(time.time() - start, 2)
-        return result
-    
-    async def company_details_with_timing():
-        start = time.time()
-        result = await company_details_enricher(experience_list)
-        completion_times['Company Details Enricher'] = round(time.time() - start, 2)
-        return result
-    
-    tasks = [
-        stability_with_timing(),
-        company_details_with_timing()
-    ]
-    
-    stability_analysis, enriched_experience = await asyncio.gather(*tasks)
-    
-    phase_end_time = time.time()
-    phase_duration = round(phase_end_time - phase_start_time, 2)
-    
-    # Find the bottleneck
-    bottleneck_agent = max(completion_times, key=completion_times.get)
-    bottleneck_time = completion_times[bottleneck_agent]
-    
-    print(f"✅ Phase 2 completed in {phase_duration}s (parallel execution)")
-    print(f"📊 Phase 2 Agent Times: {completion_times}")
-    print(f"🐌 Bottleneck: {bottleneck_agent} ({bottleneck_time}s)")
-    
-    return stability_analysis, enriched_experience
+# Agent dataflow for analyze_resume_parallel
+resume_analysis_dag = (
+    AgentDAG("parallel")
+    .add("personal_info", personal_info_extractor, deps=["resume_text"])
+    .add("education", education_info_extractor, deps=["resume_text"])
+    .add("experience", experience_info_extractor, deps=["resume_text"])
+    .add("stability", stability_analyzer, deps=["experience"])
+    .add("enrichment", company_details_enricher, deps=["experience"])
+)
 
 @observe(name="analyze_resume_parallel")
 async def analyze_resume_parallel(resume_text: str) -> tuple[str, int]:
@@ -402,11 +360,14 @@ async def analyze_resume_parallel(resume_text: str) -> tuple[str, int]:
     total_start_time = time.time()
     print("🎯 Starting parallel resume analysis...")
     
-    # Phase 1: Extract basic information in parallel
-    personal_info, education, basic_experience = await run_phase_1(resume_text)
-    
-    # Phase 2: Analyze and enrich in parallel
-    stability_analysis, enriched_experience = await run_phase_2(basic_experience)
+    # Each agent starts as soon as its inputs are ready: stability and enrichment
+    # begin when the experience extractor finishes, without waiting for the others
+    run = await resume_analysis_dag.run(resume_text=resume_text)
+    run.report()
+    personal_info = run["personal_info"]
+    education = run["education"]
+    stability_analysis = run["stability"]
+    enriched_experience = run["enrichment"]
     
     # Combine all results
     combined_result = CombinedResumeData(
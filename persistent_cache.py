@@ -0,0 +1,156 @@
+import os
+import json
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+
+class PersistentCache:
+    """
+    Size-bounded key/value cache persisted in SQLite.
+
+    Entries carry their own expiry time and are evicted least-recently-used
+    first once the cache holds more than max_entries. Values are stored as
+    JSON, so anything json.dumps can serialize can be cached.
+    """
+
+    def __init__(self, name: str, path: str, max_entries: int = 10000, default_ttl_seconds: Optional[float] = None):
+        """
+        Args:
+            name (str): Cache name, used as the SQLite table name and in metrics
+            path (str): SQLite database file (directories are created as needed)
+            max_entries (int): Maximum number of entries before LRU eviction
+            default_ttl_seconds (float, optional): TTL applied when set() gets none (None = never expires)
+        """
+        self.name = name
+        self.path = path
+        self.max_entries = max_entries
+        self.default_ttl_seconds = default_ttl_seconds
+        self._table = "cache_" + "".join(c if c.isalnum() else "_" for c in name)
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "expired": 0, "writes": 0, "evictions": 0}
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {self._table} ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute(f"CREATE INDEX IF NOT EXISTS {self._table}_lru ON {self._table} (last_access)")
+        self._size = self._conn.execute(f"SELECT COUNT(*) FROM {self._table}").fetchone()[0]
+
+    def get(self, key: str, validate: Optional[Callable[[Any], bool]] = None) -> Optional[Any]:
+        """
+        Return the cached value for key, or None on a miss.
+
+        Args:
+            key (str): Cache key
+            validate (callable, optional): Extra freshness/completeness check; a value
+                it rejects is reported as a miss but left in place
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT value, expires_at FROM {self._table} WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self._stats["misses"] += 1
+                return None
+
+            value_json, expires_at = row
+            if expires_at is not None and expires_at <= now:
+                self._conn.execute(f"DELETE FROM {self._table} WHERE key = ?", (key,))
+                self._size -= 1
+                self._stats["expired"] += 1
+                self._stats["misses"] += 1
+                return None
+
+            value = json.loads(value_json)
+            if validate is not None and not validate(value):
+                self._stats["misses"] += 1
+                return None
+
+            self._conn.execute(f"UPDATE {self._table} SET last_access = ? WHERE key = ?", (now, key))
+            self._stats["hits"] += 1
+            return value
+
+    def peek(self, key: str) -> Optional[Any]:
+        """Return the stored (unexpired) value without touching stats or LRU order."""
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT value, expires_at FROM {self._table} WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None or (row[1] is not None and row[1] <= time.time()):
+            return None
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        """Store value under key, evicting least-recently-used entries if over capacity."""
+        now = time.time()
+        ttl = ttl_seconds if ttl_seconds is not None else self.default_ttl_seconds
+        expires_at = now + ttl if ttl is not None else None
+        value_json = json.dumps(value)
+
+        with self._lock:
+            exists = self._conn.execute(
+                f"SELECT 1 FROM {self._table} WHERE key = ?", (key,)
+            ).fetchone() is not None
+            self._conn.execute(
+                f"INSERT INTO {self._table} (key, value, expires_at, last_access) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value, "
+                "expires_at = excluded.expires_at, last_access = excluded.last_access",
+                (key, value_json, expires_at, now),
+            )
+            if not exists:
+                self._size += 1
+            self._stats["writes"] += 1
+
+            overflow = self._size - self.max_entries
+            if overflow > 0:
+                # Drop expired entries first, then the least recently used ones
+                expired = self._conn.execute(
+                    f"DELETE FROM {self._table} WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,)
+                ).rowcount
+                self._size -= expired
+                self._stats["expired"] += expired
+                overflow = self._size - self.max_entries
+                if overflow > 0:
+                    self._conn.execute(
+                        f"DELETE FROM {self._table} WHERE key IN "
+                        f"(SELECT key FROM {self._table} ORDER BY last_access ASC LIMIT ?)",
+                        (overflow,),
+                    )
+                    self._size -= overflow
+                    self._stats["evictions"] += overflow
+
+    def delete(self, key: str) -> None:
+        """Remove key from the cache if present."""
+        with self._lock:
+            removed = self._conn.execute(f"DELETE FROM {self._table} WHERE key = ?", (key,)).rowcount
+            self._size -= removed
+
+    def clear(self) -> None:
+        """Remove every entry from the cache."""
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self._table}")
+            self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit-rate, size and eviction metrics."""
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["lookups"] = lookups
+        stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+        stats["size"] = self._size
+        stats["max_entries"] = self.max_entries
+        return stats
@@ -0,0 +1,155 @@
+import os
+import asyncio
+import importlib
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+from cost_calculator import calculations_cost
+from metrics import LatencyWindow
+
+load_dotenv()
+
+# Backend name -> module exposing `async analyze_resume(text) -> (json_str, total_tokens)`
+PIPELINE_BACKENDS = {
+    "openai_batch": "openai_batch_resume_agents",   # chunked batch enrichment (default)
+    "parallel": "parallel_resume_agents",           # per-company parallel enrichment
+    "gemini": "gemini_parallel_resume_agents",      # Gemini agents
+    "monolithic": "resume_agent",                   # one gpt-4o call plus one batch search
+}
+
+# Pseudo-backend: pick one per upload with pipeline_router.route_resume
+AUTO_BACKEND = "auto"
+
+DEFAULT_PIPELINE_BACKEND = os.getenv("RESUME_PIPELINE_BACKEND", "openai_batch")
+# Backends imported at startup so the first request doesn't pay for SDK/client setup
+PIPELINE_WARM_BACKENDS = [
+    name.strip() for name in os.getenv("RESUME_PIPELINE_WARM_BACKENDS", ",".join(PIPELINE_BACKENDS)).split(",") if name.strip()
+]
+
+
+class UnknownPipelineBackend(ValueError):
+    """Raised when a request names a backend that is not registered."""
+
+
+class PipelineBackendUnavailable(RuntimeError):
+    """Raised when a registered backend cannot be loaded (missing dependency or credentials)."""
+
+
+class _BackendStats:
+    def __init__(self):
+        self.latency = LatencyWindow()
+        self.requests = 0
+        self.errors = 0
+        self.tokens = 0
+        self.cost_usd = 0.0
+
+
+_analyzers: Dict[str, Callable] = {}
+_load_errors: Dict[str, str] = {}
+_load_lock = threading.Lock()
+_stats: Dict[str, _BackendStats] = {name: _BackendStats() for name in PIPELINE_BACKENDS}
+
+
+def resolve_backend(name: Optional[str] = None) -> str:
+    """Return the backend to use for a request: the requested one, else RESUME_PIPELINE_BACKEND (may be AUTO_BACKEND)"""
+    name = name or DEFAULT_PIPELINE_BACKEND
+    if name != AUTO_BACKEND and name not in PIPELINE_BACKENDS:
+        raise UnknownPipelineBackend(
+            f"Unknown resume pipeline backend '{name}' (available: {', '.join([*PIPELINE_BACKENDS, AUTO_BACKEND])})"
+        )
+    return name
+
+
+def load_backend(name: str) -> Callable:
+    """Import a backend's module on first use and return its analyze_resume coroutine function"""
+    analyzer = _analyzers.get(name)
+    if analyzer is not None:
+        return analyzer
+
+    with _load_lock:
+        if name not in _analyzers:
+            try:
+                module = importlib.import_module(PIPELINE_BACKENDS[name])
+            except Exception as e:
+                _load_errors[name] = f"{e.__class__.__name__}: {e}"
+                raise PipelineBackendUnavailable(f"Resume pipeline backend '{name}' is unavailable: {e}") from e
+            _analyzers[name] = module.analyze_resume
+            _load_errors.pop(name, None)
+        return _analyzers[name]
+
+
+async def warm_backends(names: List[str] = None) -> Dict[str, bool]:
+    """
+    Import backends ahead of the first request; failures are logged, not raised.
+
+    Args:
+        names (list, optional): Backends to warm, defaults to RESUME_PIPELINE_WARM_BACKENDS
+
+    Returns:
+        dict: Backend name -> whether it loaded
+    """
+    loaded = {}
+    for name in names or PIPELINE_WARM_BACKENDS:
+        if name not in PIPELINE_BACKENDS:
+            print(f"⚠️  Ignoring unknown pipeline backend '{name}' in RESUME_PIPELINE_WARM_BACKENDS")
+            continue
+        try:
+            # Module imports build SDK clients and can block, keep them off the event loop
+            await asyncio.to_thread(load_backend, name)
+            loaded[name] = True
+        except PipelineBackendUnavailable as e:
+            print(f"⚠️  {e}")
+            loaded[name] = False
+    print(f"🔥 Resume pipeline backends warmed: {loaded}")
+    return loaded
+
+
+async def run_backend(name: str, resume_text: str) -> Tuple[str, int]:
+    """
+    Run a resume through one backend, recording its latency, tokens and cost.
+
+    Args:
+        name (str): Registered backend name (see resolve_backend)
+        resume_text (str): Extracted resume text
+
+    Returns:
+        tuple: (result JSON string, total tokens) as returned by the backend
+    """
+    analyze_resume = load_backend(name)
+    stats = _stats[name]
+    stats.requests += 1
+    start = time.monotonic()
+    try:
+        result, total_tokens = await analyze_resume(resume_text)
+    except BaseException:
+        stats.errors += 1
+        raise
+    stats.latency.record(time.monotonic() - start)
+    if total_tokens:
+        stats.tokens += total_tokens
+        stats.cost_usd += calculations_cost(total_tokens).get("estimated_total_cost_usd", 0)
+    return result, total_tokens
+
+
+def get_backend_latency(name: str) -> LatencyWindow:
+    """Live latency window for a backend"""
+    return _stats[name].latency
+
+
+def get_pipeline_stats() -> Dict[str, Any]:
+    """Per-backend load state, request counts, latency percentiles, tokens and cost"""
+    backends = {}
+    for name, stats in _stats.items():
+        successes = stats.requests - stats.errors
+        backends[name] = {
+            "loaded": name in _analyzers,
+            "load_error": _load_errors.get(name),
+            "requests": stats.requests,
+            "errors": stats.errors,
+            "latency_seconds": stats.latency.summary(),
+            "tokens": stats.tokens,
+            "cost_usd": round(stats.cost_usd, 5),
+            "avg_cost_usd": round(stats.cost_usd / successes, 5) if successes else None,
+        }
+    return {"default_backend": DEFAULT_PIPELINE_BACKEND, "backends": backends}
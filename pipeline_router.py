@@ -0,0 +1,159 @@
+import os
+import re
+import json
+import threading
+from datetime import date
+from typing import Any, Dict, Optional
+from dotenv import load_dotenv
+from pipeline_registry import PIPELINE_BACKENDS, get_backend_latency, get_pipeline_stats
+from resilience import get_circuit_breaker
+
+load_dotenv()
+
+# Prior cost (USD per resume) and p95 latency (seconds) per backend, used until
+# a backend has ROUTER_MIN_SAMPLES live measurements
+DEFAULT_BACKEND_PROFILES = {
+    "openai_batch": {"cost_usd": 0.010, "p95_seconds": 15.0, "model": "gpt-4.1-mini"},
+    "parallel": {"cost_usd": 0.015, "p95_seconds": 12.0, "model": "gpt-4.1-mini"},
+    "gemini": {"cost_usd": 0.003, "p95_seconds": 20.0, "model": "gemini-2.5-flash-lite"},
+    "monolithic": {"cost_usd": 0.020, "p95_seconds": 25.0, "model": "gpt-4o"},
+}
+BACKEND_PROFILES = {**DEFAULT_BACKEND_PROFILES, **json.loads(os.getenv("ROUTER_BACKEND_PROFILES", "{}"))}
+
+ROUTER_MIN_SAMPLES = int(os.getenv("ROUTER_MIN_SAMPLES", 10))
+# "Short" resumes take the cheapest backend whose p95 is under ROUTER_FAST_P95_SECONDS
+ROUTER_SHORT_RESUME_CHARS = int(os.getenv("ROUTER_SHORT_RESUME_CHARS", 4000))
+ROUTER_SHORT_RESUME_COMPANIES = int(os.getenv("ROUTER_SHORT_RESUME_COMPANIES", 3))
+ROUTER_FAST_P95_SECONDS = float(os.getenv("ROUTER_FAST_P95_SECONDS", 20))
+# Company-heavy resumes prefer the most parallel enrichment
+ROUTER_PARALLEL_MIN_COMPANIES = int(os.getenv("ROUTER_PARALLEL_MIN_COMPANIES", 6))
+PARALLEL_PREFERENCE = ["parallel", "openai_batch", "gemini", "monolithic"]
+
+# Per-tenant daily spend budget; tenants over budget are routed to the cheapest backend
+TENANT_DAILY_BUDGET_USD = float(os.getenv("TENANT_DAILY_BUDGET_USD", 5.0))
+TENANT_BUDGETS_USD = json.loads(os.getenv("TENANT_BUDGETS_USD", "{}"))
+
+# Date ranges such as "Jan 2019 - Present", "03/2018 – 06/2020" or "2016 to 2019",
+# one per position in practically every resume layout
+_MONTH = r"(?:jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec)[a-z]*\.?"
+_DATE = rf"(?:{_MONTH}\s*,?\s*\d{{2,4}}|\d{{1,2}}[/\-.]\d{{2,4}}|(?:19|20)\d{{2}})"
+_DATE_RANGE = re.compile(rf"{_DATE}\s*(?:-|–|—|to|till|until)\s*(?:{_DATE}|present|current|now|date|today)", re.IGNORECASE)
+
+_spend: Dict[str, Dict[str, Any]] = {}
+_decisions: Dict[str, int] = {}
+_lock = threading.Lock()
+
+
+def count_positions(resume_text: str) -> int:
+    """Cheap estimate of the number of positions/companies in a resume from its date ranges"""
+    return len(_DATE_RANGE.findall(resume_text or ""))
+
+
+def tenant_budget(tenant_id: str) -> float:
+    return float(TENANT_BUDGETS_USD.get(tenant_id, TENANT_DAILY_BUDGET_USD))
+
+
+def tenant_remaining_budget(tenant_id: Optional[str]) -> Optional[float]:
+    """USD left in the tenant's budget today, or None when no tenant is given"""
+    if not tenant_id:
+        return None
+    today = date.today().isoformat()
+    with _lock:
+        entry = _spend.get(tenant_id)
+        spent = entry["spent_usd"] if entry and entry["day"] == today else 0.0
+    return tenant_budget(tenant_id) - spent
+
+
+def record_tenant_spend(tenant_id: Optional[str], cost_usd: float) -> None:
+    """Add the cost of a processed resume to the tenant's spend for today"""
+    if not tenant_id or not cost_usd:
+        return
+    today = date.today().isoformat()
+    with _lock:
+        entry = _spend.get(tenant_id)
+        if entry is None or entry["day"] != today:
+            entry = _spend[tenant_id] = {"day": today, "spent_usd": 0.0, "requests": 0}
+        entry["spent_usd"] += cost_usd
+        entry["requests"] += 1
+
+
+def backend_estimates() -> Dict[str, Dict[str, Any]]:
+    """Expected cost and p95 per routable backend: live figures once warm, profile priors before"""
+    live = get_pipeline_stats()["backends"]
+    estimates = {}
+    for name in PIPELINE_BACKENDS:
+        stats, profile = live[name], BACKEND_PROFILES.get(name, {})
+        if stats["load_error"]:
+            continue
+        # Skip backends whose provider is failing fast anyway
+        if profile.get("model") and get_circuit_breaker(profile["model"]).state == "open":
+            continue
+        warm = len(get_backend_latency(name)) >= ROUTER_MIN_SAMPLES
+        estimates[name] = {
+            "cost_usd": stats["avg_cost_usd"] if warm and stats["avg_cost_usd"] is not None else profile.get("cost_usd", 0.0),
+            "p95_seconds": stats["latency_seconds"]["p95"] if warm else profile.get("p95_seconds", float("inf")),
+            "live": warm,
+        }
+    return estimates
+
+
+def route_resume(resume_text: str, tenant_id: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Choose the resume pipeline backend for one upload.
+
+    Short resumes with few companies take the cheapest backend that is fast
+    enough; company-heavy resumes take the most parallel backend; everything
+    else takes the backend with the lowest live p95. A tenant whose remaining
+    daily budget can't cover the choice is sent to the cheapest backend.
+
+    Args:
+        resume_text (str): Extracted resume text
+        tenant_id (str, optional): Tenant the upload is billed to (X-Tenant-Id)
+
+    Returns:
+        dict: Chosen backend, the rule that chose it, and the inputs used
+    """
+    chars = len(resume_text or "")
+    positions = count_positions(resume_text)
+    remaining = tenant_remaining_budget(tenant_id)
+    estimates = backend_estimates()
+    if not estimates:
+        raise RuntimeError("No resume pipeline backend is available for routing")
+
+    cheapest = min(estimates, key=lambda name: estimates[name]["cost_usd"])
+    if chars <= ROUTER_SHORT_RESUME_CHARS and positions <= ROUTER_SHORT_RESUME_COMPANIES:
+        fast = [name for name in estimates if estimates[name]["p95_seconds"] <= ROUTER_FAST_P95_SECONDS]
+        backend = min(fast, key=lambda name: estimates[name]["cost_usd"]) if fast else cheapest
+        reason = "short_resume"
+    elif positions >= ROUTER_PARALLEL_MIN_COMPANIES:
+        backend = next(name for name in PARALLEL_PREFERENCE + list(estimates) if name in estimates)
+        reason = "company_heavy"
+    else:
+        backend = min(estimates, key=lambda name: estimates[name]["p95_seconds"])
+        reason = "lowest_p95"
+
+    if remaining is not None and remaining < estimates[backend]["cost_usd"]:
+        backend, reason = cheapest, "tenant_budget"
+
+    with _lock:
+        key = f"{backend}:{reason}"
+        _decisions[key] = _decisions.get(key, 0) + 1
+    print(f"🧭 Routed resume ({chars} chars, ~{positions} positions) to '{backend}' ({reason})")
+    return {
+        "backend": backend,
+        "reason": reason,
+        "text_chars": chars,
+        "positions_detected": positions,
+        "tenant_remaining_usd": round(remaining, 5) if remaining is not None else None,
+    }
+
+
+def get_router_stats() -> Dict[str, Any]:
+    """Routing decisions by backend and rule, current estimates and today's tenant spend"""
+    with _lock:
+        decisions = dict(_decisions)
+        tenants = {
+            tenant: {**entry, "spent_usd": round(entry["spent_usd"], 5), "budget_usd": tenant_budget(tenant)}
+            for tenant, entry in _spend.items()
+        }
+    return {"decisions": decisions, "estimates": backend_estimates(), "tenants": tenants}
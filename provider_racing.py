@@ -0,0 +1,133 @@
+import os
+import asyncio
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict
+from dotenv import load_dotenv
+from metrics import LatencyWindow
+
+load_dotenv()
+
+# Opt-in: send each phase-1 extraction to every provider and keep the first valid answer
+PROVIDER_RACING_ENABLED = os.getenv("PROVIDER_RACING_ENABLED", "false").lower() == "true"
+
+
+class _ProviderStats:
+    def __init__(self):
+        # Every answer that came back (won, lost, invalid or failed)
+        self.latency = LatencyWindow()
+        self.win_latency = LatencyWindow()
+        # Losers cancelled before answering: only known to be slower than this
+        self.censored_latency = LatencyWindow()
+        self.races = 0
+        self.wins = 0
+        self.invalid = 0
+        self.errors = 0
+        self.cancelled = 0
+
+
+_stats: Dict[str, Dict[str, _ProviderStats]] = {}
+_stats_lock = threading.Lock()
+
+
+def _provider_stats(agent: str, provider: str) -> _ProviderStats:
+    with _stats_lock:
+        return _stats.setdefault(agent, {}).setdefault(provider, _ProviderStats())
+
+
+async def race_providers(
+    agent: str,
+    contenders: Dict[str, Callable[[], Awaitable[Any]]],
+    validate: Callable[[Any], Any],
+) -> Any:
+    """
+    Run the same extraction on several providers and return the first valid answer.
+
+    Each contender's result is passed through validate (which converts it to the
+    caller's schema and raises if it doesn't fit); the first one that passes wins
+    and the others are cancelled. Blocking SDK calls already running in a worker
+    thread finish in the background, but their result is discarded.
+
+    Every contender's latency is recorded when it answers, whatever the outcome;
+    cancelled contenders are recorded as censored at the time they were cancelled.
+
+    Args:
+        agent (str): Extraction name, used for the statistics
+        contenders (dict): Provider name -> zero-argument callable returning an awaitable
+        validate (callable): Converts a raw result to the expected schema, raising on invalid output
+
+    Returns:
+        The winning provider's validated result
+
+    Raises:
+        The first contender's error if no provider returned a valid answer
+    """
+    started = time.monotonic()
+    tasks = {asyncio.ensure_future(make_call()): provider for provider, make_call in contenders.items()}
+    for provider in contenders:
+        _provider_stats(agent, provider).races += 1
+
+    errors = {}
+    pending = set(tasks)
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            elapsed = time.monotonic() - started
+            for task in done:
+                _provider_stats(agent, tasks[task]).latency.record(elapsed)
+            for task in done:
+                provider = tasks[task]
+                stats = _provider_stats(agent, provider)
+                if task.exception() is not None:
+                    stats.errors += 1
+                    errors[provider] = task.exception()
+                    continue
+                try:
+                    result = validate(task.result())
+                except Exception as e:
+                    stats.invalid += 1
+                    errors[provider] = e
+                    print(f"⚠️  {agent}: {provider} answer failed validation: {e}")
+                    continue
+                stats.wins += 1
+                stats.win_latency.record(elapsed)
+                print(f"🏁 {agent}: {provider} won the race in {elapsed:.2f}s")
+                return result
+    finally:
+        elapsed = time.monotonic() - started
+        for task in pending:
+            task.cancel()
+            stats = _provider_stats(agent, tasks[task])
+            stats.cancelled += 1
+            stats.censored_latency.record(elapsed)
+
+    print(f"❌ {agent}: no provider returned a valid answer ({', '.join(errors)})")
+    # Surface the primary (first-listed) provider's error, as if racing were off
+    primary = next(iter(contenders))
+    raise errors.get(primary) or next(iter(errors.values()))
+
+
+def get_racing_stats() -> Dict[str, Any]:
+    """Per-extraction, per-provider race counts, win rate and answer/winning/censored latency"""
+    with _stats_lock:
+        items = {agent: dict(providers) for agent, providers in _stats.items()}
+    return {
+        "enabled": PROVIDER_RACING_ENABLED,
+        "agents": {
+            agent: {
+                provider: {
+                    "races": stats.races,
+                    "wins": stats.wins,
+                    "win_rate": round(stats.wins / stats.races, 3) if stats.races else None,
+                    "invalid": stats.invalid,
+                    "errors": stats.errors,
+                    "cancelled": stats.cancelled,
+                    "latency_seconds": stats.latency.summary(),
+                    "win_latency_seconds": stats.win_latency.summary(),
+                    "censored_latency_seconds": stats.censored_latency.summary(),
+                }
+                for provider, stats in providers.items()
+            }
+            for agent, providers in items.items()
+        },
+    }
@@ -0,0 +1,158 @@
+import os
+import json
+import time
+import threading
+from typing import Dict, Optional, Tuple
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Per-model (requests per minute, tokens per minute). Set these to the account's
+# tier limits; LLM_RATE_LIMITS='{"gpt-4.1-nano-2025-04-14": {"rpm": 5000, "tpm": 4000000}}'
+# overrides or extends them without a deploy.
+DEFAULT_MODEL_RATE_LIMITS: Dict[str, Tuple[int, int]] = {
+    "gpt-4.1-nano-2025-04-14": (5000, 2_000_000),
+    "gpt-4o-mini-search-preview": (500, 200_000),
+    "gpt-4.1": (5000, 450_000),
+    "gpt-4o-2024-08-06": (5000, 800_000),
+    "gemini-2.5-flash-lite-preview-06-17": (1000, 1_000_000),
+    "gemini-2.0-flash": (1000, 1_000_000),
+    "gemini-1.5-flash": (1000, 1_000_000),
+}
+FALLBACK_RPM = int(os.getenv("LLM_DEFAULT_RPM", 500))
+FALLBACK_TPM = int(os.getenv("LLM_DEFAULT_TPM", 200_000))
+
+
+def _load_rate_limits() -> Dict[str, Tuple[int, int]]:
+    limits = dict(DEFAULT_MODEL_RATE_LIMITS)
+    overrides = os.getenv("LLM_RATE_LIMITS")
+    if overrides:
+        for model, limit in json.loads(overrides).items():
+            rpm, tpm = limits.get(model, (FALLBACK_RPM, FALLBACK_TPM))
+            limits[model] = (int(limit.get("rpm", rpm)), int(limit.get("tpm", tpm)))
+    return limits
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket with reservation semantics.
+
+    reserve() always succeeds: it deducts the requested amount immediately
+    (the level may go negative) and returns how long the caller must wait
+    before proceeding. Callers therefore queue in arrival order instead of
+    racing each other, and the bucket never rejects work.
+    """
+
+    def __init__(self, capacity: float, refill_per_second: float):
+        self.capacity = float(capacity)
+        self.refill_per_second = float(refill_per_second)
+        self._level = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._level = min(self.capacity, self._level + (now - self._updated) * self.refill_per_second)
+        self._updated = now
+
+    def reserve(self, amount: float) -> float:
+        """Deduct amount (clipped to capacity) and return the wait in seconds until it is covered"""
+        amount = min(float(amount), self.capacity)
+        with self._lock:
+            self._refill(time.monotonic())
+            self._level -= amount
+            if self._level >= 0:
+                return 0.0
+            return -self._level / self.refill_per_second
+
+    def refund(self, amount: float) -> None:
+        """Give back a reservation that was never used"""
+        self.adjust(-min(float(amount), self.capacity))
+
+    def adjust(self, delta: float) -> None:
+        """Correct an earlier reservation (positive delta = more was used than reserved)"""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._level = min(self.capacity, self._level - delta)
+
+    @property
+    def level(self) -> float:
+        with self._lock:
+            self._refill(time.monotonic())
+            return self._level
+
+
+class ModelRateLimiter:
+    """RPM and TPM buckets for one model, plus queueing statistics"""
+
+    def __init__(self, model: str, rpm: int, tpm: int):
+        self.model = model
+        self.rpm = rpm
+        self.tpm = tpm
+        self.requests = TokenBucket(rpm, rpm / 60.0)
+        self.tokens = TokenBucket(tpm, tpm / 60.0)
+        self._lock = threading.Lock()
+        self._stats = {"calls": 0, "delayed_calls": 0, "total_wait_seconds": 0.0, "max_wait_seconds": 0.0,
+                       "estimated_tokens": 0, "actual_tokens": 0, "cancelled_calls": 0}
+
+    def reserve(self, estimated_tokens: int) -> float:
+        """Reserve one request and estimated_tokens; returns the seconds to wait before calling"""
+        wait = max(self.requests.reserve(1), self.tokens.reserve(estimated_tokens))
+        with self._lock:
+            self._stats["calls"] += 1
+            self._stats["estimated_tokens"] += estimated_tokens
+            if wait > 0:
+                self._stats["delayed_calls"] += 1
+                self._stats["total_wait_seconds"] += wait
+                self._stats["max_wait_seconds"] = max(self._stats["max_wait_seconds"], wait)
+        return wait
+
+    def cancel(self, estimated_tokens: int) -> None:
+        """Refund a reservation whose caller gave up before making the call"""
+        self.requests.refund(1)
+        self.tokens.refund(estimated_tokens)
+        with self._lock:
+            self._stats["cancelled_calls"] += 1
+            self._stats["estimated_tokens"] -= estimated_tokens
+
+    def record_actual(self, estimated_tokens: int, actual_tokens: Optional[int]) -> None:
+        """Settle the TPM bucket with the token count the provider reported"""
+        if actual_tokens is None:
+            return
+        self.tokens.adjust(actual_tokens - estimated_tokens)
+        with self._lock:
+            self._stats["actual_tokens"] += actual_tokens
+
+    def stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._stats)
+        stats["total_wait_seconds"] = round(stats["total_wait_seconds"], 3)
+        stats["max_wait_seconds"] = round(stats["max_wait_seconds"], 3)
+        stats.update({
+            "rpm_limit": self.rpm,
+            "tpm_limit": self.tpm,
+            "requests_available": round(self.requests.level, 1),
+            "tokens_available": round(self.tokens.level),
+        })
+        return stats
+
+
+_limits = _load_rate_limits()
+_limiters: Dict[str, ModelRateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(model: str) -> ModelRateLimiter:
+    """Return the process-wide limiter for a model, creating it on first use"""
+    limiter = _limiters.get(model)
+    if limiter is None:
+        with _limiters_lock:
+            limiter = _limiters.get(model)
+            if limiter is None:
+                rpm, tpm = _limits.get(model, (FALLBACK_RPM, FALLBACK_TPM))
+                limiter = _limiters[model] = ModelRateLimiter(model, rpm, tpm)
+    return limiter
+
+
+def get_rate_limiter_stats() -> Dict[str, Dict]:
+    """Return queueing and bucket-level metrics for every model seen so far"""
+    return {model: limiter.stats() for model, limiter in list(_limiters.items())}
@@ -0,0 +1,177 @@
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+from dotenv import load_dotenv
+from adaptive_concurrency import is_overload_error
+
+load_dotenv()
+
+# Retries: jittered exponential backoff, bounded in attempts and total time
+RETRY_MAX_ATTEMPTS = int(os.getenv("LLM_RETRY_MAX_ATTEMPTS", 3))
+RETRY_BASE_DELAY_SECONDS = float(os.getenv("LLM_RETRY_BASE_DELAY_SECONDS", 0.5))
+RETRY_MAX_DELAY_SECONDS = float(os.getenv("LLM_RETRY_MAX_DELAY_SECONDS", 8))
+RETRY_MAX_ELAPSED_SECONDS = float(os.getenv("LLM_RETRY_MAX_ELAPSED_SECONDS", 30))
+
+# Circuit breaker: open after this many consecutive overload failures, probe again after the cooldown
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("LLM_BREAKER_FAILURE_THRESHOLD", 5))
+BREAKER_RESET_SECONDS = float(os.getenv("LLM_BREAKER_RESET_SECONDS", 30))
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a provider whose circuit breaker is open."""
+
+    def __init__(self, provider: str, retry_in: float):
+        self.provider = provider
+        self.retry_in = retry_in
+        super().__init__(f"{provider} is unavailable (circuit open, retrying in {retry_in:.0f}s)")
+
+
+def provider_for_model(model: str) -> str:
+    """Provider name a model's circuit breaker is keyed by"""
+    return "gemini" if model.startswith("gemini") else "openai"
+
+
+def is_retryable_error(exc: BaseException) -> bool:
+    """429s, 5xx, timeouts and connection errors are worth retrying; bad requests and parse errors are not"""
+    return isinstance(exc, Exception) and not isinstance(exc, CircuitOpenError) and is_overload_error(exc)
+
+
+def retry_after_seconds(exc: BaseException) -> Optional[float]:
+    """Server-requested delay from Retry-After / retry-after-ms headers on the error's response, if any"""
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+
+    retry_after_ms = headers.get("retry-after-ms")
+    if retry_after_ms:
+        try:
+            return float(retry_after_ms) / 1000
+        except ValueError:
+            pass
+
+    retry_after = headers.get("retry-after")
+    if not retry_after:
+        return None
+    try:
+        return float(retry_after)
+    except ValueError:
+        try:
+            return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+
+def backoff_delay(attempt: int, exc: Optional[BaseException] = None) -> float:
+    """
+    Delay before retry number `attempt` (1-based).
+
+    Honors Retry-After when the provider sends one; otherwise full-jitter
+    exponential backoff capped at RETRY_MAX_DELAY_SECONDS.
+    """
+    requested = retry_after_seconds(exc) if exc is not None else None
+    if requested is not None:
+        return requested
+    return random.uniform(0, min(RETRY_MAX_DELAY_SECONDS, RETRY_BASE_DELAY_SECONDS * 2 ** (attempt - 1)))
+
+
+class CircuitBreaker:
+    """
+    Closed -> open after BREAKER_FAILURE_THRESHOLD consecutive overload failures.
+    While open, calls fail fast with CircuitOpenError. After BREAKER_RESET_SECONDS
+    one probe call is let through (half-open): success closes the breaker,
+    failure re-opens it.
+    """
+
+    def __init__(self, provider: str, failure_threshold: int = BREAKER_FAILURE_THRESHOLD, reset_seconds: float = BREAKER_RESET_SECONDS):
+        self.provider = provider
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = "closed"
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+        self._stats = {"trips": 0, "short_circuited": 0, "retries": 0, "gave_up": 0}
+
+    def before_call(self) -> None:
+        """Raise CircuitOpenError if the call must not go out"""
+        with self._lock:
+            if self.state == "closed":
+                return
+            remaining = self._opened_at + self.reset_seconds - time.monotonic()
+            if self.state == "open" and remaining <= 0:
+                self.state = "half_open"
+            if self.state == "half_open" and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return
+            self._stats["short_circuited"] += 1
+            raise CircuitOpenError(self.provider, max(remaining, 0.0))
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self.state != "closed":
+                print(f"🟢 Circuit breaker for {self.provider} closed")
+            self.state = "closed"
+            self._consecutive_failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self, exc: BaseException) -> None:
+        """Count a failed call; only overload errors move the breaker"""
+        with self._lock:
+            probe = self._probe_in_flight
+            self._probe_in_flight = False
+            if not is_retryable_error(exc):
+                return
+            self._consecutive_failures += 1
+            if probe or (self.state == "closed" and self._consecutive_failures >= self.failure_threshold):
+                self.state = "open"
+                self._opened_at = time.monotonic()
+                self._stats["trips"] += 1
+                print(f"🔴 Circuit breaker for {self.provider} opened after {self._consecutive_failures} consecutive failures")
+
+    def record_retry(self) -> None:
+        with self._lock:
+            self._stats["retries"] += 1
+
+    def record_give_up(self) -> None:
+        with self._lock:
+            self._stats["gave_up"] += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"state": self.state, "consecutive_failures": self._consecutive_failures, **self._stats}
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+_degraded: Dict[str, int] = {}
+
+
+def get_circuit_breaker(model: str) -> CircuitBreaker:
+    """Return the process-wide circuit breaker for a model's provider"""
+    provider = provider_for_model(model)
+    breaker = _breakers.get(provider)
+    if breaker is None:
+        with _breakers_lock:
+            breaker = _breakers.setdefault(provider, CircuitBreaker(provider))
+    return breaker
+
+
+def record_degraded(component: str) -> None:
+    """Count a response served with fallback data because an LLM call failed"""
+    with _breakers_lock:
+        _degraded[component] = _degraded.get(component, 0) + 1
+
+
+def get_resilience_stats() -> Dict:
+    """Breaker state, retry/trip counters per provider and degraded-response counts"""
+    with _breakers_lock:
+        degraded = dict(_degraded)
+    return {
+        "providers": {provider: breaker.stats() for provider, breaker in list(_breakers.items())},
+        "degraded_responses": degraded,
+    }
@@ -3,9 +3,15 @@ import re
 from pydantic import BaseModel
 from openai import OpenAI
 from dotenv import load_dotenv
+from company_cache import get_cached_company, cache_company
+from company_names import canonical_company_key
+from llm_gateway import llm_call, estimate_tokens
 load_dotenv()
 openai_api_key = os.getenv("OPENAI_API_KEY")
-client = OpenAI()
+client = OpenAI(max_retries=0)  # retries are handled by llm_gateway
+
+PARSER_MODEL = "gpt-4o-2024-08-06"
+SEARCH_MODEL = "gpt-4.1"
 
 class Duration(BaseModel):
     StartDate: str
@@ -44,7 +50,7 @@ class resume_data(BaseModel):
     steps: list[Step]
 
 
-def search_batch_company_info(company_names: list[str]) -> dict:
+async def search_batch_company_info(company_names: list[str]) -> dict:
     """
     Search for multiple companies' information in batch using OpenAI's Web Search
     
@@ -83,14 +89,14 @@ def search_batch_company_info(company_names: list[str]) -> dict:
         Please be as specific as possible with numbers and include the company name exactly as listed above.
         """
         
-        response = client.responses.create(
-            model="gpt-4.1",
+        response = await llm_call(SEARCH_MODEL, lambda: client.responses.create(
+            model=SEARCH_MODEL,
             tools=[{
                 "type": "web_search_preview", 
                 "search_context_size": "high"
             }],
             input=batch_prompt
-        )
+        ), estimate_tokens(batch_prompt, output_tokens=100 * len(company_names)), blocking=True)
         
         # Extract text from the response structure
         response_text = ""
@@ -269,7 +275,8 @@ def extract_unique_company_names(experience_list: list[ExperienceItem]) -> list[
         experience_list: List of experience items
         
     Returns:
-        List of unique company names that need information lookup
+        List of unique company names that need information lookup, one per
+        canonical company ("TCS" and "Tata Consultancy Services" are one lookup)
     """
     companies_needing_info = []
     seen_companies = set()
@@ -278,15 +285,16 @@ def extract_unique_company_names(experience_list: list[ExperienceItem]) -> list[
         # Check if this company needs information and hasn't been processed
         needs_info = (exp.NumberOfEmployees is None or exp.Funding is None)
         company_name = exp.CompanyName
+        company_key = canonical_company_key(company_name)
         
-        if needs_info and company_name not in seen_companies:
+        if needs_info and company_key not in seen_companies:
             companies_needing_info.append(company_name)
-            seen_companies.add(company_name)
+            seen_companies.add(company_key)
     
     return companies_needing_info
 
 
-def enrich_company_data_batch(experience_list: list[ExperienceItem]) -> list[ExperienceItem]:
+async def enrich_company_data_batch(experience_list: list[ExperienceItem]) -> list[ExperienceItem]:
     """
     Enrich company data by searching for all companies at once (batch processing)
     
@@ -303,19 +311,40 @@ def enrich_company_data_batch(experience_list: list[ExperienceItem]) -> list[Exp
         print("ℹ️ No companies need enrichment")
         return experience_list
     
-    print(f"🔍 Batch searching for {len(companies_to_search)} companies: {', '.join(companies_to_search)}")
+    # Serve companies from the enrichment cache and only search for the rest;
+    # results are keyed by canonical company so every alias of an employer gets them
+    company_info_dict = {}
+    cache_misses = []
+    for company_name in companies_to_search:
+        cached = get_cached_company(company_name, fields=("NumberOfEmployees", "Funding"))
+        if cached is not None:
+            company_info_dict[canonical_company_key(company_name)] = cached
+        else:
+            cache_misses.append(company_name)
     
-    # Perform batch search
-    company_info_dict = search_batch_company_info(companies_to_search)
+    if company_info_dict:
+        print(f"💾 Company cache: {len(company_info_dict)} hit(s), {len(cache_misses)} to search")
+    
+    if cache_misses:
+        print(f"🔍 Batch searching for {len(cache_misses)} companies: {', '.join(cache_misses)}")
+        
+        # Perform batch search
+        searched_info = await search_batch_company_info(cache_misses)
+        for company_name, company_info in searched_info.items():
+            # Only cache companies the search actually found something for
+            if company_info.get("NumberOfEmployees") or company_info.get("Funding"):
+                cache_company(company_name, company_info)
+            company_info_dict[canonical_company_key(company_name)] = company_info
     
     # Update experience items with the retrieved information
     enriched_experience = []
     for exp in experience_list:
         enriched_exp = exp.model_copy()
         company_name = exp.CompanyName
+        company_key = canonical_company_key(company_name)
         
-        if company_name in company_info_dict:
-            company_info = company_info_dict[company_name]
+        if company_key in company_info_dict:
+            company_info = company_info_dict[company_key]
             
             # Update missing fields
             if exp.NumberOfEmployees is None and company_info.get("NumberOfEmployees"):
@@ -475,14 +504,14 @@ async def analyze_resume(input_question):
 
         """
 
-    completion = client.beta.chat.completions.parse(
-    model="gpt-4o-2024-08-06",
+    completion = await llm_call(PARSER_MODEL, lambda: client.beta.chat.completions.parse(
+    model=PARSER_MODEL,
     messages=[
         {"role": "system", "content": prompt_template},
         {"role": "user", "content": input_question}
     ],
     response_format=resume_data,
-    )
+    ), estimate_tokens(prompt_template, input_question), blocking=True)
 
     math_reasoning = completion.choices[0].message
 
@@ -512,7 +541,7 @@ async def analyze_resume(input_question):
         if needs_enrichment:
             print("🔍 Found null company data. Automatically enriching with web search...")
             for step in parsed_data.steps:
-                step.Experience = enrich_company_data_batch(step.Experience)
+                step.Experience = await enrich_company_data_batch(step.Experience)
             print("✅ Company data enrichment completed")
         else:
             print("ℹ️ All company data already populated. Skipping web search.")
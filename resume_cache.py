@@ -0,0 +1,61 @@
+import os
+import re
+import hashlib
+import unicodedata
+from typing import Any, Dict, Iterable, Optional
+from dotenv import load_dotenv
+from persistent_cache import PersistentCache
+
+load_dotenv()
+
+# Parsed resume results keyed by content hash, so duplicate uploads skip extraction and the LLM pipeline
+resume_result_cache = PersistentCache(
+    name="resume_results",
+    path=os.getenv("RESUME_CACHE_PATH", "cache/resume_results.sqlite3"),
+    max_entries=int(os.getenv("RESUME_CACHE_MAX_ENTRIES", 5000)),
+    default_ttl_seconds=float(os.getenv("RESUME_CACHE_TTL_SECONDS", 30 * 24 * 3600)),
+)
+
+# Shorter texts (scanned/image-only PDFs extract to "" or a stray header) are not
+# distinctive enough to identify a resume, so they are cached by file hash only
+RESUME_TEXT_HASH_MIN_CHARS = int(os.getenv("RESUME_TEXT_HASH_MIN_CHARS", 200))
+
+
+def hash_file_bytes(file_bytes: bytes) -> str:
+    """Cache key for the raw uploaded file"""
+    return "file:" + hashlib.sha256(file_bytes).hexdigest()
+
+
+def normalize_resume_text(text: str) -> str:
+    """Fold Unicode forms and whitespace so re-exports of the same resume hash identically"""
+    text = unicodedata.normalize("NFKC", text or "")
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def hash_resume_text(text: str) -> Optional[str]:
+    """Cache key for the normalized extracted text, or None if the text is too short to identify a resume"""
+    normalized = normalize_resume_text(text)
+    if len(normalized) < RESUME_TEXT_HASH_MIN_CHARS:
+        return None
+    return "text:" + hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def _backend_key(key: str, backend: str) -> str:
+    # Results are per pipeline backend, so ?backend=gemini never gets another backend's analysis
+    return f"{backend}|{key}"
+
+
+def get_cached_resume(key: str, backend: str) -> Optional[Dict[str, Any]]:
+    """Return the cached analysis result for a file or text hash from the given backend ("auto" for routed uploads), or None"""
+    return resume_result_cache.get(_backend_key(key, backend))
+
+
+def cache_resume_result(keys: Iterable[str], result: Dict[str, Any], backend: str) -> None:
+    """Store a backend's analysis result under every given hash"""
+    for key in keys:
+        resume_result_cache.set(_backend_key(key, backend), result)
+
+
+def get_resume_cache_stats() -> Dict[str, Any]:
+    """Return hit-rate and size metrics for the resume result cache"""
+    return resume_result_cache.stats()
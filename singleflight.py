@@ -0,0 +1,124 @@
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent lookups of the same key into one in-flight call.
+
+    The first caller for a key (the leader) runs the lookup; callers that
+    arrive while it is in flight await the leader's result instead of issuing
+    a duplicate call. Keys are forgotten as soon as the call completes, so
+    this never serves stale data; results are cached elsewhere.
+
+    Callers either use do() for a single key, or claim()/resolve()/reject()
+    when one upstream call answers several keys at once.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+        self._lock = threading.Lock()
+        self._stats = {"leaders": 0, "coalesced": 0, "leader_failures": 0}
+
+    def claim(self, key: Hashable) -> Tuple[asyncio.Future, bool]:
+        """
+        Join the in-flight call for key, or become its leader.
+
+        Returns:
+            tuple: (future resolving to the key's result, True if the caller is the leader
+            and must call resolve() or reject())
+        """
+        with self._lock:
+            future = self._in_flight.get(key)
+            if future is not None and not future.done():
+                self._stats["coalesced"] += 1
+                return future, False
+            future = asyncio.get_running_loop().create_future()
+            # Nobody may be waiting: mark a failure as retrieved so it isn't logged as unhandled
+            future.add_done_callback(lambda f: f.cancelled() or f.exception())
+            self._in_flight[key] = future
+            self._stats["leaders"] += 1
+            return future, True
+
+    def _settle(self, key: Hashable, future: asyncio.Future) -> None:
+        with self._lock:
+            if self._in_flight.get(key) is future:
+                del self._in_flight[key]
+
+    def resolve(self, key: Hashable, future: asyncio.Future, value: Any) -> None:
+        """Publish the leader's result to every waiter"""
+        self._settle(key, future)
+        if not future.done():
+            future.set_result(value)
+
+    def reject(self, key: Hashable, future: asyncio.Future, exc: BaseException) -> None:
+        """Fail the call for every waiter; a cancelled leader lets waiters retry instead"""
+        self._settle(key, future)
+        if future.done():
+            return
+        if isinstance(exc, asyncio.CancelledError):
+            future.cancel()
+        else:
+            with self._lock:
+                self._stats["leader_failures"] += 1
+            future.set_exception(exc)
+
+    async def wait(self, key: Hashable, future: asyncio.Future, call: Callable[[], Awaitable[Any]]) -> Any:
+        """Await another caller's in-flight result, taking over with call() if that leader was cancelled"""
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            if not future.cancelled():
+                raise  # we were cancelled ourselves
+        return await self.do(key, call)
+
+    async def do(self, key: Hashable, call: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run call() for key unless an identical call is already in flight.
+
+        Args:
+            key: Coalescing key (e.g. canonical company key)
+            call (callable): Zero-argument callable returning an awaitable
+
+        Returns:
+            The result of the single in-flight call
+        """
+        future, leader = self.claim(key)
+        if not leader:
+            return await self.wait(key, future, call)
+        try:
+            result = await call()
+        except BaseException as e:
+            self.reject(key, future, e)
+            raise
+        self.resolve(key, future, result)
+        return result
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self._stats["leaders"] + self._stats["coalesced"]
+            return {
+                "in_flight": len(self._in_flight),
+                **self._stats,
+                "coalesced_rate": round(self._stats["coalesced"] / lookups, 4) if lookups else None,
+            }
+
+
+_flights: Dict[str, SingleFlight] = {}
+_flights_lock = threading.Lock()
+
+
+def get_single_flight(name: str) -> SingleFlight:
+    """Return the process-wide coalescer for a kind of lookup"""
+    flight = _flights.get(name)
+    if flight is None:
+        with _flights_lock:
+            flight = _flights.setdefault(name, SingleFlight(name))
+    return flight
+
+
+def get_single_flight_stats() -> Dict[str, Dict]:
+    """Leader/coalesced counters for every coalescer"""
+    return {name: flight.stats() for name, flight in list(_flights.items())}
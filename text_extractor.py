@@ -1,9 +1,39 @@
 import os
+import asyncio
+import time
+import multiprocessing
 import PyPDF2
 import pdfplumber
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from docx import Document
 from typing import Optional
 
+# Process pool for CPU-heavy extraction (pdfplumber layout analysis can take
+# seconds per multi-page PDF), sized to the available cores by default
+EXTRACTION_WORKERS = int(os.getenv("EXTRACTION_WORKERS", os.cpu_count() or 1))
+# Maximum number of extractions queued or running before new ones are rejected
+EXTRACTION_MAX_PENDING = int(os.getenv("EXTRACTION_MAX_PENDING", EXTRACTION_WORKERS * 4))
+# Recycle workers periodically so pdfminer memory growth stays bounded
+EXTRACTION_MAX_TASKS_PER_CHILD = int(os.getenv("EXTRACTION_MAX_TASKS_PER_CHILD", 50))
+
+_extraction_pool: Optional[ProcessPoolExecutor] = None
+_extraction_slots: Optional[asyncio.Semaphore] = None
+_extraction_stats = {
+    "queued": 0,
+    "running": 0,
+    "completed": 0,
+    "failed": 0,
+    "rejected": 0,
+    "max_queue_depth": 0,
+    "total_wait_seconds": 0.0,
+    "total_run_seconds": 0.0,
+}
+
+
+class ExtractionQueueFull(Exception):
+    """Raised when the extraction pool already has EXTRACTION_MAX_PENDING jobs."""
+
 def extract_text_from_file(file_path: str) -> str:
     """
     Extract text from PDF, DOCX, or TXT files.
@@ -165,3 +195,116 @@ def extract_text_with_metadata(file_path: str) -> dict:
         return result
 
 
+def start_extraction_pool(max_workers: Optional[int] = None) -> ProcessPoolExecutor:
+    """Create the extraction process pool (idempotent)."""
+    global _extraction_pool, _extraction_slots
+    if _extraction_pool is None:
+        workers = max_workers or EXTRACTION_WORKERS
+        # spawn keeps the workers free of the parent's event loop and threads
+        _extraction_pool = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            max_tasks_per_child=EXTRACTION_MAX_TASKS_PER_CHILD,
+        )
+        # A replacement pool keeps the existing slots, which queued callers are waiting on
+        if _extraction_slots is None:
+            _extraction_slots = asyncio.Semaphore(workers)
+        print(f"🧵 Text extraction pool started with {workers} worker processes")
+    return _extraction_pool
+
+
+def replace_extraction_pool(broken: ProcessPoolExecutor) -> ProcessPoolExecutor:
+    """
+    Swap a broken pool for a fresh one without blocking the event loop.
+
+    Only the first caller to report a given pool replaces it; later callers get
+    the pool that is already current. The old pool is shut down without waiting.
+    """
+    global _extraction_pool
+    if _extraction_pool is broken:
+        _extraction_pool = None
+        start_extraction_pool()
+        broken.shutdown(wait=False, cancel_futures=True)
+    return start_extraction_pool()
+
+
+def shutdown_extraction_pool() -> None:
+    """Shut down the extraction process pool if it is running."""
+    global _extraction_pool, _extraction_slots
+    if _extraction_pool is not None:
+        _extraction_pool.shutdown(wait=True, cancel_futures=True)
+        _extraction_pool = None
+        _extraction_slots = None
+
+
+async def extract_text_from_file_async(file_path: str) -> str:
+    """
+    Extract text from a file in the extraction process pool.
+    
+    Only as many extractions as there are workers are handed to the pool at
+    once; the rest wait here so the queue depth stays observable and bounded.
+    
+    Raises:
+        ExtractionQueueFull: If EXTRACTION_MAX_PENDING extractions are already pending
+    """
+    start_extraction_pool()
+    slots = _extraction_slots
+    stats = _extraction_stats
+    
+    if stats["queued"] + stats["running"] >= EXTRACTION_MAX_PENDING:
+        stats["rejected"] += 1
+        raise ExtractionQueueFull(
+            f"Text extraction queue is full ({EXTRACTION_MAX_PENDING} pending)"
+        )
+    
+    queued_at = time.perf_counter()
+    stats["queued"] += 1
+    stats["max_queue_depth"] = max(stats["max_queue_depth"], stats["queued"])
+    try:
+        await slots.acquire()
+    finally:
+        stats["queued"] -= 1
+    
+    started_at = time.perf_counter()
+    stats["total_wait_seconds"] += started_at - queued_at
+    stats["running"] += 1
+    try:
+        loop = asyncio.get_running_loop()
+        # The pool may have been replaced while this call was queued
+        pool = start_extraction_pool()
+        try:
+            text = await loop.run_in_executor(pool, extract_text_from_file, file_path)
+        except (BrokenProcessPool, RuntimeError) as e:
+            # A worker died (e.g. a pathological PDF), or another call already retired this pool
+            if not isinstance(e, BrokenProcessPool) and pool is _extraction_pool:
+                raise
+            print(f"⚠️ Text extraction pool unavailable ({e.__class__.__name__}), retrying on a fresh pool")
+            pool = replace_extraction_pool(pool)
+            text = await loop.run_in_executor(pool, extract_text_from_file, file_path)
+        stats["completed"] += 1
+        return text
+    except BrokenProcessPool:
+        # Failed again on the fresh pool; retire it so later calls start clean
+        stats["failed"] += 1
+        replace_extraction_pool(pool)
+        raise
+    except Exception:
+        stats["failed"] += 1
+        raise
+    finally:
+        stats["running"] -= 1
+        stats["total_run_seconds"] += time.perf_counter() - started_at
+        slots.release()
+
+
+def get_extraction_stats() -> dict:
+    """Return queue depth and timing metrics for the extraction pool."""
+    stats = dict(_extraction_stats)
+    finished = stats["completed"] + stats["failed"]
+    stats["workers"] = _extraction_pool._max_workers if _extraction_pool else 0
+    stats["max_pending"] = EXTRACTION_MAX_PENDING
+    stats["avg_wait_seconds"] = round(stats["total_wait_seconds"] / finished, 4) if finished else 0.0
+    stats["avg_run_seconds"] = round(stats["total_run_seconds"] / finished, 4) if finished else 0.0
+    stats["total_wait_seconds"] = round(stats["total_wait_seconds"], 4)
+    stats["total_run_seconds"] = round(stats["total_run_seconds"], 4)
+    return stats